@@ -0,0 +1,78 @@
+"""Add denormalized counters
+
+Revision ID: 3f6a2d8c1e57
+Revises: 9e4c7a1d2b36
+Create Date: 2026-10-18 15:02:19.847330
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6a2d8c1e57"
+down_revision: Union[str, None] = "9e4c7a1d2b36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "promotions",
+        sa.Column("reaction_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "promotions",
+        sa.Column("comment_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "coupons", sa.Column("reaction_count", sa.Integer(), server_default="0", nullable=False)
+    )
+    op.add_column(
+        "coupons", sa.Column("comment_count", sa.Integer(), server_default="0", nullable=False)
+    )
+    op.add_column(
+        "comments", sa.Column("like_count", sa.Integer(), server_default="0", nullable=False)
+    )
+
+    # Preencher os contadores com os dados existentes
+    op.execute(
+        """
+        UPDATE promotions SET
+            reaction_count = (
+                SELECT count(*) FROM reactions WHERE reactions.promotion_id = promotions.id
+            ),
+            comment_count = (
+                SELECT count(*) FROM comments WHERE comments.promotion_id = promotions.id
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE coupons SET
+            reaction_count = (
+                SELECT count(*) FROM reactions WHERE reactions.coupon_id = coupons.id
+            ),
+            comment_count = (
+                SELECT count(*) FROM comments WHERE comments.coupon_id = coupons.id
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE comments SET
+            like_count = (
+                SELECT count(*) FROM comment_likes WHERE comment_likes.comment_id = comments.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("comments", "like_count")
+    op.drop_column("coupons", "comment_count")
+    op.drop_column("coupons", "reaction_count")
+    op.drop_column("promotions", "comment_count")
+    op.drop_column("promotions", "reaction_count")
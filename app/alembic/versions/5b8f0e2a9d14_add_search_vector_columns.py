@@ -0,0 +1,75 @@
+"""Add search_vector columns
+
+Revision ID: 5b8f0e2a9d14
+Revises: c21761e796e3
+Create Date: 2026-10-18 13:52:07.318604
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8f0e2a9d14"
+down_revision: Union[str, None] = "c21761e796e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('portuguese', coalesce(product, '')), 'A') || "
+    "setweight(to_tsvector('portuguese', coalesce(store, '')), 'B') || "
+    "setweight(to_tsvector('portuguese', coalesce(comment, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "promotions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.drop_index("idx_promotion_search_text", table_name="promotions")
+    op.create_index(
+        "idx_promotion_search_vector",
+        "promotions",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.add_column(
+        "coupons",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.drop_index("idx_coupon_search_text", table_name="coupons")
+    op.create_index(
+        "idx_coupon_search_vector",
+        "coupons",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_coupon_search_vector", table_name="coupons", postgresql_using="gin")
+    op.create_index(
+        "idx_coupon_search_text", "coupons", ["product", "store", "comment"], unique=False
+    )
+    op.drop_column("coupons", "search_vector")
+    op.drop_index("idx_promotion_search_vector", table_name="promotions", postgresql_using="gin")
+    op.create_index(
+        "idx_promotion_search_text", "promotions", ["product", "store", "comment"], unique=False
+    )
+    op.drop_column("promotions", "search_vector")
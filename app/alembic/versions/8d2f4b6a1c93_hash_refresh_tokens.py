@@ -0,0 +1,64 @@
+"""Hash refresh tokens
+
+Revision ID: 8d2f4b6a1c93
+Revises: 3f6a2d8c1e57
+Create Date: 2026-10-18 17:41:06.512904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2f4b6a1c93"
+down_revision: Union[str, None] = "3f6a2d8c1e57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("refresh_tokens", sa.Column("token_hash", sa.String(length=64), nullable=True))
+    op.add_column("refresh_tokens", sa.Column("family_id", sa.String(length=32), nullable=True))
+    op.add_column(
+        "refresh_tokens", sa.Column("replaced_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+    # Tokens existentes continuam válidos: hash do JWT e uma família por token
+    op.execute("DELETE FROM refresh_tokens WHERE expires_at <= now()")
+    op.execute("""
+        UPDATE refresh_tokens SET
+            token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex'),
+            family_id = md5(id::text || clock_timestamp()::text)
+        """)
+
+    op.alter_column("refresh_tokens", "token_hash", nullable=False)
+    op.alter_column("refresh_tokens", "family_id", nullable=False)
+    op.drop_constraint("refresh_tokens_token_key", "refresh_tokens", type_="unique")
+    op.drop_column("refresh_tokens", "token")
+    op.create_unique_constraint("refresh_tokens_token_hash_key", "refresh_tokens", ["token_hash"])
+    op.create_index(
+        op.f("ix_refresh_tokens_family_id"), "refresh_tokens", ["family_id"], unique=False
+    )
+    op.create_index(
+        "idx_refresh_token_user_created_at",
+        "refresh_tokens",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+    op.create_index("idx_refresh_token_expires_at", "refresh_tokens", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    # O JWT original não pode ser recuperado do hash: as sessões são encerradas
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_index("idx_refresh_token_expires_at", table_name="refresh_tokens")
+    op.drop_index("idx_refresh_token_user_created_at", table_name="refresh_tokens")
+    op.drop_index(op.f("ix_refresh_tokens_family_id"), table_name="refresh_tokens")
+    op.drop_constraint("refresh_tokens_token_hash_key", "refresh_tokens", type_="unique")
+    op.add_column("refresh_tokens", sa.Column("token", sa.String(), nullable=False))
+    op.create_unique_constraint("refresh_tokens_token_key", "refresh_tokens", ["token"])
+    op.drop_column("refresh_tokens", "replaced_at")
+    op.drop_column("refresh_tokens", "family_id")
+    op.drop_column("refresh_tokens", "token_hash")
@@ -0,0 +1,61 @@
+"""Add trigram indexes
+
+Revision ID: 9e4c7a1d2b36
+Revises: 5b8f0e2a9d14
+Create Date: 2026-10-18 14:21:55.604118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4c7a1d2b36"
+down_revision: Union[str, None] = "5b8f0e2a9d14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_promotion_product_trgm",
+        "promotions",
+        ["product"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"product": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_promotion_store_trgm",
+        "promotions",
+        ["store"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"store": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_coupon_product_trgm",
+        "coupons",
+        ["product"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"product": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_coupon_store_trgm",
+        "coupons",
+        ["store"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"store": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    # A extensão pg_trgm é mantida, pois pode ser usada por outros objetos do banco
+    op.drop_index("idx_coupon_store_trgm", table_name="coupons", postgresql_using="gin")
+    op.drop_index("idx_coupon_product_trgm", table_name="coupons", postgresql_using="gin")
+    op.drop_index("idx_promotion_store_trgm", table_name="promotions", postgresql_using="gin")
+    op.drop_index("idx_promotion_product_trgm", table_name="promotions", postgresql_using="gin")
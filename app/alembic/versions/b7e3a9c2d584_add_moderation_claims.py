@@ -0,0 +1,30 @@
+"""Add moderation claims
+
+Revision ID: b7e3a9c2d584
+Revises: 8d2f4b6a1c93
+Create Date: 2026-10-18 19:12:44.208371
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3a9c2d584"
+down_revision: Union[str, None] = "8d2f4b6a1c93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("promotions", "coupons"):
+        op.add_column(table, sa.Column("claimed_by", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("claimed_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ("promotions", "coupons"):
+        op.drop_column(table, "claimed_until")
+        op.drop_column(table, "claimed_by")
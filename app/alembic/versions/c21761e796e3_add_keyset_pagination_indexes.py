@@ -0,0 +1,76 @@
+"""Add keyset pagination indexes
+
+Revision ID: c21761e796e3
+Revises: f83cb7a152c4
+Create Date: 2026-10-18 09:12:41.503217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c21761e796e3"
+down_revision: Union[str, None] = "f83cb7a152c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("idx_promotion_status_created_at", table_name="promotions")
+    op.create_index(
+        "idx_promotion_status_created_at",
+        "promotions",
+        ["status", "created_at", "id"],
+        unique=False,
+    )
+    op.drop_index("idx_promotion_user_id", table_name="promotions")
+    op.create_index(
+        "idx_promotion_user_created_at",
+        "promotions",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.drop_index("idx_coupon_status_created_at", table_name="coupons")
+    op.create_index(
+        "idx_coupon_status_created_at", "coupons", ["status", "created_at", "id"], unique=False
+    )
+    op.drop_index("idx_coupon_user_id", table_name="coupons")
+    op.create_index(
+        "idx_coupon_user_created_at", "coupons", ["user_id", "created_at", "id"], unique=False
+    )
+    op.create_index(
+        "idx_comment_promotion_created_at",
+        "comments",
+        ["promotion_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "idx_comment_coupon_created_at", "comments", ["coupon_id", "created_at", "id"], unique=False
+    )
+    op.create_index(
+        "idx_comment_parent_created_at", "comments", ["parent_id", "created_at", "id"], unique=False
+    )
+    op.create_index(
+        "idx_comment_user_created_at", "comments", ["user_id", "created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_comment_user_created_at", table_name="comments")
+    op.drop_index("idx_comment_parent_created_at", table_name="comments")
+    op.drop_index("idx_comment_coupon_created_at", table_name="comments")
+    op.drop_index("idx_comment_promotion_created_at", table_name="comments")
+    op.drop_index("idx_coupon_user_created_at", table_name="coupons")
+    op.create_index("idx_coupon_user_id", "coupons", ["user_id"], unique=False)
+    op.drop_index("idx_coupon_status_created_at", table_name="coupons")
+    op.create_index(
+        "idx_coupon_status_created_at", "coupons", ["status", "created_at"], unique=False
+    )
+    op.drop_index("idx_promotion_user_created_at", table_name="promotions")
+    op.create_index("idx_promotion_user_id", "promotions", ["user_id"], unique=False)
+    op.drop_index("idx_promotion_status_created_at", table_name="promotions")
+    op.create_index(
+        "idx_promotion_status_created_at", "promotions", ["status", "created_at"], unique=False
+    )
@@ -0,0 +1,46 @@
+"""Add canonical link keys
+
+Revision ID: c5d1f8e3a706
+Revises: b7e3a9c2d584
+Create Date: 2026-10-18 21:05:37.514920
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d1f8e3a706"
+down_revision: Union[str, None] = "b7e3a9c2d584"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # As chaves das linhas existentes são preenchidas depois, em lotes, com
+    # `python -m src.services.duplicates` (a normalização é feita em Python)
+    for table, single, columns in (
+        ("promotions", "promotion", ["canonical_key"]),
+        ("coupons", "coupon", ["canonical_key", "code"]),
+    ):
+        op.add_column(table, sa.Column("canonical_key", sa.String(length=255), nullable=True))
+        op.add_column(table, sa.Column("duplicate_of_id", sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            f"fk_{single}_duplicate_of_id",
+            table,
+            table,
+            ["duplicate_of_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+        op.create_index(f"idx_{single}_canonical_key", table, columns)
+
+
+def downgrade() -> None:
+    for table, single in (("promotions", "promotion"), ("coupons", "coupon")):
+        op.drop_index(f"idx_{single}_canonical_key", table_name=table)
+        op.drop_constraint(f"fk_{single}_duplicate_of_id", table, type_="foreignkey")
+        op.drop_column(table, "duplicate_of_id")
+        op.drop_column(table, "canonical_key")
@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+
+"""
+Benchmark dos endpoints mais usados (feed, busca, comentários, reações, login e moderação).
+
+    python -m benchmarks.seed --database-url sqlite:///bench.db --scale small
+    python -m benchmarks.run --database-url sqlite:///bench.db --output resultado.json
+    python -m benchmarks.compare baseline.json resultado.json
+    python -m benchmarks.serialization --items 100
+
+Ver os docstrings de seed.py, run.py, compare.py e serialization.py.
+"""
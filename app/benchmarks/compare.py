@@ -0,0 +1,100 @@
+# benchmarks/compare.py
+
+"""
+Compara um relatório do `benchmarks.run` com uma baseline salva.
+
+Um cenário regride quando o p95 ou o p99 piora mais que a tolerância (padrão 20%, e pelo
+menos `--min-delta-ms`, para não acusar ruído em rotas de poucos milissegundos), quando a
+vazão cai mais que a tolerância, quando faz mais queries por requisição (qualquer aumento
+é um N+1 novo) ou quando passa a ter erros. Sai com código 1 se houver regressão, para
+barrar o deploy no CI.
+
+    python -m benchmarks.compare baseline.json resultado.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Tuple
+
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+# Só p95/p99 reprovam; p50 aparece na tabela como referência
+GATED_LATENCIES = ("p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(after - before) / before:+6.0%}"
+
+
+def compare(
+    baseline: dict, result: dict, tolerance: float = 0.2, min_delta_ms: float = 1.0
+) -> Tuple[List[str], List[str]]:
+    """Retorna (linhas da tabela, regressões encontradas)."""
+    lines, regressions = [], []
+    meta_before, meta_after = baseline.get("meta", {}), result.get("meta", {})
+    for field in ("dialect", "requests", "concurrency", "cache"):
+        if meta_before.get(field) != meta_after.get(field):
+            lines.append(
+                f"aviso: {field} diferente ({meta_before.get(field)} -> {meta_after.get(field)})"
+            )
+
+    for name, before in baseline.get("scenarios", {}).items():
+        after = result.get("scenarios", {}).get(name)
+        if after is None:
+            lines.append(f"{name}: ausente no resultado")
+            continue
+        for field in LATENCY_FIELDS:
+            old, new = before[field], after[field]
+            lines.append(f"{name:<24}{field:<8}{old:>10.2f}{new:>10.2f}  {_change(old, new)}")
+            if (
+                field in GATED_LATENCIES
+                and new > old * (1 + tolerance)
+                and new - old >= min_delta_ms
+            ):
+                regressions.append(f"{name}: {field} {old:.2f} -> {new:.2f} ms")
+
+        old, new = before["throughput_rps"], after["throughput_rps"]
+        lines.append(f"{name:<24}{'req/s':<8}{old:>10.1f}{new:>10.1f}  {_change(old, new)}")
+        if new < old * (1 - tolerance):
+            regressions.append(f"{name}: vazão {old:.1f} -> {new:.1f} req/s")
+
+        old, new = before.get("queries_per_request"), after.get("queries_per_request")
+        if old is not None and new is not None:
+            lines.append(f"{name:<24}{'queries':<8}{old:>10.2f}{new:>10.2f}  {_change(old, new)}")
+            if new > old:
+                regressions.append(f"{name}: queries por requisição {old} -> {new}")
+
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{name}: erros {before['errors']} -> {after['errors']}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o benchmark com a baseline")
+    parser.add_argument("baseline")
+    parser.add_argument("result")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora aceita (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.result, encoding="utf-8") as result_file:
+        result = json.load(result_file)
+
+    lines, regressions = compare(baseline, result, args.tolerance, args.min_delta_ms)
+    print(f"{'cenário':<24}{'métrica':<8}{'baseline':>10}{'atual':>10}  {'var.':>6}")
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nSem regressões.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+# benchmarks/run.py
+
+"""
+Mede latência, vazão e queries por requisição dos endpoints mais usados.
+
+A aplicação roda no mesmo processo (httpx + ASGITransport, sem servidor HTTP), com as
+sessões apontando para o banco semeado por `benchmarks.seed`. Cada cenário roda sozinho:
+algumas requisições de aquecimento e depois `--requests` requisições divididas entre
+`--concurrency` clientes simultâneos. Os IDs consultados seguem a mesma distribuição de
+Zipf da massa de dados, então as ofertas populares (com mais comentários e reações)
+aparecem mais.
+
+As queries por requisição vêm do header `Server-Timing` do QueryStatsMiddleware
+(QUERY_STATS_ENABLED). O cache de respostas fica desligado por padrão, para medir o custo
+no banco; `--cache` usa o InMemoryBackend. A busca textual depende do tsvector do
+PostgreSQL e é pulada no SQLite.
+
+    python -m benchmarks.run --database-url sqlite:///bench.db --output resultado.json
+    python -m benchmarks.run --database-url ... --scenario read_comments --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import httpx
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from src.core import cache
+from src.core.database import get_db, get_read_db
+from src.main import app
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.user import User
+
+from .seed import SEARCH_TERMS, SEED_PASSWORD, Picker, add_database_arguments, bench_engine
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class Fixture:
+    """IDs e credenciais lidos do banco semeado, usados para montar as requisições."""
+
+    promotions: Picker
+    pending: List[int]
+    users: Picker
+    moderator_token: str
+    dialect: str
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Recebe o sorteador e a fixture e devolve os argumentos de `client.request`
+    build: Callable[[random.Random, Fixture], dict]
+    postgres_only: bool = False
+
+
+def _moderator(fixture: Fixture) -> dict:
+    return {"Authorization": f"Bearer {fixture.moderator_token}"}
+
+
+SCENARIOS = [
+    Scenario(
+        "read_promotions",
+        lambda rng, f: {"method": "GET", "url": "/promotions/", "params": {"limit": 20}},
+    ),
+    Scenario(
+        "search_promotions",
+        lambda rng, f: {
+            "method": "GET",
+            "url": "/promotions/search/",
+            "params": {"q": rng.choice(SEARCH_TERMS), "limit": 20},
+        },
+        postgres_only=True,
+    ),
+    Scenario(
+        "read_comments",
+        lambda rng, f: {
+            "method": "GET",
+            "url": "/comments/",
+            "params": {"promotion_id": f.promotions.pick()[0], "limit": 20},
+        },
+    ),
+    Scenario(
+        "reactions_count",
+        lambda rng, f: {
+            "method": "GET",
+            "url": "/reactions/count",
+            "params": {"promotion_id": f.promotions.pick()[0]},
+        },
+    ),
+    Scenario(
+        "token",
+        lambda rng, f: {
+            "method": "POST",
+            "url": "/token",
+            "data": {"username": f.users.pick()[0], "password": SEED_PASSWORD},
+        },
+    ),
+    Scenario(
+        "moderation_pending",
+        lambda rng, f: {
+            "method": "GET",
+            "url": "/moderation/promotions/pending",
+            "params": {"limit": 20},
+            "headers": _moderator(f),
+        },
+    ),
+    Scenario(
+        # Mantém o status PENDING para não alterar a massa de dados entre execuções
+        "moderation_bulk_status",
+        lambda rng, f: {
+            "method": "POST",
+            "url": "/moderation/promotions/bulk/status",
+            "json": {"ids": rng.sample(f.pending, min(20, len(f.pending))), "status": "PENDING"},
+            "headers": _moderator(f),
+        },
+    ),
+]
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Percentil pelo posto mais próximo de uma lista já ordenada."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Measurements:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.errors = 0
+        self.status_codes: Counter = Counter()
+
+    def record(self, response: httpx.Response, seconds: float):
+        self.status_codes[response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors += 1
+            return
+        self.latencies.append(seconds)
+        match = _QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries.append(int(match.group(1)))
+
+    def as_dict(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        total = len(ordered) + self.errors
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "status_codes": {str(code): n for code, n in sorted(self.status_codes.items())},
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "queries_per_request": (
+                round(sum(self.queries) / len(self.queries), 2) if self.queries else None
+            ),
+            "max_queries": max(self.queries) if self.queries else None,
+        }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    fixture: Fixture,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+) -> dict:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    for _ in range(warmup):
+        await client.request(**scenario.build(rng, fixture))
+
+    measurements = Measurements()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            kwargs = scenario.build(rng, fixture)
+            start = time.perf_counter()
+            response = await client.request(**kwargs)
+            measurements.record(response, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return measurements.as_dict(time.perf_counter() - start)
+
+
+async def load_fixture(
+    session_factory: async_sessionmaker, client: httpx.AsyncClient, dialect: str, seed: int
+) -> Fixture:
+    rng = random.Random(seed)
+    async with session_factory() as db:
+        approved = await db.scalars(
+            select(Promotion.id)
+            .where(Promotion.status == PromotionStatus.APPROVED)
+            .order_by(Promotion.id)
+        )
+        approved = list(approved)
+        pending = await db.scalars(
+            select(Promotion.id)
+            .where(Promotion.status == PromotionStatus.PENDING)
+            .order_by(Promotion.id)
+        )
+        pending = list(pending)
+        users = await db.execute(select(User.email, User.role).order_by(User.id))
+        users = users.all()
+    if not approved or not pending:
+        raise SystemExit("Banco sem promoções; rode antes `python -m benchmarks.seed`.")
+
+    moderator = next(email for email, role in users if role == "MODERATOR")
+    response = await client.post("/token", data={"username": moderator, "password": SEED_PASSWORD})
+    response.raise_for_status()
+    return Fixture(
+        promotions=Picker(rng, approved),
+        pending=pending,
+        users=Picker(rng, [email for email, _ in users]),
+        moderator_token=response.json()["access_token"],
+        dialect=dialect,
+    )
+
+
+async def run(
+    engine: AsyncEngine,
+    scenarios: Optional[List[str]] = None,
+    requests: int = 500,
+    concurrency: int = 10,
+    warmup: int = 20,
+    use_cache: bool = False,
+    seed: int = 42,
+) -> dict:
+    """Roda os cenários (todos por padrão) e devolve o relatório."""
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="benchmark-cache:", enable=use_cache)
+    cache.init_tag_index()
+
+    dialect = engine.dialect.name
+    selected = [
+        scenario
+        for scenario in SCENARIOS
+        if (not scenarios or scenario.name in scenarios)
+        and (dialect == "postgresql" or not scenario.postgres_only)
+    ]
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "dialect": dialect,
+            "python": platform.python_version(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "cache": use_cache,
+            "seed": seed,
+        },
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            fixture = await load_fixture(session_factory, client, dialect, seed)
+            for scenario in selected:
+                report["scenarios"][scenario.name] = await run_scenario(
+                    client, scenario, fixture, requests, concurrency, warmup, seed
+                )
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous_overrides)
+        FastAPICache.reset()
+    return report
+
+
+def print_summary(report: dict):
+    print(
+        f"{'cenário':<24}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>9}{'erros':>7}"
+    )
+    for name, result in report["scenarios"].items():
+        queries = result["queries_per_request"]
+        print(
+            f"{name:<24}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{'-' if queries is None else queries:>9}{result['errors']:>7}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints mais usados")
+    add_database_arguments(parser)
+    parser.add_argument("--output", help="Arquivo JSON do relatório (padrão: só o resumo)")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="Cenário a rodar (repetível; padrão: todos)",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cache", action="store_true", help="Liga o cache de respostas")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = bench_engine(args.database_url)
+    try:
+        report = await run(
+            engine,
+            args.scenario,
+            args.requests,
+            args.concurrency,
+            args.warmup,
+            args.cache,
+            args.seed,
+        )
+    finally:
+        await engine.dispose()
+    print_summary(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+            output.write("\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+# benchmarks/serialization.py
+
+"""
+Micro-benchmark da serialização de uma lista de promoções (objetos ORM).
+
+Compara o caminho padrão do FastAPI para `response_model=List[Promotion]`
+(`serialize_response`, que valida e converte em dicts, mais o `json.dumps` do
+JSONResponse) com o da SerializedRoute (TypeAdapter em cache + `dump_json`).
+
+    python -m benchmarks.serialization --items 100 --iterations 2000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from src.core.serialization import render, type_adapter
+from src.models import comment, comment_like, coupon, reaction, refresh_token, user  # noqa: F401
+from src.models.promotion import Promotion as PromotionModel
+from src.models.promotion import PromotionStatus
+from src.schemas.promotion import Promotion
+
+
+def sample_promotions(count: int = 100) -> List[PromotionModel]:
+    start = datetime(2024, 1, 1)
+    return [
+        PromotionModel(
+            id=id_,
+            product=f"Smartphone Ultra {id_} — 256 GB",
+            link=f"https://www.loja.com.br/produto/{id_}?utm_source=feed",
+            price=1999.9 + id_,
+            image=f"https://cdn.loja.com.br/{id_}.jpg",
+            comment="Menor preço dos últimos 90 dias",
+            store="Loja",
+            status=PromotionStatus.APPROVED,
+            user_id=id_ % 7 + 1,
+            created_at=start + timedelta(minutes=id_),
+            reaction_count=id_ % 13,
+            comment_count=id_ % 5,
+        )
+        for id_ in range(1, count + 1)
+    ]
+
+
+def fastapi_renderer(annotation) -> Callable:
+    """Serialização padrão do FastAPI para uma rota com `response_model=annotation`."""
+    route = APIRoute("/", lambda: None, response_model=annotation)
+    field = route.secure_cloned_response_field
+
+    async def render_default(content) -> bytes:
+        data = await serialize_response(field=field, response_content=content, is_coroutine=True)
+        return JSONResponse(data).body
+
+    return render_default
+
+
+def serialized_renderer(annotation) -> Callable:
+    adapter = type_adapter(annotation)
+
+    async def render_serialized(content) -> bytes:
+        return render(adapter, content)
+
+    return render_serialized
+
+
+async def measure(renderer: Callable, content, iterations: int) -> float:
+    """Menor tempo médio por chamada (s) em 5 rodadas."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await renderer(content)
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+
+async def compare(items: int = 100, iterations: int = 500) -> dict:
+    content = sample_promotions(items)
+    default = fastapi_renderer(List[Promotion])
+    serialized = serialized_renderer(List[Promotion])
+    default_seconds = await measure(default, content, iterations)
+    serialized_seconds = await measure(serialized, content, iterations)
+    return {
+        "items": items,
+        "fastapi_ms": round(default_seconds * 1000, 4),
+        "serialized_ms": round(serialized_seconds * 1000, 4),
+        "speedup": round(default_seconds / serialized_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark da serialização")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    result = asyncio.run(compare(args.items, args.iterations))
+    print(
+        f"{result['items']} promoções: FastAPI {result['fastapi_ms']:.3f} ms, "
+        f"SerializedRoute {result['serialized_ms']:.3f} ms ({result['speedup']}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from src.core.cache import get_cache_status
+from src.core.database import engine, read_engine
+from src.core.pool_metrics import get_pool_status
+from src.core.security import password_hasher
+from src.routers.moderation_promotion import require_moderator
 
 api_router = APIRouter()
 
@@ -6,3 +11,22 @@ api_router = APIRouter()
 @api_router.get("/health-check")
 async def health_check():
     return {"status": "ok"}
+
+
+# Endpoints de diagnóstico expõem detalhes da infraestrutura: só para a moderação
+@api_router.get("/db-pool", dependencies=[Depends(require_moderator)])
+async def db_pool_status():
+    return {
+        "primary": get_pool_status(engine),
+        "replica": get_pool_status(read_engine) if read_engine is not None else None,
+    }
+
+
+@api_router.get("/cache", dependencies=[Depends(require_moderator)])
+async def cache_status():
+    return get_cache_status()
+
+
+@api_router.get("/password-pool", dependencies=[Depends(require_moderator)])
+async def password_pool_status():
+    return password_hasher.as_dict()
@@ -0,0 +1,342 @@
+# src/core/cache.py
+
+"""
+Invalidação por tags das respostas cacheadas com fastapi-cache.
+
+Cada resposta cacheada com `tagged_cache` é registrada nos conjuntos das suas tags
+(tipo de entidade, status e usuário dono). As escritas chamam `invalidate` com as tags
+afetadas, que remove exatamente as chaves registradas nelas (no Redis e, com o
+TwoTierBackend, no L1 de todos os workers).
+
+    promotions                       todas as respostas de promoções
+    promotions:status:APPROVED       feed e busca de promoções aprovadas
+    promotions:user:<id>             promoções de um usuário
+    users:<id>                       respostas que incluem o perfil do usuário
+
+Cada purge também incrementa a versão das tags. Num miss, as versões são lidas antes de
+executar o endpoint e conferidas depois que a resposta foi gravada: se uma invalidação
+rodou no meio (ex.: leitura na réplica atrasada enquanto a escrita invalidava), a entrada
+recém-gravada pode estar desatualizada e é descartada, em vez de durar até expirar.
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from src.core.cache_backend import (
+    CircuitBreaker,
+    CircuitBreakerBackend,
+    CircuitOpenError,
+    TwoTierBackend,
+)
+from src.core.metrics import cache_requests
+from src.core.serialization import prerender
+
+logger = logging.getLogger(__name__)
+
+# Chave e tags da requisição atual, entre o key_builder e a execução do endpoint
+_pending: ContextVar = ContextVar("cache_pending_tags", default=None)
+# Chave, tags e versões lidas antes de recalcular, conferidas depois do set
+_computed: ContextVar = ContextVar("cache_computed_versions", default=None)
+
+
+class MemoryTagIndex:
+    """Índice de tags por processo, para backends sem Redis (ex.: InMemoryBackend)."""
+
+    def __init__(self):
+        self.keys: Dict[str, Set[str]] = defaultdict(set)
+        self.versions: Dict[str, int] = defaultdict(int)
+
+    async def add(self, key: str, tags: List[str], expire: int):
+        for tag in tags:
+            self.keys[tag].add(key)
+
+    async def get_versions(self, tags: List[str]) -> List[int]:
+        return [self.versions[tag] for tag in tags]
+
+    async def purge(self, tags: List[str]) -> List[str]:
+        keys = set()
+        for tag in tags:
+            keys |= self.keys.pop(tag, set())
+            self.versions[tag] += 1
+        backend = FastAPICache.get_backend()
+        for key in keys:
+            try:
+                await backend.clear(key=key)
+            except KeyError:
+                pass  # Já expirada
+        return list(keys)
+
+
+class RedisTagIndex:
+    """Índice de tags em conjuntos do Redis, compartilhado entre os workers."""
+
+    # O conjunto de uma tag vive pelo menos tanto quanto a entrada mais longa registrada nele
+    ADD = """
+    for _, tag in ipairs(KEYS) do
+        redis.call('SADD', tag, ARGV[1])
+        if redis.call('TTL', tag) < tonumber(ARGV[2]) then
+            redis.call('EXPIRE', tag, ARGV[2])
+        end
+    end
+    """
+    # ARGV: chaves de versão de cada tag (na ordem de KEYS) e o TTL delas
+    PURGE = """
+    local purged = {}
+    local version_ttl = ARGV[#ARGV]
+    for n, tag in ipairs(KEYS) do
+        redis.call('INCR', ARGV[n])
+        redis.call('EXPIRE', ARGV[n], version_ttl)
+        local keys = redis.call('SMEMBERS', tag)
+        for i = 1, #keys, 1000 do
+            redis.call('DEL', unpack(keys, i, math.min(i + 999, #keys)))
+        end
+        for _, key in ipairs(keys) do
+            table.insert(purged, key)
+        end
+        redis.call('DEL', tag)
+    end
+    return purged
+    """
+
+    # Só precisa durar mais que um recálculo; sem a chave, a versão lida é 0
+    VERSION_TTL = 3600
+
+    def __init__(self, redis_client, prefix: str, breaker: Optional[CircuitBreaker] = None):
+        self.prefix = f"{prefix}:tag:"
+        self.version_prefix = f"{prefix}:tagversion:"
+        self.redis = redis_client
+        self.breaker = breaker
+        self._add = redis_client.register_script(self.ADD)
+        self._purge = redis_client.register_script(self.PURGE)
+
+    async def _run(self, command, **kwargs):
+        if self.breaker is None:
+            return await command(**kwargs)
+        return await self.breaker.call(command, **kwargs)
+
+    async def add(self, key: str, tags: List[str], expire: int):
+        await self._run(self._add, keys=[self.prefix + tag for tag in tags], args=[key, expire])
+
+    async def get_versions(self, tags: List[str]) -> List[int]:
+        versions = await self._run(
+            self.redis.mget, keys=[self.version_prefix + tag for tag in tags]
+        )
+        return [int(version or 0) for version in versions]
+
+    async def purge(self, tags: List[str]) -> List[str]:
+        return await self._run(
+            self._purge,
+            keys=[self.prefix + tag for tag in tags],
+            args=[self.version_prefix + tag for tag in tags] + [self.VERSION_TTL],
+        )
+
+
+tag_index: Union[MemoryTagIndex, RedisTagIndex] = MemoryTagIndex()
+
+# Tags que não puderam ser invalidadas com o Redis fora; reaplicadas quando ele volta
+missed_tags: Set[str] = set()
+
+
+def backend_layers() -> dict:
+    """Camadas do backend configurado: {"l1": ..., "breaker": ..., "remote": ...}."""
+    layers = {}
+    backend = FastAPICache.get_backend()
+    if isinstance(backend, TwoTierBackend):
+        layers["l1"] = backend
+        backend = backend.remote
+    if isinstance(backend, CircuitBreakerBackend):
+        layers["breaker"] = backend
+        backend = backend.remote
+    layers["remote"] = backend
+    return layers
+
+
+def local_cache() -> Optional[TwoTierBackend]:
+    try:
+        return backend_layers().get("l1")
+    except AssertionError:  # FastAPICache ainda não inicializado
+        return None
+
+
+def init_tag_index():
+    """Escolhe o índice conforme o backend configurado no FastAPICache."""
+    global tag_index
+    layers = backend_layers()
+    breaker = layers["breaker"].breaker if "breaker" in layers else None
+    if isinstance(layers["remote"], RedisBackend):
+        tag_index = RedisTagIndex(layers["remote"].redis, FastAPICache.get_prefix(), breaker)
+    else:
+        tag_index = MemoryTagIndex()
+    if breaker is not None:
+        breaker.on_close.append(replay_missed_invalidations)
+
+
+def request_key(func, namespace: str, request) -> str:
+    # O key_builder padrão inclui os kwargs do endpoint, e a sessão do banco tem um repr
+    # diferente a cada requisição; a chave usa apenas o caminho e os parâmetros da URL
+    params = sorted(request.query_params.multi_items()) if request else []
+    raw = f"{func.__module__}:{func.__name__}:{request.url.path if request else ''}:{params}"
+    return f"{namespace}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def tagged_cache(expire: int, tags: Union[Iterable[str], Callable[..., Iterable[str]]]):
+    """
+    `@cache` do fastapi-cache com registro da resposta nas tags informadas.
+
+    `tags` é uma lista fixa ou uma função que recebe os parâmetros do endpoint por nome.
+    O registro acontece só quando o endpoint executa (cache miss); nesse caso a entrada
+    gravada é descartada se as tags foram invalidadas durante o recálculo.
+    """
+
+    def decorator(func):
+        def key_builder(func_, namespace: str = "", *, request=None, response=None, args, kwargs):
+            key = request_key(func_, namespace, request)
+            cache_requests.record_lookup(func_.__name__)
+            entry_tags = tags(**kwargs) if callable(tags) else tags
+            _pending.set((key, list(entry_tags)))
+            return key
+
+        @wraps(func)
+        async def register_on_miss(*args, **kwargs):
+            cache_requests.record_miss(func.__name__)
+            pending = _pending.get()
+            _pending.set(None)
+            if pending:
+                versions = await tag_versions(pending[1])
+                if versions is not None:
+                    _computed.set((*pending, versions))
+            try:
+                # Em uma SerializedRoute o cache guarda o JSON da resposta, e não os objetos ORM
+                result = prerender(await func(*args, **kwargs))
+            except BaseException:
+                # Sem set, a reserva do single-flight (TwoTierBackend) prenderia as outras
+                # requisições da chave até o lock_timeout (ex.: 404, cursor inválido)
+                l1 = local_cache()
+                if pending and l1 is not None:
+                    l1.abandon(pending[0])
+                raise
+            if pending:
+                try:
+                    await tag_index.add(*pending, expire)
+                except CircuitOpenError:
+                    pass
+                except Exception:
+                    logger.warning("Falha ao registrar as tags do cache", exc_info=True)
+            return result
+
+        cached = cache(expire=expire, key_builder=key_builder)(register_on_miss)
+
+        @wraps(cached)
+        async def discard_if_stale(*args, **kwargs):
+            token = _computed.set(None)
+            try:
+                result = await cached(*args, **kwargs)
+                computed = _computed.get()
+            finally:
+                _computed.reset(token)
+            if computed:
+                key, entry_tags, versions = computed
+                if await tag_versions(entry_tags) != versions:
+                    await discard(key)
+            return result
+
+        return discard_if_stale
+
+    return decorator
+
+
+async def tag_versions(tags: List[str]) -> Optional[List[int]]:
+    """Versões atuais das tags; None se o índice não responder (a conferência é pulada)."""
+    try:
+        return await tag_index.get_versions(tags)
+    except CircuitOpenError:
+        return None
+    except Exception:
+        logger.warning("Falha ao ler as versões das tags %s", tags, exc_info=True)
+        return None
+
+
+async def discard(key: str):
+    """Remove uma entrada gravada com dados possivelmente anteriores a uma invalidação."""
+    try:
+        await FastAPICache.get_backend().clear(key=key)
+    except KeyError:
+        pass  # Já expirada
+    except Exception:
+        logger.warning("Falha ao descartar a entrada desatualizada %s", key, exc_info=True)
+
+
+def entity_tags(kind: str, item) -> List[str]:
+    """Tags de status e de dono de uma promoção/cupom/comentário."""
+    entry_tags = [f"{kind}:user:{item.user_id}"]
+    status = getattr(item, "status", None)
+    if status is not None:
+        entry_tags.append(f"{kind}:status:{getattr(status, 'value', status)}")
+    return entry_tags
+
+
+async def invalidate(*tags: Optional[str]) -> int:
+    """Remove as respostas cacheadas nas tags; falhas do cache não afetam a requisição."""
+    unique = sorted({tag for tag in tags if tag})
+    if not unique:
+        return 0
+    try:
+        keys = await tag_index.purge(unique)
+    except Exception as error:
+        if not isinstance(error, CircuitOpenError):
+            logger.warning("Falha ao invalidar as tags do cache %s", unique, exc_info=True)
+        missed_tags.update(unique)
+        # Sem o índice não dá para saber quais chaves o L1 tem dessas tags
+        l1 = local_cache()
+        if l1 is not None:
+            l1.evict_local()
+        return 0
+    l1 = local_cache()
+    try:
+        if l1 is not None:
+            # Cópias das chaves no L1 deste e dos outros workers
+            await l1.evict(keys)
+    except Exception:
+        logger.warning("Falha ao publicar a invalidação do L1", exc_info=True)
+    return len(keys)
+
+
+async def broadcast_eviction(keys: List[str]):
+    """Avisa os outros workers pelo canal de invalidação do L1 (ver TwoTierBackend.on_evict)."""
+    l1 = local_cache()
+    if l1 is None:
+        return
+    try:
+        await l1.evict(keys)
+    except CircuitOpenError:
+        pass
+    except Exception:
+        logger.warning("Falha ao publicar a invalidação %s", keys, exc_info=True)
+
+
+async def replay_missed_invalidations():
+    tags = sorted(missed_tags)
+    missed_tags.clear()
+    if tags:
+        await invalidate(*tags)
+
+
+def get_cache_status() -> dict:
+    try:
+        layers = backend_layers()
+    except AssertionError:
+        return {"backend": None}
+    status = {"backend": type(layers["remote"]).__name__}
+    if "l1" in layers:
+        status["l1"] = layers["l1"].as_dict()
+    if "breaker" in layers:
+        status["redis"] = layers["breaker"].as_dict()
+    status["missed_invalidations"] = len(missed_tags)
+    return status
@@ -0,0 +1,344 @@
+# src/core/cache_backend.py
+
+"""
+Backend do fastapi-cache em duas camadas: L1 em memória (por worker) na frente do Redis.
+
+- Acertos no L1 não vão ao Redis.
+- Single-flight: num miss, só a primeira corrotina recebe o miss e recalcula; as demais
+  esperam o `set` dela e leem o valor novo. Se o recálculo falhar (`abandon`), as que
+  esperavam recalculam por conta própria.
+- Renovação antecipada: quando faltam menos de `refresh_ahead` segundos para a entrada
+  expirar no Redis, uma única corrotina recebe um miss e recalcula enquanto as outras
+  continuam recebendo o valor atual.
+- Invalidação: as chaves removidas são publicadas no canal de pub/sub do Redis e cada
+  worker as descarta do seu L1.
+
+`CircuitBreakerBackend` fica entre o L1 e o Redis: depois de `failure_threshold` falhas
+seguidas o circuito abre, as operações deixam de ir ao Redis (sem esperar timeout) e o
+L1 continua servindo; uma tarefa em segundo plano testa o Redis e fecha o circuito.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi_cache.types import Backend
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+
+
+class CircuitOpenError(Exception):
+    """O Redis está marcado como indisponível; a operação nem foi tentada."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, probe, failure_threshold: int = 3, reset_timeout: float = 10):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.short_circuits = 0
+        self.on_close = []  # Corrotinas chamadas quando o Redis volta
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def call(self, func, *args, **kwargs):
+        if self.state == self.OPEN:
+            self.short_circuits += 1
+            raise CircuitOpenError()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.failures = 0
+        return result
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            logger.warning("Redis indisponível após %s falhas; circuito aberto", self.failures)
+            self.state = self.OPEN
+            self.trips += 1
+            self._probe_task = asyncio.create_task(self._probe_until_closed())
+
+    async def _probe_until_closed(self):
+        while self.state == self.OPEN:
+            await asyncio.sleep(self.reset_timeout)
+            try:
+                await self.probe()
+            except Exception:
+                continue
+            logger.warning("Redis respondeu; circuito fechado")
+            self.state = self.CLOSED
+            self.failures = 0
+            for callback in self.on_close:
+                try:
+                    await callback()
+                except Exception:
+                    logger.warning("Falha ao reagir ao fechamento do circuito", exc_info=True)
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "short_circuits": self.short_circuits,
+        }
+
+
+class CircuitBreakerBackend(Backend):
+    """Backend remoto protegido pelo circuito; falhas viram miss em vez de exceção."""
+
+    def __init__(self, remote: Backend, breaker: CircuitBreaker):
+        self.remote = remote
+        self.breaker = breaker
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def _call(self, method: str, *args, default=None):
+        try:
+            return await self.breaker.call(getattr(self.remote, method), *args)
+        except CircuitOpenError:
+            return default
+        except Exception:
+            self.errors += 1
+            logger.warning("Falha no backend de cache (%s)", method, exc_info=True)
+            return default
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        ttl, value = await self._call("get_with_ttl", key, default=(0, None))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await self._call("set", key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await self._call("clear", namespace, key, default=0)
+
+    def as_dict(self):
+        return {
+            **self.breaker.as_dict(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+class TwoTierBackend(Backend):
+    def __init__(
+        self,
+        remote: Backend,
+        maxsize: int = 2048,
+        ttl: float = 30,
+        refresh_ahead: float = 30,
+        lock_timeout: float = 5,
+        redis_client=None,
+        channel: str = INVALIDATION_CHANNEL,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.remote = remote
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.lock_timeout = lock_timeout
+        self.redis = redis_client
+        self.channel = channel
+        self.breaker = breaker
+        self.hits = 0
+        # Funções chamadas com as chaves invalidadas por outros workers
+        self.on_evict = []
+        # chave -> (expiração no L1, expiração no Redis ou None, valor)
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    # L1
+
+    def _local_get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, remote_expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return remote_expires_at, value
+
+    def _local_set(self, key: str, value, expire: Optional[int]):
+        now = time.monotonic()
+        remote_expires_at = now + expire if expire and expire > 0 else None
+        local_expires_at = now + min(self.ttl, expire) if expire and expire > 0 else now + self.ttl
+        self._entries[key] = (local_expires_at, remote_expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def evict_local(self, keys: Optional[Iterable[str]] = None):
+        """Descarta as chaves do L1; sem chaves, descarta tudo."""
+        if keys is None:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+
+    # Single-flight
+
+    def _claim(self, key: str) -> bool:
+        """Reserva o recálculo da chave para a corrotina atual; False se já há outra."""
+        if key in self._inflight:
+            return False
+        loop = asyncio.get_running_loop()
+        future = self._inflight[key] = loop.create_future()
+        # Se quem recalcula sumir sem chamar set nem abandon, a reserva expira sozinha
+        loop.call_later(self.lock_timeout, self._release, key, future, False)
+        return True
+
+    def _release(self, key: str, future: Optional[asyncio.Future] = None, stored: bool = True):
+        if future is not None and self._inflight.get(key) is not future:
+            return  # Reserva já liberada (e talvez refeita por outra corrotina)
+        future = self._inflight.pop(key, None)
+        if future and not future.done():
+            future.set_result(stored)
+
+    async def _wait(self, key: str) -> bool:
+        """Espera o recálculo em andamento; False se ele terminou sem gravar a chave."""
+        future = self._inflight.get(key)
+        if future is None:
+            return True
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.lock_timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    def abandon(self, key: str):
+        """Libera a reserva de quem recalculava a chave e falhou, acordando quem esperava."""
+        self._release(key, stored=False)
+
+    # API do fastapi-cache
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        for _ in range(2):
+            local = self._local_get(key)
+            if local is None:
+                ttl, value = await self.remote.get_with_ttl(key)
+                if value is not None:
+                    self._local_set(key, value, ttl)
+                    local = self._local_get(key)
+            else:
+                self.hits += 1
+            if local is not None:
+                remote_expires_at, value = local
+                if remote_expires_at is None:
+                    return int(self.ttl), value
+                remaining = remote_expires_at - time.monotonic()
+                # Esta corrotina renova a entrada; as outras seguem no valor atual
+                if remaining < self.refresh_ahead and self._claim(key):
+                    return 0, None
+                return max(int(remaining), 0), value
+            if self._claim(key):
+                return 0, None
+            # Outra corrotina já está recalculando: esperar o set dela e ler de novo; se
+            # o recálculo falhou, cada uma calcula a própria resposta
+            if not await self._wait(key):
+                return 0, None
+        return 0, None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        try:
+            await self.remote.set(key, value, expire)
+            self._local_set(key, value, expire)
+        finally:
+            self._release(key)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            keys = [cached for cached in self._entries if cached.startswith(namespace)]
+        else:
+            keys = [key] if key else []
+        await self.evict(keys)
+        return await self.remote.clear(namespace, key)
+
+    # Invalidação entre workers
+
+    async def evict(self, keys: Iterable[str]):
+        """Descarta as chaves do L1 local e avisa os outros workers."""
+        keys = list(keys)
+        if not keys:
+            return
+        self.evict_local(keys)
+        if self.redis is None:
+            return
+        if self.breaker is not None:
+            await self.breaker.call(self.redis.publish, self.channel, json.dumps(keys))
+        else:
+            await self.redis.publish(self.channel, json.dumps(keys))
+
+    async def listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Mensagens perdidas enquanto desconectado: descartar todo o L1
+                self._entries.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        keys = json.loads(message["data"])
+                        self.evict_local(keys)
+                        for callback in self.on_evict:
+                            callback(keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "Assinatura de invalidação do cache caiu; reconectando", exc_info=True
+                )
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self):
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def as_dict(self):
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits}
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -9,12 +10,86 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
 
     DATABASE_URL: str
+    # Réplica de leitura opcional; sem ela, as leituras vão para o primário
+    DATABASE_READ_URL: Optional[str] = None
+    # Tempo em que o autor de uma escrita continua lendo do primário
+    READ_YOUR_WRITES_SECONDS: int = 5
+    # Tempo sem tentar a réplica depois de uma falha de conexão
+    DATABASE_READ_RETRY_SECONDS: int = 30
     SECRET_KEY: str
     REFRESH_SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
+    # Pool de conexões do banco de dados (por worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 desativa o statement_timeout
+
+    # Cache em memória do autocomplete (/promotions/suggest e /coupons/suggest)
+    SUGGEST_CACHE_SIZE: int = 1024
+    SUGGEST_CACHE_TTL_SECONDS: int = 60
+
+    # Redis do cache de respostas (e do write-behind no modo "redis")
+    REDIS_URL: str = "redis://0.0.0.0:6379"
+    # Falhas seguidas até o circuito do cache abrir e intervalo entre as sondagens
+    CACHE_BREAKER_FAILURES: int = 3
+    CACHE_BREAKER_RESET_SECONDS: int = 10
+
+    # Tempo de vida das respostas cacheadas (feeds, páginas de usuário e buscas); as
+    # escritas invalidam as tags afetadas, então o TTL só limita o que não gera evento
+    CACHE_EXPIRE_SECONDS: int = 900
+    SEARCH_CACHE_EXPIRE_SECONDS: int = 300
+    # L1 em memória (por worker) na frente do Redis; 0 desativa
+    CACHE_L1_SIZE: int = 2048
+    CACHE_L1_TTL_SECONDS: int = 30
+    # Renovar a entrada quando faltar menos que isso para expirar no Redis
+    CACHE_REFRESH_AHEAD_SECONDS: int = 30
+
+    # Cache (por worker) dos usuários autenticados por access token
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+
+    # Senhas: custo do bcrypt (hashes abaixo dele são refeitos no login), processos do
+    # pool de hash (0 usa o threadpool) e operações em andamento antes de responder 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Refresh tokens: sessões (logins) ativas por usuário e limpeza dos tokens expirados,
+    # em lotes de REFRESH_TOKEN_SWEEP_BATCH_SIZE linhas (intervalo 0 desativa)
+    REFRESH_TOKEN_MAX_SESSIONS: int = 10
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+
+    # Máximo de IDs aceitos pelos endpoints de contagem/verificação em lote
+    BATCH_MAX_IDS: int = 100
+    # Máximo de IDs por requisição nos endpoints de moderação em lote
+    MODERATION_BULK_MAX_IDS: int = 500
+    # Tempo de reserva dos itens pegos na fila de moderação (/moderation/*/claim)
+    MODERATION_CLAIM_LEASE_SECONDS: int = 300
+    # Registros por INSERT/commit na ingestão em lote (/promotions/bulk, /coupons/bulk)
+    INGEST_CHUNK_SIZE: int = 1000
+
+    # GET /metrics (formato do Prometheus) e o middleware de latência por rota
+    METRICS_ENABLED: bool = True
+
+    # Queries por requisição (header Server-Timing e log): avisa quando uma rota passa de
+    # QUERY_BUDGET_MAX_QUERIES queries ou repete o mesmo formato de query mais de
+    # QUERY_BUDGET_MAX_REPEATS vezes (N+1); QUERY_BUDGET_STRICT transforma o aviso em erro
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_BUDGET_MAX_QUERIES: int = 30
+    QUERY_BUDGET_MAX_REPEATS: int = 5
+    QUERY_BUDGET_STRICT: bool = False
+
+    # Write-behind de reações/curtidas: "off", "memory" (por worker) ou "redis"
+    WRITE_BEHIND_MODE: str = "off"
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: int = 250
+
     class Config:
         env_file = ".env"
 
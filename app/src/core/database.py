@@ -1,18 +1,119 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+import logging
+import time
+
+from fastapi import Request
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from .config import settings
+from .pool_metrics import MonitoredAsyncQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Cookie que mantém as leituras no primário logo após uma escrita do próprio cliente
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+# Drivers assíncronos usados para cada dialeto síncrono configurado em DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str) -> dict:
+    # SQLite (testes/desenvolvimento) usa o pool padrão do dialeto
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": MonitoredAsyncQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **get_engine_options(settings.DATABASE_URL),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+read_engine = None
+ReadSessionLocal = None
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_READ_URL),
+        **get_engine_options(settings.DATABASE_READ_URL),
+    )
+    ReadSessionLocal = async_sessionmaker(
+        bind=read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Instante (time.monotonic) até o qual a réplica é considerada fora do ar
+_replica_down_until = 0.0
 
 Base = declarative_base()
 
 
 # Dependency
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def prefers_primary(request: Request) -> bool:
+    primary_until = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    try:
+        return primary_until is not None and float(primary_until) > time.time()
+    except ValueError:
+        return False
+
+
+async def _open_read_session(request: Request) -> AsyncSession:
+    global _replica_down_until
+
+    if ReadSessionLocal is None or prefers_primary(request):
+        return AsyncSessionLocal()
+    if time.monotonic() < _replica_down_until:
+        return AsyncSessionLocal()
+
+    db = ReadSessionLocal()
+    try:
+        # Conectar já aqui para poder cair no primário se a réplica estiver fora
+        await db.connection()
+    except (exc.SQLAlchemyError, OSError, asyncio.TimeoutError):
+        logger.warning("Réplica de leitura indisponível, usando o primário", exc_info=True)
+        _replica_down_until = time.monotonic() + settings.DATABASE_READ_RETRY_SECONDS
+        await db.close()
+        return AsyncSessionLocal()
+    return db
+
+
+# Dependency para handlers somente leitura
+async def get_read_db(request: Request):
+    db = await _open_read_session(request)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
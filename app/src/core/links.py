@@ -0,0 +1,114 @@
+# src/core/links.py
+
+"""
+Chave canônica dos links de promoções e cupons.
+
+O mesmo produto chega com parâmetros de rastreamento/afiliado diferentes
+(`?tag=...&ref=...&utm_source=...`), com ou sem `www.`, por http ou https. A chave
+descarta essas variações: para Amazon e Mercado Livre ela é o ID do produto no
+marketplace; para as demais lojas é host + caminho + parâmetros restantes (ordenados).
+A chave é gravada em `canonical_key` (indexada) e usada para achar ofertas repetidas.
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+MAX_KEY_LENGTH = 255
+
+# Parâmetros de rastreamento/afiliado (comparação sem diferenciar maiúsculas)
+TRACKING_PARAMS = {
+    "_ga",
+    "aff_id",
+    "affiliate_id",
+    "afsrc",
+    "ascsubtag",
+    "camp",
+    "creative",
+    "creativeasin",
+    "crid",
+    "dclid",
+    "fbclid",
+    "gclid",
+    "gclsrc",
+    "igshid",
+    "keywords",
+    "linkcode",
+    "linkid",
+    "mc_cid",
+    "mc_eid",
+    "msclkid",
+    "partner_id",
+    "psc",
+    "qid",
+    "ref",
+    "ref_",
+    "scm",
+    "smid",
+    "spm",
+    "sprefix",
+    "sr",
+    "tag",
+    "th",
+    "tracking_id",
+    "yclid",
+}
+TRACKING_PREFIXES = ("utm_", "pd_rd_", "pf_rd_", "matt_", "reco_")
+
+AMAZON_HOST = re.compile(r"^amazon\.[a-z.]+$")
+AMAZON_ASIN = re.compile(
+    r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([a-z0-9]{10})(?:[/?]|$)", re.I
+)
+MERCADO_LIVRE_HOST = re.compile(r"(^|\.)mercado(livre|libre)\.[a-z.]+$")
+MERCADO_LIVRE_ID = re.compile(r"\b(ML[A-Z])-?(\d{6,})", re.I)
+
+HOST_PREFIXES = ("www.", "m.")
+
+
+def _host(netloc: str) -> str:
+    host = netloc.rsplit("@", 1)[-1].lower()
+    if host.endswith((":80", ":443")):
+        host = host.rsplit(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    return host.rstrip(".")
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def marketplace_key(host: str, path: str):
+    """`amazon.com.br/dp/<ASIN>` ou `mercadolivre/<ID>`; None para outras lojas."""
+    if AMAZON_HOST.match(host):
+        match = AMAZON_ASIN.search(path + "/")
+        if match:
+            return f"{host}/dp/{match.group(1).upper()}"
+    elif MERCADO_LIVRE_HOST.search(host):
+        match = MERCADO_LIVRE_ID.search(path)
+        if match:
+            return f"mercadolivre/{match.group(1).upper()}{match.group(2)}"
+    return None
+
+
+def canonical_key(link: str) -> str:
+    parts = urlsplit(str(link).strip())
+    host = _host(parts.netloc)
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+
+    key = marketplace_key(host, path)
+    if key is None:
+        params = sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking(name)
+        )
+        key = host + path
+        if params:
+            key += "?" + urlencode(params)
+    if len(key) > MAX_KEY_LENGTH:
+        # Mantém a coluna (e o índice) com tamanho fixo para URLs enormes
+        key = "sha256:" + hashlib.sha256(key.encode()).hexdigest()
+    return key
@@ -0,0 +1,431 @@
+# src/core/metrics.py
+
+"""
+Métricas no formato texto do Prometheus, servidas em GET /metrics.
+
+Contadores e histogramas ficam em dicionários por combinação de labels e são atualizados
+sem lock: as observações acontecem na thread do event loop (middleware, eventos do engine
+assíncrono, pool de senhas), e o histograma guarda a contagem de cada faixa, então uma
+observação é um bisect e dois incrementos. As faixas acumuladas (`le`) e os valores lidos
+de outros componentes (pool do banco, cache, pool de senhas) são calculados só na coleta.
+
+    http_requests_in_flight                       requisições em andamento
+    http_request_duration_seconds                 por método, rota (template) e status
+    db_query_duration_seconds                     por banco (primary/replica)
+    db_pool_*                                     uso do pool de conexões
+    cache_requests_total                          hits/misses por namespace (endpoint)
+    cache_backend_*                               erros e estado do Redis, uso do L1
+    password_hash_duration_seconds                bcrypt por operação (hash/verify)
+    password_pool_*                               fila e rejeições do pool de senhas
+"""
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Faixas em segundos: rotas e bcrypt (dezenas/centenas de ms) e queries (sub-ms a segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + list(self.samples())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple, float] = defaultdict(float)
+        if not self.labelnames:
+            self.values[()] = 0
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] += amount
+
+    def samples(self):
+        for labels, value in list(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.values[labels] -= amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por faixa (+Inf no fim), soma]
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Collected(Metric):
+    """Métrica lida de outro componente na coleta: `collect()` retorna [(labels, valor)]."""
+
+    def __init__(self, name, documentation, labelnames, collect: Callable, type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.type = type
+
+    def samples(self):
+        for labels, value in self.collect():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class CacheRequests(Counter):
+    """
+    Hits e misses do fastapi-cache por namespace.
+
+    O decorator só avisa quando consulta o cache e quando executa o endpoint (miss), então
+    guarda consultas e misses e calcula os hits na coleta.
+    """
+
+    def record_lookup(self, namespace: str):
+        self.values[(namespace, "lookup")] += 1
+
+    def record_miss(self, namespace: str):
+        self.values[(namespace, "miss")] += 1
+
+    def samples(self):
+        for (namespace, result), lookups in list(self.values.items()):
+            if result != "lookup":
+                continue
+            misses = self.values.get((namespace, "miss"), 0)
+            for result, value in (("hit", max(lookups - misses, 0)), ("miss", misses)):
+                yield f"{self.name}{_labels(self.labelnames, (namespace, result))} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "Requisições HTTP em andamento.")
+)
+request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Duração das requisições HTTP por rota.",
+        ("method", "route", "status"),
+    )
+)
+query_duration = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Duração das queries SQL.",
+        ("database",),
+        buckets=QUERY_BUCKETS,
+    )
+)
+cache_requests = registry.register(
+    CacheRequests(
+        "cache_requests_total",
+        "Consultas às respostas cacheadas por namespace (endpoint) e resultado.",
+        ("namespace", "result"),
+    )
+)
+password_duration = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "Duração das operações de bcrypt, incluindo a espera no pool.",
+        ("operation",),
+    )
+)
+
+
+# --- Banco -----------------------------------------------------------------------------
+
+
+def database_label(sync_engine) -> str:
+    from .database import read_engine
+
+    if read_engine is not None and sync_engine is read_engine.sync_engine:
+        return "replica"
+    return "primary"
+
+
+# O início fica no ExecutionContext da query, e não no connection.info: uma query que
+# falha não deixa um início pendente para a próxima query da conexão do pool
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "metrics_query_start", None)
+    if start is not None:
+        query_duration.observe(time.perf_counter() - start, database_label(conn.engine))
+
+
+def install():
+    """Registra os eventos de duração das queries em todos os engines (idempotente)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_status() -> List[Tuple[str, dict]]:
+    from .database import engine, read_engine
+    from .pool_metrics import get_pool_status
+
+    engines = [("primary", engine)]
+    if read_engine is not None:
+        engines.append(("replica", read_engine))
+    return [(name, get_pool_status(item)) for name, item in engines]
+
+
+def _pool_field(field: str, scale: float = 1.0):
+    def collect():
+        for name, status in _pool_status():
+            value = status.get(field)
+            if isinstance(value, dict):  # {"avg": ..., "max": ...} em ms
+                value = value["max"]
+            if value is not None:
+                yield (name,), value * scale
+
+    return collect
+
+
+for _field, _type, _doc in (
+    ("pool_size", "gauge", "Conexões permanentes do pool."),
+    ("checked_out", "gauge", "Conexões emprestadas."),
+    ("overflow", "gauge", "Conexões extras (overflow) abertas."),
+    ("checkouts", "counter", "Conexões emprestadas desde o início."),
+    ("timeouts", "counter", "Esperas por conexão que estouraram o pool_timeout."),
+):
+    registry.register(
+        Collected(
+            f"db_pool_{_field}" + ("_total" if _type == "counter" else ""),
+            _doc,
+            ("database",),
+            _pool_field(_field),
+            type=_type,
+        )
+    )
+registry.register(
+    Collected(
+        "db_pool_checkout_wait_max_seconds",
+        "Maior espera por uma conexão desde o início.",
+        ("database",),
+        _pool_field("checkout_wait_ms", 0.001),
+    )
+)
+
+
+# --- Cache -----------------------------------------------------------------------------
+
+
+def _cache_layers():
+    from .cache import backend_layers
+
+    try:
+        return backend_layers()
+    except AssertionError:  # FastAPICache ainda não inicializado
+        return {}
+
+
+def _breaker_field(field: str):
+    def collect():
+        layer = _cache_layers().get("breaker")
+        if layer is not None:
+            yield (), layer.as_dict()[field]
+
+    return collect
+
+
+registry.register(
+    Collected(
+        "cache_backend_errors_total",
+        "Falhas do Redis (viram miss).",
+        (),
+        _breaker_field("errors"),
+        type="counter",
+    )
+)
+registry.register(
+    Collected(
+        "cache_backend_short_circuits_total",
+        "Chamadas ao Redis evitadas com o circuito aberto.",
+        (),
+        _breaker_field("short_circuits"),
+        type="counter",
+    )
+)
+
+
+def _l1_entries():
+    layer = _cache_layers().get("l1")
+    if layer is not None:
+        yield (), layer.as_dict()["entries"]
+
+
+def _circuit_open():
+    layer = _cache_layers().get("breaker")
+    if layer is not None:
+        yield (), int(layer.breaker.state == layer.breaker.OPEN)
+
+
+registry.register(
+    Collected(
+        "cache_backend_circuit_open",
+        "1 quando o circuito do Redis está aberto.",
+        (),
+        _circuit_open,
+    )
+)
+registry.register(
+    Collected("cache_l1_entries", "Entradas no cache local (L1) deste worker.", (), _l1_entries)
+)
+
+
+# --- Senhas ----------------------------------------------------------------------------
+
+
+def _password_field(field: str):
+    def collect():
+        from .security import password_hasher
+
+        yield (), password_hasher.as_dict()[field]
+
+    return collect
+
+
+registry.register(
+    Collected(
+        "password_pool_pending",
+        "Operações de senha em andamento.",
+        (),
+        _password_field("pending"),
+    )
+)
+registry.register(
+    Collected(
+        "password_pool_rejected_total",
+        "Operações de senha recusadas com o pool cheio (503).",
+        (),
+        _password_field("rejected"),
+        type="counter",
+    )
+)
+registry.register(
+    Collected(
+        "password_pool_failed_total",
+        "Operações de senha que falharam (erro do bcrypt ou worker encerrado).",
+        (),
+        _password_field("failed"),
+        type="counter",
+    )
+)
+
+
+# --- HTTP ------------------------------------------------------------------------------
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec()
+            route = scope.get("route")
+            # Caminhos sem rota (404) não viram labels, para não explodir a cardinalidade
+            template = getattr(route, "path", None) or "unmatched"
+            request_duration.observe(
+                time.perf_counter() - start, scope["method"], template, status_code
+            )
+
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1,35 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from .config import settings
+from .database import READ_YOUR_WRITES_COOKIE
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """Depois de uma escrita bem-sucedida, grava um cookie que faz get_read_db
+    usar o primário durante READ_YOUR_WRITES_SECONDS, para que o autor veja o
+    que acabou de criar mesmo com atraso de replicação."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={time.time() + window:.3f}; "
+                    f"Max-Age={window}; Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def paginate(
+    query,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    descending: bool = True,
+    skip: int = 0,
+):
+    """Pagina por chave (created_at, id) em vez de OFFSET.
+
+    O cursor aponta para o último item da página anterior; a comparação de
+    tupla percorre o índice composto a partir dele, então o custo de qualquer
+    página é o mesmo da primeira. Busca ``limit + 1`` linhas para saber se há
+    próxima página (ver ``build_page``). ``skip`` só é usado sem cursor, para
+    compatibilidade com clientes antigos.
+    """
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        position = decode_cursor(cursor)
+        query = query.where(key < position if descending else key > position)
+    elif skip:
+        query = query.offset(skip)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    return query.limit(limit + 1)
+
+
+def build_page(rows, limit: int) -> dict:
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,129 @@
+# src/core/password_pool.py
+
+"""
+Hash e verificação de senhas (bcrypt) fora do event loop.
+
+O bcrypt é lento de propósito (~250 ms com custo 12). Rodando no threadpool compartilhado,
+uma rajada de logins ocupa as threads de todos os endpoints síncronos; aqui ele roda num
+pool de processos dedicado e limitado. Quando já há `max_pending` operações aguardando ou
+em execução, a próxima falha na hora com `PasswordPoolOverloaded` (503 para o cliente) em
+vez de entrar numa fila que só cresce.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from .metrics import password_duration
+
+# Um contexto por custo, criado sob demanda em cada processo
+_contexts: Dict[int, CryptContext] = {}
+
+
+def build_context(rounds: int) -> CryptContext:
+    # min_rounds faz hashes com custo menor que o configurado precisarem de atualização
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+def get_context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = build_context(rounds)
+    return context
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return get_context(rounds).hash(password)
+
+
+def verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """(senha confere, novo hash se o atual usa um custo desatualizado)."""
+    return get_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordPoolOverloaded(Exception):
+    """Operações de senha demais em andamento; a requisição deve ser rejeitada."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = 2, max_pending: int = 32, rounds: int = 12):
+        self.workers = workers  # 0 usa o threadpool do processo (ex.: testes)
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0  # Erros do hash e workers que morreram (BrokenProcessPool)
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: o fork de um processo com event loop e threads não é seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolOverloaded()
+        self.pending += 1
+        try:
+            if not self.workers:
+                result = await run_in_threadpool(func, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            # Um worker morreu; o próximo uso recria o pool
+            self._executor = None
+            self.failed += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    async def _timed(self, operation: str, func, *args):
+        start = time.perf_counter()
+        result = await self._run(func, *args)
+        # Inclui a espera por um worker livre, que é o que a requisição sente
+        password_duration.observe(time.perf_counter() - start, operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._timed("hash", hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._timed("verify", verify_and_update, password, hashed, self.rounds)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def as_dict(self):
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
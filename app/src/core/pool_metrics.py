@@ -0,0 +1,96 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Contadores de espera no checkout e de tempo de uso das conexões do pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkins = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def record_hold(self, seconds: float):
+        self.checkins += 1
+        self.hold_total += seconds
+        if seconds > self.hold_max:
+            self.hold_max = seconds
+
+    def as_dict(self):
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checkout_wait_ms": {
+                "avg": _avg_ms(self.wait_total, self.checkouts),
+                "max": round(self.wait_max * 1000, 3),
+            },
+            "connection_hold_ms": {
+                "avg": _avg_ms(self.hold_total, self.checkins),
+                "max": round(self.hold_max * 1000, 3),
+            },
+        }
+
+
+def _avg_ms(total: float, count: int) -> float:
+    return round(total / count * 1000, 3) if count else 0.0
+
+
+class MonitoredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mede o tempo de espera por uma conexão
+    (checkout) e por quanto tempo ela fica emprestada até o checkin."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        now = time.perf_counter()
+        self.stats.record_wait(now - start)
+        record.info["checked_out_at"] = now
+        return record
+
+    def _do_return_conn(self, record):
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            self.stats.record_hold(time.perf_counter() - checked_out_at)
+        super()._do_return_conn(record)
+
+
+def get_pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if not isinstance(pool, MonitoredAsyncQueuePool):
+        return status
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    status.update(
+        {
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+    )
+    status.update(pool.stats.as_dict())
+    return status
@@ -0,0 +1,34 @@
+# src/core/projection.py
+
+"""
+Consultas que trazem só as colunas do schema de resposta.
+
+As listagens (feed, busca, filas de moderação, páginas do usuário) não devolvem o autor
+nem os comentários, então carregar a entidade inteira cria objetos ORM, entradas no
+identity map e relacionamentos que ninguém usa. `select_schema(Model, Schema)` seleciona
+apenas as colunas dos campos do schema; as linhas (Row, com acesso por atributo) vão
+direto para a validação `from_attributes` da resposta e funcionam com `paginate` e
+`build_page`, que só leem `created_at` e `id`.
+
+Listagens cujo schema inclui relacionamentos continuam carregando entidades.
+"""
+
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
+from sqlalchemy import Select, inspect, select
+
+
+@lru_cache(maxsize=None)
+def schema_columns(model, schema: Type[BaseModel]) -> tuple:
+    """Atributos de coluna de `model` para os campos de `schema`, na ordem do schema."""
+    columns = inspect(model).column_attrs
+    missing = [name for name in schema.model_fields if name not in columns]
+    if missing:
+        raise ValueError(f"{schema.__name__} tem campos sem coluna em {model.__name__}: {missing}")
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def select_schema(model, schema: Type[BaseModel]) -> Select:
+    return select(*schema_columns(model, schema))
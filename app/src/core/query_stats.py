@@ -0,0 +1,177 @@
+# src/core/query_stats.py
+
+"""
+Contagem das queries SQL de cada requisição, para achar N+1.
+
+Os eventos `before/after_cursor_execute` (registrados na classe Engine, então valem para o
+primário, a réplica e os engines dos testes) somam as queries, o tempo no banco e quantas
+vezes cada formato de query se repetiu na requisição atual. O formato é o SQL com os
+parâmetros e listas do IN trocados por `?`, então o mesmo SELECT feito para cada item de
+uma lista conta como repetição.
+
+`QueryStatsMiddleware` devolve os números no header `Server-Timing` e em uma linha de log
+JSON por requisição. Uma rota que passa de QUERY_BUDGET_MAX_QUERIES queries ou repete um
+formato mais de QUERY_BUDGET_MAX_REPEATS vezes gera um aviso no log; com
+QUERY_BUDGET_STRICT (usado nos testes) gera `QueryBudgetExceeded`. Rotas que fazem muitas
+queries de propósito (ex.: ingestão em lote) ajustam os limites com
+`Depends(query_budget(...))`.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros posicionais/nomeados dos drivers (?, $1, %(nome)s, :nome) e literais numéricos
+_PARAMS = re.compile(r"\?|\$\d+|%\(\w+\)s|(?<![:\w]):\w+|\b\d+\b")
+_PARAM_LISTS = re.compile(r"\?(\s*,\s*\?)+")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PARAMS.sub("?", statement)
+    shape = _PARAM_LISTS.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Queries de uma requisição."""
+
+    def __init__(
+        self,
+        max_queries: Optional[int] = None,
+        max_repeats: Optional[int] = None,
+    ):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.duration += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self) -> List[tuple]:
+        """(formato, vezes) dos formatos acima do limite de repetições."""
+        if self.max_repeats is None:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > self.max_repeats]
+
+    def problems(self) -> List[str]:
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f"{self.count} queries (limite {self.max_queries})")
+        for shape, n in self.repeated():
+            problems.append(f"{n}x (limite {self.max_repeats}): {shape[:200]}")
+        return problems
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+    def as_dict(self):
+        top = self.shapes.most_common(1)
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 3),
+            "max_repeats": top[0][1] if top else 0,
+        }
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # No ExecutionContext: uma query que falha não desalinha as medições seguintes da conexão
+    if current_stats.get() is not None and context is not None:
+        context.query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    start = getattr(context, "query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def install():
+    """Registra os eventos em todos os engines (idempotente)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+    """Dependency que troca os limites da requisição atual (None desativa o limite)."""
+
+    def dependency():
+        stats = current_stats.get()
+        if stats is not None:
+            stats.max_queries = max_queries
+            stats.max_repeats = max_repeats
+
+    return dependency
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(settings.QUERY_BUDGET_MAX_QUERIES, settings.QUERY_BUDGET_MAX_REPEATS)
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("server-timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_stats.reset(token)
+        self._report(scope, stats, status_code, time.perf_counter() - start)
+
+    def _report(self, scope, stats: QueryStats, status_code: int, seconds: float):
+        route = scope.get("route")
+        line = {
+            "method": scope["method"],
+            "path": getattr(route, "path", scope["path"]),
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 3),
+            **stats.as_dict(),
+        }
+        logger.info(json.dumps(line))
+        problems = stats.problems()
+        if not problems:
+            return
+        message = f"{line['method']} {line['path']}: " + "; ".join(problems)
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning("Orçamento de queries excedido em %s", message)
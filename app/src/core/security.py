@@ -1,19 +1,104 @@
+import hashlib
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core import cache
 from src.core.config import settings
 from src.core.database import get_db
+from src.core.password_pool import PasswordHasher, PasswordPoolOverloaded, build_context
 from src.models.refresh_token import RefreshToken
 from src.models.user import User as UserModel
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_context(settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+PRINCIPAL_KEY_PREFIX = "principal:"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Dados do usuário autenticado que a maioria dos endpoints usa (sem carregar o ORM)."""
+
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+
+class PrincipalCache:
+    """
+    Principals por access token (por worker), já com a assinatura do JWT verificada.
+
+    Uma entrada vive no máximo `ttl` segundos e nunca além do `exp` do token.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._tokens_by_user = defaultdict(set)
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.time():
+            self._discard(token)
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def set(self, token: str, principal: Principal, token_expires_at: float):
+        self._entries[token] = (min(time.time() + self.ttl, token_expires_at), principal)
+        self._entries.move_to_end(token)
+        self._tokens_by_user[principal.id].add(token)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, token: str):
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def evict_user(self, user_id: int):
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._discard(token)
+
+    def evict_keys(self, keys: Iterable[str]):
+        """Trata as chaves `principal:<id>` recebidas pelo canal de invalidação do cache."""
+        for key in keys:
+            if key.startswith(PRINCIPAL_KEY_PREFIX):
+                self.evict_user(int(key[len(PRINCIPAL_KEY_PREFIX) :]))
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
+
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -23,10 +108,37 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(UserModel).filter(UserModel.email == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+def password_overloaded_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado; tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password(password: str) -> str:
+    """Hash no pool de senhas; 503 se o pool estiver sobrecarregado."""
+    try:
+        return await password_hasher.hash(password)
+    except PasswordPoolOverloaded:
+        raise password_overloaded_exception()
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    result = await db.execute(select(UserModel).where(UserModel.email == username))
+    user = result.scalars().first()
+    if not user:
         return False
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    except PasswordPoolOverloaded:
+        raise password_overloaded_exception()
+    if not valid:
+        return False
+    if new_hash:
+        # Hash com custo abaixo do configurado: atualizado agora que temos a senha
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
@@ -46,24 +158,111 @@ def _create_token(data: dict, expires_delta: Optional[timedelta], secret_key: st
     return encoded_jwt
 
 
-def save_refresh_token(db: Session, refresh_token: str, user_id: int, expires: datetime):
-    db_token = RefreshToken(token=refresh_token, user_id=user_id, expires_at=expires)
-    db.add(db_token)
-    db.commit()
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
+async def issue_refresh_token(
+    db: AsyncSession, user: UserModel, family_id: Optional[str] = None
+) -> Tuple[str, timedelta]:
+    """
+    Cria e grava um refresh token para o usuário.
 
-def revoke_refresh_token(db: Session, refresh_token: str, user_id: int):
-    db_token = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token == refresh_token, RefreshToken.user_id == user_id)
-        .first()
+    Sem `family_id` é um login novo: abre uma família (sessão) e, se o usuário passar de
+    REFRESH_TOKEN_MAX_SESSIONS sessões ativas, encerra as mais antigas.
+    """
+    expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    new_session = family_id is None
+    family_id = family_id or uuid.uuid4().hex
+    refresh_token = create_refresh_token(
+        data={"sub": user.email, "jti": uuid.uuid4().hex, "fam": family_id},
+        expires_delta=expires_delta,
     )
-    if db_token:
-        db.delete(db_token)
-        db.commit()
+    db.add(
+        RefreshToken(
+            token_hash=hash_token(refresh_token),
+            family_id=family_id,
+            user_id=user.id,
+            expires_at=datetime.utcnow() + expires_delta,
+        )
+    )
+    await db.flush()
+    if new_session:
+        await enforce_session_limit(db, user.id)
+    await db.commit()
+    return refresh_token, expires_delta
+
+
+async def enforce_session_limit(db: AsyncSession, user_id: int):
+    # Cada família ativa tem exatamente um token não trocado e não expirado
+    stale_families = (
+        select(RefreshToken.family_id)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.replaced_at.is_(None),
+            RefreshToken.expires_at > datetime.utcnow(),
+        )
+        .order_by(RefreshToken.created_at.desc(), RefreshToken.id.desc())
+        .offset(settings.REFRESH_TOKEN_MAX_SESSIONS)
+    )
+    await db.execute(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.family_id.in_(stale_families.scalar_subquery()),
+        )
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str) -> Tuple[UserModel, str]:
+    """Troca o refresh token por um novo da mesma família; retorna (usuário, novo token)."""
+    result = await db.execute(
+        select(RefreshToken, RefreshToken.expires_at <= datetime.utcnow()).where(
+            RefreshToken.token_hash == hash_token(refresh_token)
+        )
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=401, detail="Refresh token inválido ou revogado.")
+    db_token, expired = row
+    if db_token.replaced_at is not None:
+        # Um token já trocado voltou a ser usado: a sessão inteira é revogada
+        await revoke_family(db, db_token.family_id)
+        raise HTTPException(status_code=401, detail="Refresh token inválido ou revogado.")
+    if expired:
+        await revoke_family(db, db_token.family_id)
+        raise HTTPException(status_code=401, detail="Refresh token expirado.")
+
+    user = await db.get(UserModel, db_token.user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado.")
+    db_token.replaced_at = datetime.utcnow()
+    new_token, _ = await issue_refresh_token(db, user, db_token.family_id)
+    return user, new_token
+
 
+async def revoke_family(db: AsyncSession, family_id: str):
+    await db.execute(delete(RefreshToken).where(RefreshToken.family_id == family_id))
+    await db.commit()
+
+
+async def revoke_refresh_token(db: AsyncSession, refresh_token: str, user_id: int):
+    """Encerra a sessão (família) do token."""
+    family = select(RefreshToken.family_id).where(
+        RefreshToken.token_hash == hash_token(refresh_token), RefreshToken.user_id == user_id
+    )
+    await db.execute(
+        delete(RefreshToken).where(RefreshToken.family_id.in_(family.scalar_subquery()))
+    )
+    await db.commit()
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível autenticar",
@@ -76,13 +275,46 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(UserModel).filter(UserModel.email == email).first()
-    if user is None:
+    result = await db.execute(
+        select(UserModel.id, UserModel.email, UserModel.role, UserModel.is_active).where(
+            UserModel.email == email
+        )
+    )
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    principal = Principal(*row)
+    principal_cache.set(token, principal, payload["exp"])
+    return principal
+
+
+async def invalidate_principal(user_id: int):
+    """Descarta os principals do usuário neste e nos outros workers (perfil, papel, exclusão)."""
+    principal_cache.evict_user(user_id)
+    await cache.broadcast_eviction([f"{PRINCIPAL_KEY_PREFIX}{user_id}"])
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_db)
+):
+    """Carrega o usuário do ORM; para endpoints que só precisam de id/papel, use o principal."""
+    user = await db.get(UserModel, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível autenticar",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
-def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
+async def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuário inativo")
     return current_user
+
+
+async def get_current_active_principal(principal: Principal = Depends(get_current_principal)):
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Usuário inativo")
+    return principal
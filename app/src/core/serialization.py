@@ -0,0 +1,142 @@
+# src/core/serialization.py
+
+"""
+Serialização JSON das respostas sem a passagem dupla do FastAPI.
+
+Com `response_model`, o FastAPI valida o retorno, converte o resultado em dicts/listas com
+`field.serialize(mode="json")` e só então o `JSONResponse` chama `json.dumps`. Nas
+listagens (páginas de promoções, árvores de comentários, perfil com promoções) isso
+percorre cada item três vezes.
+
+`SerializedRoute` (usada como `route_class` dos routers) valida o retorno uma vez com um
+TypeAdapter por tipo de resposta, guardado em cache, e gera o JSON direto com
+`dump_json` (pydantic-core), que já trata datetime, enum e HttpUrl. Os headers e o status
+definidos no `Response` injetado (ex.: X-FastAPI-Cache, Cache-Control) continuam valendo.
+Rotas com `response_model_include/exclude`/`exclude_*` seguem o caminho padrão.
+
+Respostas sem `response_model` (dicts) usam `FastJSONResponse`, a resposta padrão da
+aplicação, que serializa com orjson e repassa bytes já serializados.
+"""
+
+import inspect
+from contextvars import ContextVar
+from functools import lru_cache, partial, wraps
+from typing import Any, Callable, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import lenient_issubclass
+from pydantic import TypeAdapter, ValidationError
+
+# Parâmetro extra da assinatura, para o FastAPI injetar o Response da requisição
+RESPONSE_PARAM = "serialized_route_response"
+
+# TypeAdapter da rota em execução, para o tagged_cache guardar a resposta já serializada
+current_adapter: ContextVar[Optional[TypeAdapter]] = ContextVar("response_adapter", default=None)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse que aceita o corpo já serializado (bytes)."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+def render(adapter: TypeAdapter, content: Any) -> bytes:
+    """Valida `content` (objetos ORM, dicts ou modelos) e devolve o JSON da resposta."""
+    try:
+        value = adapter.validate_python(content, from_attributes=True)
+    except ValidationError as error:
+        errors = [
+            {**item, "loc": ("response", *item["loc"])} for item in error.errors(include_url=False)
+        ]
+        raise ResponseValidationError(errors=errors, body=content) from error
+    return adapter.dump_json(value, by_alias=True)
+
+
+def prerender(content: Any) -> Any:
+    """Serializa `content` com o tipo da rota atual; fora de uma SerializedRoute, não muda nada."""
+    adapter = current_adapter.get()
+    if adapter is None or isinstance(content, Response):
+        return content
+    return FastJSONResponse(render(adapter, content))
+
+
+class SerializedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        self.adapter: Optional[TypeAdapter] = None
+        super().__init__(path, self._wrap(endpoint), **kwargs)
+        if self.response_field is not None and self._default_serialization():
+            self.adapter = type_adapter(self.response_model)
+
+    def _default_serialization(self) -> bool:
+        return (
+            self.response_model_include is None
+            and self.response_model_exclude is None
+            and self.response_model_by_alias
+            and not self.response_model_exclude_unset
+            and not self.response_model_exclude_defaults
+            and not self.response_model_exclude_none
+        )
+
+    def _wrap(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        # include_router recria a rota a partir do endpoint já envolvido
+        endpoint = getattr(endpoint, "serialized_endpoint", endpoint)
+        if inspect.iscoroutinefunction(endpoint):
+            call = endpoint
+        else:
+            # Endpoints síncronos continuam no threadpool, como no FastAPI
+            call = partial(run_in_threadpool, endpoint)
+
+        # O FastAPI injeta o Response em um único parâmetro: se o endpoint (ou o decorator
+        # do fastapi-cache) já declara um, ele é reaproveitado
+        signature = inspect.signature(endpoint)
+        parameters = list(signature.parameters.values())
+        response_param = next(
+            (p.name for p in parameters if lenient_issubclass(p.annotation, Response)), None
+        )
+        if response_param is None:
+            response_param = RESPONSE_PARAM
+            extra = inspect.Parameter(
+                RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response
+            )
+            # Antes de um eventual **kwargs, que precisa ser o último
+            position = len(parameters)
+            if parameters and parameters[-1].kind == inspect.Parameter.VAR_KEYWORD:
+                position -= 1
+            parameters.insert(position, extra)
+
+        @wraps(endpoint)
+        async def serialized_endpoint(*args, **kwargs):
+            if response_param == RESPONSE_PARAM:
+                response: Response = kwargs.pop(RESPONSE_PARAM)
+            else:
+                response = kwargs[response_param]
+            if self.adapter is None:
+                return await call(*args, **kwargs)
+
+            token = current_adapter.set(self.adapter)
+            try:
+                content = prerender(await call(*args, **kwargs))
+            finally:
+                current_adapter.reset(token)
+            if not isinstance(content, FastJSONResponse):
+                return content  # Response próprio do endpoint (ou 304 do cache)
+            content.status_code = response.status_code or self.status_code or 200
+            content.headers.raw.extend(response.headers.raw)
+            return content
+
+        serialized_endpoint.__signature__ = signature.replace(parameters=parameters)
+        serialized_endpoint.serialized_endpoint = endpoint
+        return serialized_endpoint
@@ -0,0 +1,89 @@
+# src/core/suggest.py
+
+import time
+from collections import OrderedDict
+
+from sqlalchemy import case, func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class SuggestionCache:
+    """
+    LRU em memória (por worker) para os prefixos mais digitados no autocomplete.
+
+    As entradas expiram após `ttl` segundos para que novas promoções aprovadas apareçam.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def normalize_term(q: str) -> str:
+    return " ".join(q.lower().split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def suggest_query(model, approved_status, q: str, limit: int):
+    """
+    Sugestões de produto e loja usando os índices trigram (pg_trgm).
+
+    Prefixos (ILIKE 'q%') vêm primeiro; depois os termos mais parecidos por
+    word_similarity, o que cobre erros de digitação e palavras no meio do nome.
+    """
+    pattern = f"{_escape_like(q)}%"
+    candidates = []
+    for column in (model.product, model.store):
+        is_prefix = column.ilike(pattern, escape="\\")
+        candidates.append(
+            select(
+                column.label("suggestion"),
+                (case((is_prefix, 1.0), else_=0.0) + func.word_similarity(q, column)).label(
+                    "score"
+                ),
+            ).where(model.status == approved_status, is_prefix | column.op("%>")(q))
+        )
+    matches = union_all(*candidates).subquery()
+    return (
+        select(matches.c.suggestion)
+        .group_by(matches.c.suggestion)
+        .order_by(func.max(matches.c.score).desc(), matches.c.suggestion)
+        .limit(limit)
+    )
+
+
+async def get_suggestions(
+    db: AsyncSession, cache: SuggestionCache, model, approved_status, q: str, limit: int
+):
+    term = normalize_term(q)
+    key = (term, limit)
+    suggestions = cache.get(key)
+    if suggestions is None:
+        result = await db.execute(suggest_query(model, approved_status, term, limit))
+        suggestions = list(result.scalars().all())
+        cache.set(key, suggestions)
+    return suggestions
@@ -1,11 +1,18 @@
 import redis.asyncio as redis
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 
 from .api.v1.router import api_router
+from .core import cache, metrics
+from .core.cache_backend import CircuitBreaker, CircuitBreakerBackend, TwoTierBackend
 from .core.config import settings
+from .core.middleware import ReadYourWritesMiddleware
+from .core.query_stats import QueryStatsMiddleware
+from .core.security import password_hasher, principal_cache
+from .core.serialization import FastJSONResponse
 from .routers import (
     auth,
     comment,
@@ -18,11 +25,14 @@ from .routers import (
     reaction,
     user,
 )
+from .services import token_sweeper, write_behind
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # orjson nas respostas sem response_model (ver src/core/serialization.py)
+    default_response_class=FastJSONResponse,
 )
 
 # Configuração CORS
@@ -34,11 +44,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Queries SQL por requisição no Server-Timing e no log (detecção de N+1)
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Latência por rota e requisições em andamento para o /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Leituras do autor de uma escrita continuam no primário por alguns segundos
+if settings.DATABASE_READ_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
     redis_client = redis.from_url(
-        "redis://0.0.0.0:6379",
+        settings.REDIS_URL,
         encoding="utf8",
         decode_responses=True,
         socket_timeout=1,
@@ -47,7 +69,67 @@ async def startup_event():
         health_check_interval=30,
     )
 
-    FastAPICache.init(RedisBackend(redis_client), prefix="promotions_coupons-cache:")
+    breaker = CircuitBreaker(
+        redis_client.ping,
+        failure_threshold=settings.CACHE_BREAKER_FAILURES,
+        reset_timeout=settings.CACHE_BREAKER_RESET_SECONDS,
+    )
+    backend = CircuitBreakerBackend(RedisBackend(redis_client), breaker)
+    if settings.CACHE_L1_SIZE:
+        backend = TwoTierBackend(
+            backend,
+            maxsize=settings.CACHE_L1_SIZE,
+            ttl=settings.CACHE_L1_TTL_SECONDS,
+            refresh_ahead=settings.CACHE_REFRESH_AHEAD_SECONDS,
+            redis_client=redis_client,
+            breaker=breaker,
+        )
+    FastAPICache.init(backend, prefix="promotions_coupons-cache:")
+    cache.init_tag_index()
+    backend = FastAPICache.get_backend()
+    if isinstance(backend, TwoTierBackend):
+        # Principals de usuários alterados em outros workers
+        if principal_cache.evict_keys not in backend.on_evict:
+            backend.on_evict.append(principal_cache.evict_keys)
+        backend.start()
+
+    if settings.WRITE_BEHIND_MODE != "off":
+        if settings.WRITE_BEHIND_MODE == "redis":
+            store = write_behind.RedisIntentStore(redis_client)
+        else:
+            store = write_behind.MemoryIntentStore()
+        write_behind.buffer = write_behind.WriteBehindBuffer(
+            store, interval=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000
+        )
+        write_behind.buffer.start()
+
+    if settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS:
+        token_sweeper.sweeper = token_sweeper.RefreshTokenSweeper(
+            interval=settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+            batch_size=settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE,
+        )
+        token_sweeper.sweeper.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    layers = cache.backend_layers()
+    if "l1" in layers:
+        await layers["l1"].stop()
+    if "breaker" in layers:
+        await layers["breaker"].breaker.stop()
+    if write_behind.buffer:
+        await write_behind.buffer.stop()
+        write_behind.buffer = None
+    if token_sweeper.sweeper:
+        await token_sweeper.sweeper.stop()
+        token_sweeper.sweeper = None
+    password_hasher.shutdown()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # Incluir rotas
@@ -0,0 +1,43 @@
+# src/models/base.py
+
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+SEARCH_CONFIG = "portuguese"
+
+
+@compiles(CreateColumn)
+def _skip_postgresql_only_columns(element, compiler, **kw):
+    # Colunas geradas com funções do PostgreSQL (ex.: to_tsvector) não existem em outros
+    # bancos; no SQLite dos testes a coluna simplesmente não é criada
+    if element.element.info.get("postgresql_only") and compiler.dialect.name != "postgresql":
+        return None
+    return compiler.visit_create_column(element, **kw)
+
+
+def search_vector_column(*weighted_fields):
+    """
+    Coluna tsvector gerada (STORED) a partir de pares (campo, peso).
+
+    O PostgreSQL mantém o valor a cada INSERT/UPDATE; o peso 'A' ranqueia acima de 'D'.
+    A coluna fica fora do mapeamento do ORM (exclude_properties) e é acessada via
+    Model.__table__.c.search_vector.
+    """
+    expression = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({field}, '')), '{weight}')"
+        for field, weight in weighted_fields
+    )
+    return Column(TSVECTOR, Computed(expression, persisted=True), info={"postgresql_only": True})
+
+
+def search_vector_index(name):
+    return Index(name, "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql")
+
+
+def trigram_index(name, column):
+    # GIN com gin_trgm_ops atende ILIKE 'prefixo%' e os operadores de similaridade do pg_trgm
+    return Index(
+        name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}
+    ).ddl_if(dialect="postgresql")
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import backref, relationship
 from src.core.database import Base
 
@@ -10,6 +10,14 @@ from src.core.database import Base
 class Comment(Base):
     __tablename__ = "comments"
 
+    __table_args__ = (
+        # Índices para listagem e paginação por cursor (created_at, id)
+        Index("idx_comment_promotion_created_at", "promotion_id", "created_at", "id"),
+        Index("idx_comment_coupon_created_at", "coupon_id", "created_at", "id"),
+        Index("idx_comment_parent_created_at", "parent_id", "created_at", "id"),
+        Index("idx_comment_user_created_at", "user_id", "created_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,6 +26,8 @@ class Comment(Base):
     parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
+    # Contador desnormalizado de curtidas (ver src/services/counters.py)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="comments")
     promotion = relationship("Promotion", back_populates="comments")
@@ -6,6 +6,7 @@ from enum import Enum as PyEnum
 from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from src.core.database import Base
+from src.models.base import search_vector_column, search_vector_index, trigram_index
 
 
 class CouponStatus(PyEnum):
@@ -17,15 +18,22 @@ class CouponStatus(PyEnum):
 class Coupon(Base):
     __tablename__ = "coupons"
 
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
     __table_args__ = (
-        # Índice para status e data de criação (ordenação)
-        Index("idx_coupon_status_created_at", "status", "created_at"),
-        # Índice para busca textual
-        Index("idx_coupon_search_text", "product", "store", "comment"),
+        # Índice para status e data de criação (ordenação e paginação por cursor)
+        Index("idx_coupon_status_created_at", "status", "created_at", "id"),
+        # Índice GIN para busca textual na coluna tsvector gerada
+        search_vector_index("idx_coupon_search_vector"),
+        # Índices trigram para autocomplete e busca aproximada
+        trigram_index("idx_coupon_product_trgm", "product"),
+        trigram_index("idx_coupon_store_trgm", "store"),
         # Índice para relacionamentos e filtros frequentes
-        Index("idx_coupon_user_id", "user_id"),
+        Index("idx_coupon_user_created_at", "user_id", "created_at", "id"),
         Index("idx_coupon_store", "store"),
         Index("idx_coupon_status", "status"),
+        # Busca de ofertas repetidas (ver src/services/duplicates.py)
+        Index("idx_coupon_canonical_key", "canonical_key", "code"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +47,17 @@ class Coupon(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
+    # Reserva na fila de moderação (ver src/services/moderation.py); sem FK, é temporária
+    claimed_by = Column(Integer, nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    # Link normalizado (src/core/links.py) e a oferta já existente da qual esta é repetida
+    canonical_key = Column(String(255), nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("coupons.id", ondelete="SET NULL"), nullable=True)
+    # Contadores desnormalizados (ver src/services/counters.py)
+    reaction_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Produto pesa mais que loja, que pesa mais que o comentário no ts_rank
+    search_vector = search_vector_column(("product", "A"), ("store", "B"), ("comment", "C"))
 
     user = relationship("User", back_populates="coupons")
     comments = relationship("Comment", back_populates="coupon", cascade="all, delete-orphan")
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 from src.core.database import Base
 
@@ -8,10 +8,22 @@ from src.core.database import Base
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
+    __table_args__ = (
+        # Sessões ativas do usuário, das mais recentes para as mais antigas (limite de sessões)
+        Index("idx_refresh_token_user_created_at", "user_id", "created_at"),
+        # Remoção em lote dos tokens expirados
+        Index("idx_refresh_token_expires_at", "expires_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, nullable=False, unique=True)
+    # SHA-256 (hex) do JWT; o token em si nunca é gravado
+    token_hash = Column(String(64), nullable=False, unique=True)
+    # Sessão (login) à qual o token pertence; cada renovação gera um token novo na mesma família
+    family_id = Column(String(32), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     expires_at = Column(DateTime(timezone=True))
+    # Preenchido quando o token é trocado por outro; reapresentá-lo indica roubo
+    replaced_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="refresh_tokens")
@@ -1,26 +1,79 @@
 # src/routers/comment.py
 
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from src.core.database import get_db
-from src.core.security import get_current_user
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from src.core.cache import invalidate
+from src.core.database import get_db, get_read_db
+from src.core.pagination import build_page, paginate
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
 from src.models.comment import Comment as CommentModel
 from src.models.coupon import Coupon as CouponModel
 from src.models.promotion import Promotion as PromotionModel
-from src.models.user import User as UserModel
 from src.schemas.comment import Comment as CommentSchema
 from src.schemas.comment import CommentCreate, CommentUpdate
+from src.schemas.pagination import Page
+from src.services.comment_tree import (
+    DEFAULT_DEPTH,
+    DEFAULT_REPLIES_LIMIT,
+    load_comment_tree,
+    load_comment_trees,
+)
+from src.services.counters import comment_tree_size, increment_target
+
+router = APIRouter(route_class=SerializedRoute)
+
+
+def replies_loader():
+    # Sessões assíncronas não fazem lazy load: carregar toda a árvore de respostas
+    # antecipadamente, nível a nível, até não haver mais respostas. Usado apenas na
+    # remoção, que precisa da árvore inteira; as leituras usam load_comment_trees
+    return selectinload(CommentModel.replies, recursion_depth=-1)
+
+
+async def get_comment_with_replies(db: AsyncSession, comment_id: int):
+    result = await db.execute(
+        select(CommentModel)
+        .options(replies_loader())
+        .where(CommentModel.id == comment_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 
-router = APIRouter()
+async def delete_comment_tree(db: AsyncSession, comment: CommentModel):
+    # As respostas são removidas em cascata e também saem do contador da promoção/cupom
+    await increment_target(db, comment, "comment_count", -comment_tree_size(comment))
+    await db.delete(comment)
+
+
+def thread_user_ids(comment: CommentModel) -> set:
+    # Exige as respostas já carregadas (ver replies_loader)
+    return {comment.user_id}.union(*(thread_user_ids(reply) for reply in comment.replies))
+
+
+async def comment_cache_tags(db: AsyncSession, comment: CommentModel, user_ids=()):
+    # As páginas de comentários dos usuários mostram as respostas, então a página do autor
+    # do comentário pai também muda
+    user_ids = {comment.user_id, *user_ids}
+    if comment.parent_id:
+        user_ids.add(
+            await db.scalar(
+                select(CommentModel.user_id).where(CommentModel.id == comment.parent_id)
+            )
+        )
+    return [f"comments:user:{user_id}" for user_id in user_ids]
 
 
 @router.post("/", response_model=CommentSchema)
-def create_comment(
+async def create_comment(
     comment_in: CommentCreate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     # Verificar se um dos IDs foi fornecido
     if not comment_in.promotion_id and not comment_in.coupon_id and not comment_in.parent_id:
@@ -39,9 +92,10 @@ def create_comment(
 
     # Verificar se o comentário pai existe e herdar os IDs
     if comment_in.parent_id:
-        parent_comment = (
-            db.query(CommentModel).filter(CommentModel.id == comment_in.parent_id).first()
+        result = await db.execute(
+            select(CommentModel).where(CommentModel.id == comment_in.parent_id)
         )
+        parent_comment = result.scalars().first()
         if not parent_comment:
             raise HTTPException(status_code=404, detail="Comentário pai não encontrado.")
 
@@ -57,57 +111,67 @@ def create_comment(
             )
     elif comment_in.promotion_id:
         # Verificar se a promoção existe
-        promotion = (
-            db.query(PromotionModel).filter(PromotionModel.id == comment_in.promotion_id).first()
+        result = await db.execute(
+            select(PromotionModel).where(PromotionModel.id == comment_in.promotion_id)
         )
+        promotion = result.scalars().first()
         if not promotion:
             raise HTTPException(status_code=404, detail="Promoção não encontrada.")
     elif comment_in.coupon_id:
         # Verificar se o cupom existe
-        coupon = db.query(CouponModel).filter(CouponModel.id == comment_in.coupon_id).first()
+        result = await db.execute(select(CouponModel).where(CouponModel.id == comment_in.coupon_id))
+        coupon = result.scalars().first()
         if not coupon:
             raise HTTPException(status_code=404, detail="Cupom não encontrado.")
 
     # Criar o comentário
     comment = CommentModel(**comment_in.model_dump(), user_id=current_user.id)
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    return comment
+    await increment_target(db, comment, "comment_count")
+    await db.commit()
+    await invalidate(*await comment_cache_tags(db, comment))
+    return await load_comment_tree(db, comment)
 
 
-@router.get("/", response_model=List[CommentSchema])
-def read_comments(
+@router.get("/", response_model=Page[CommentSchema])
+async def read_comments(
     promotion_id: Optional[int] = None,
     coupon_id: Optional[int] = None,
     parent_id: Optional[int] = None,
-    skip: int = 0,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    db: Session = Depends(get_db),
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=10),
+    replies_limit: int = Query(DEFAULT_REPLIES_LIMIT, ge=0, le=50),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(CommentModel).options(joinedload(CommentModel.replies))
+    query = select(CommentModel)
     if promotion_id:
-        query = query.filter(CommentModel.promotion_id == promotion_id)
+        query = query.where(CommentModel.promotion_id == promotion_id)
     if coupon_id:
-        query = query.filter(CommentModel.coupon_id == coupon_id)
+        query = query.where(CommentModel.coupon_id == coupon_id)
     if parent_id is not None:
-        query = query.filter(CommentModel.parent_id == parent_id)
+        query = query.where(CommentModel.parent_id == parent_id)
     else:
         # Se parent_id não for fornecido, filtramos por comentários de nível superior
-        query = query.filter(CommentModel.parent_id.is_(None))
+        query = query.where(CommentModel.parent_id.is_(None))
 
-    comments = query.order_by(CommentModel.created_at.asc()).offset(skip).limit(limit).all()
-    return comments
+    result = await db.execute(
+        paginate(query, CommentModel, cursor, limit, descending=False, skip=skip)
+    )
+    page = build_page(result.scalars().all(), limit)
+    page["items"] = await load_comment_trees(db, page["items"], depth, replies_limit)
+    return page
 
 
 @router.put("/{comment_id}", response_model=CommentSchema)
-def update_comment(
+async def update_comment(
     comment_id: int,
     comment_in: CommentUpdate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    comment = db.query(CommentModel).filter(CommentModel.id == comment_id).first()
+    comment = await db.get(CommentModel, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado.")
 
@@ -121,18 +185,18 @@ def update_comment(
     update_data = comment_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(comment, key, value)
-    db.commit()
-    db.refresh(comment)
-    return comment
+    await db.commit()
+    await invalidate(*await comment_cache_tags(db, comment))
+    return await load_comment_tree(db, comment)
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(
+async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    comment = db.query(CommentModel).filter(CommentModel.id == comment_id).first()
+    comment = await get_comment_with_replies(db, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado.")
 
@@ -140,23 +204,22 @@ def delete_comment(
     if comment.user_id != current_user.id and current_user.role not in ("ADMIN", "MODERATOR"):
         raise HTTPException(status_code=403, detail="Não autorizado a deletar este comentário.")
 
-    db.delete(comment)
-    db.commit()
+    tags = await comment_cache_tags(db, comment, thread_user_ids(comment))
+    await delete_comment_tree(db, comment)
+    await db.commit()
+    await invalidate(*tags)
     return None
 
 
 @router.get("/{comment_id}", response_model=CommentSchema)
-def read_comment(
+async def read_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    depth: int = Query(DEFAULT_DEPTH, ge=0, le=10),
+    replies_limit: int = Query(DEFAULT_REPLIES_LIMIT, ge=0, le=50),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    comment = (
-        db.query(CommentModel)
-        .options(joinedload(CommentModel.replies))
-        .filter(CommentModel.id == comment_id)
-        .first()
-    )
+    comment = await db.get(CommentModel, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado.")
 
-    return comment
+    return await load_comment_tree(db, comment, depth, replies_limit)
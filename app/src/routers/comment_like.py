@@ -1,71 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from src.core.database import get_db
-from src.core.security import get_current_user
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+from src.core.database import get_db, get_read_db
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
 from src.models.comment import Comment
 from src.models.comment_like import CommentLike as CommentLikeModel
-from src.models.user import User
 from src.schemas.comment_like import CommentLike as CommentLikeSchema
 from src.schemas.comment_like import CommentLikeCreate
+from src.services import write_behind
+from src.services.counters import increment
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
 @router.post("/", response_model=CommentLikeSchema)
-def like_comment(
+async def like_comment(
     like_in: CommentLikeCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    comment = db.query(Comment).filter(Comment.id == like_in.comment_id).first()
+    result = await db.execute(select(Comment).where(Comment.id == like_in.comment_id))
+    comment = result.scalars().first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
 
-    existing_like = (
-        db.query(CommentLikeModel)
-        .filter(
+    result = await db.execute(
+        select(CommentLikeModel).where(
             CommentLikeModel.user_id == current_user.id,
             CommentLikeModel.comment_id == like_in.comment_id,
         )
-        .first()
     )
-    if existing_like:
+    existing_like = result.scalars().first()
+    if await write_behind.effective_state(
+        "comment", like_in.comment_id, current_user.id, existing_like is not None
+    ):
         raise HTTPException(status_code=400, detail="Você já curtiu este comentário")
 
+    if write_behind.buffer:
+        # Gravação adiada: a intenção é aplicada em lote pelo flusher
+        if not await write_behind.buffer.submit(
+            "comment", like_in.comment_id, current_user.id, write_behind.ADD
+        ):
+            raise HTTPException(status_code=400, detail="Você já curtiu este comentário")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"comment_id": like_in.comment_id, "user_id": current_user.id, "pending": True},
+        )
+
     like = CommentLikeModel(
         user_id=current_user.id,
         comment_id=like_in.comment_id,
     )
     db.add(like)
-    db.commit()
-    db.refresh(like)
+    await increment(db, Comment, like_in.comment_id, "like_count")
+    await db.commit()
+    await db.refresh(like)
     return like
 
 
 @router.delete("/{comment_id}")
-def unlike_comment(
+async def unlike_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    like = (
-        db.query(CommentLikeModel)
-        .filter(
+    result = await db.execute(
+        select(CommentLikeModel).where(
             CommentLikeModel.user_id == current_user.id, CommentLikeModel.comment_id == comment_id
         )
-        .first()
     )
-    if not like:
+    like = result.scalars().first()
+    if not await write_behind.effective_state(
+        "comment", comment_id, current_user.id, like is not None
+    ):
         raise HTTPException(status_code=404, detail="Curtida não encontrada")
-    db.delete(like)
-    db.commit()
+    if write_behind.buffer:
+        if not await write_behind.buffer.submit(
+            "comment", comment_id, current_user.id, write_behind.REMOVE
+        ):
+            raise HTTPException(status_code=404, detail="Curtida não encontrada")
+        return {"detail": "Curtida removida com sucesso"}
+    await db.delete(like)
+    await increment(db, Comment, comment_id, "like_count", -1)
+    await db.commit()
     return {"detail": "Curtida removida com sucesso"}
 
 
 @router.get("/count", response_model=int)
-def get_reactions_count_comment(
+async def get_reactions_count_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     # Verificar se um dos IDs foi fornecido
     if not comment_id:
@@ -73,25 +102,69 @@ def get_reactions_count_comment(
             status_code=400,
             detail="É necessário especificar comment_id.",
         )
-    if comment_id:
-        count = (
-            db.query(CommentLikeModel).filter(CommentLikeModel.comment_id == comment_id).count()
-        )
-    return count
+    # Contador desnormalizado, mantido pelas rotas de curtir/descurtir
+    count = await db.scalar(select(Comment.like_count).where(Comment.id == comment_id))
+    counts = await write_behind.overlay_counts("comment", {comment_id: count or 0})
+    return counts[comment_id]
 
 
 @router.get("/check", response_model=bool)
-def check_user_reaction_comment(
+async def check_user_reaction_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_principal),
 ):
     if comment_id is None:
         raise HTTPException(
             status_code=400,
             detail="Por favor, especifique 'comment_id'",
         )
-    query = db.query(CommentLikeModel).filter(CommentLikeModel.user_id == user.id)
+    query = select(CommentLikeModel.id).where(CommentLikeModel.user_id == user.id)
     if comment_id:
-        query = query.filter(CommentLikeModel.comment_id == comment_id)
-    return query.first() is not None
+        query = query.where(CommentLikeModel.comment_id == comment_id)
+    result = await db.execute(query.limit(1))
+    return await write_behind.effective_state(
+        "comment", comment_id, user.id, result.first() is not None
+    )
+
+
+def get_batch_ids(comment_ids: List[int]):
+    ids = list(dict.fromkeys(comment_ids))
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"Máximo de {settings.BATCH_MAX_IDS} IDs por requisição."
+        )
+    return ids
+
+
+@router.get("/count/batch", response_model=Dict[int, int])
+async def get_reactions_count_comment_batch(
+    comment_ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Contagem de curtidas de vários comentários em uma única consulta: {id: total}.
+    """
+    ids = get_batch_ids(comment_ids)
+    result = await db.execute(select(Comment.id, Comment.like_count).where(Comment.id.in_(ids)))
+    counts = dict(result.all())
+    return await write_behind.overlay_counts("comment", {id_: counts.get(id_, 0) for id_ in ids})
+
+
+@router.get("/check/batch", response_model=Dict[int, bool])
+async def check_user_reaction_comment_batch(
+    comment_ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_principal),
+):
+    """
+    Indica, em uma única consulta, quais comentários o usuário já curtiu: {id: bool}.
+    """
+    ids = get_batch_ids(comment_ids)
+    result = await db.execute(
+        select(CommentLikeModel.comment_id).where(
+            CommentLikeModel.user_id == user.id, CommentLikeModel.comment_id.in_(ids)
+        )
+    )
+    liked = set(result.scalars().all())
+    return await write_behind.overlay_states("comment", user.id, {id_: id_ in liked for id_ in ids})
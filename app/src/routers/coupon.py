@@ -1,96 +1,142 @@
 # src/routers/coupon.py
 
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi_cache.decorator import cache
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload, selectinload
-from src.core.database import get_db
-from src.core.security import get_current_user
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import entity_tags, invalidate, tagged_cache
+from src.core.config import settings
+from src.core.database import get_db, get_read_db
+from src.core.links import canonical_key
+from src.core.pagination import build_page, paginate
+from src.core.projection import select_schema
+from src.core.query_stats import query_budget
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
+from src.core.suggest import SuggestionCache, get_suggestions
+from src.models.base import SEARCH_CONFIG
+from src.models.comment import Comment as CommentModel
 from src.models.coupon import Coupon as CouponModel
-from src.models.user import User
+from src.schemas.ingest import IngestReport
+from src.schemas.pagination import Page
 from src.schemas.coupon import Coupon, CouponCreate, CouponStatus, CouponUpdate
+from src.services.duplicates import mark_new_item
+from src.services.ingest import ingest_request
+from src.services.moderation import comment_authors
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
+
+# Cache local dos prefixos mais buscados no autocomplete de cupons
+suggestion_cache = SuggestionCache(settings.SUGGEST_CACHE_SIZE, settings.SUGGEST_CACHE_TTL_SECONDS)
 
 
 @router.post("/", response_model=Coupon)
-def create_coupon(
+async def create_coupon(
     coupon_in: CouponCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     coupon_data = coupon_in.dict()
     coupon_data["link"] = str(coupon_data["link"])  # Converter o link para string
+    # Repetida de uma oferta viva: criada mesmo assim, marcada para o moderador
+    await mark_new_item(db, CouponModel, coupon_data)
     coupon = CouponModel(**coupon_data, user_id=current_user.id)
     db.add(coupon)
-    db.commit()
-    db.refresh(coupon)
+    await db.commit()
+    await db.refresh(coupon)
+    await invalidate(*entity_tags("coupons", coupon))
     return coupon
 
 
-@router.get("/", response_model=List[Coupon])
-@cache(expire=60)
-def read_coupons(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    coupons = (
-        db.query(CouponModel)
-        .options(
-            # Carregamento otimizado de relacionamentos
-            joinedload(CouponModel.user),
-            selectinload(CouponModel.comments),
-        )
-        .filter(CouponModel.status == CouponStatus.APPROVED)
-        .order_by(CouponModel.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return coupons
+# Um INSERT (e o SELECT das repetidas) por lote: o número de queries cresce com o arquivo
+@router.post("/bulk", response_model=IngestReport, dependencies=[Depends(query_budget())])
+async def ingest_coupons(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Ingestão em lote (NDJSON ou CSV, pelo Content-Type ou por `format`) para os robôs de
+    coleta. Registros inválidos são reportados por linha sem interromper o restante.
+    """
+    if current_user.role not in ("MODERATOR", "ADMIN"):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    report = await ingest_request(db, "coupons", request, current_user.id, format)
+    if report.inserted:
+        report.tags.update([f"coupons:user:{current_user.id}", "coupons:status:PENDING"])
+    await invalidate(*report.tags)
+    return report.as_dict()
+
+
+@router.get("/", response_model=Page[Coupon])
+@tagged_cache(settings.CACHE_EXPIRE_SECONDS, ["coupons", "coupons:status:APPROVED"])
+async def read_coupons(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Só as colunas do schema: o feed não devolve o autor nem os comentários
+    query = select_schema(CouponModel, Coupon).where(CouponModel.status == CouponStatus.APPROVED)
+    result = await db.execute(paginate(query, CouponModel, cursor, limit, skip=skip))
+    return build_page(result.all(), limit)
+
+
+@router.get("/suggest", response_model=List[str])
+async def suggest_coupons(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Autocomplete de produtos e lojas (prefixo e similaridade via pg_trgm).
+    """
+    return await get_suggestions(db, suggestion_cache, CouponModel, CouponStatus.APPROVED, q, limit)
 
 
 @router.get("/{coupon_id}", response_model=Coupon)
-def read_coupon(coupon_id: int, db: Session = Depends(get_db)):
-    coupon = (
-        db.query(CouponModel)
-        .filter(
+async def read_coupon(coupon_id: int, db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(
+        select(CouponModel).where(
             CouponModel.id == coupon_id,
             CouponModel.status == CouponStatus.APPROVED,
         )
-        .first()
     )
+    coupon = result.scalars().first()
     if not coupon:
         raise HTTPException(status_code=404, detail="Cupom não encontrado")
     return coupon
 
 
-@router.get("/pending/", response_model=List[Coupon])
-def read_pending_coupons(
-    skip: int = 0,
+@router.get("/pending/", response_model=Page[Coupon])
+async def read_pending_coupons(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ):
     if current_user.role not in ("MODERATOR", "ADMIN"):
         raise HTTPException(status_code=403, detail="Acesso negado")
-    coupons = (
-        db.query(CouponModel)
-        .filter(CouponModel.status == CouponStatus.PENDING)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = select_schema(CouponModel, Coupon).where(CouponModel.status == CouponStatus.PENDING)
+    # Fila de moderação: mais antigos primeiro
+    result = await db.execute(
+        paginate(query, CouponModel, cursor, limit, descending=False, skip=skip)
     )
-    return coupons
+    return build_page(result.all(), limit)
 
 
 @router.put("/{coupon_id}", response_model=Coupon)
-def update_coupon(
+async def update_coupon(
     coupon_id: int,
     coupon_in: CouponUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    coupon = db.query(CouponModel).filter(CouponModel.id == coupon_id).first()
+    result = await db.execute(select(CouponModel).where(CouponModel.id == coupon_id))
+    coupon = result.scalars().first()
     if not coupon:
         raise HTTPException(status_code=404, detail="Cupom não encontrado")
     if coupon.user_id != current_user.id and current_user.role not in (
@@ -99,25 +145,29 @@ def update_coupon(
     ):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
+    previous_tags = entity_tags("coupons", coupon)
     update_data = coupon_in.dict(exclude_unset=True)
     if "link" in update_data:
         update_data["link"] = str(update_data["link"])  # Converter o link para string
+        update_data["canonical_key"] = canonical_key(update_data["link"])
 
     for var, value in update_data.items():
         setattr(coupon, var, value)
 
-    db.commit()
-    db.refresh(coupon)
+    await db.commit()
+    await db.refresh(coupon)
+    await invalidate(*previous_tags, *entity_tags("coupons", coupon))
     return coupon
 
 
 @router.delete("/{coupon_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_coupon(
+async def delete_coupon(
     coupon_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    coupon = db.query(CouponModel).filter(CouponModel.id == coupon_id).first()  # noqa :E501
+    result = await db.execute(select(CouponModel).where(CouponModel.id == coupon_id))
+    coupon = result.scalars().first()
     if not coupon:
         raise HTTPException(status_code=404, detail="Cupom não encontrado")
     if coupon.user_id != current_user.id and current_user.role not in (
@@ -126,36 +176,35 @@ def delete_coupon(
     ):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
-    db.delete(coupon)
-    db.commit()
+    # Os comentários saem em cascata: as páginas de comentários dos autores também mudam
+    comment_tags = await comment_authors(db, CommentModel.coupon_id == coupon.id)
+    await db.delete(coupon)
+    await db.commit()
+    await invalidate(*entity_tags("coupons", coupon), *comment_tags)
     return None
 
 
-@router.get("/search/")
-@cache(expire=30)
+@router.get("/search/", response_model=List[Coupon])
+@tagged_cache(settings.SEARCH_CACHE_EXPIRE_SECONDS, ["coupons", "coupons:status:APPROVED"])
 async def search_coupons(
-    q: str = Query(None), skip: int = 0, limit: int = 10, db: Session = Depends(get_db)
+    q: str = Query(None),
+    skip: int = 0,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(CouponModel).filter(CouponModel.status == CouponStatus.APPROVED)
+    query = select_schema(CouponModel, Coupon).where(CouponModel.status == CouponStatus.APPROVED)
 
     if q:
-        # Usar full-text search
-        search_vector = func.to_tsvector(
-            "portuguese",
-            func.concat(CouponModel.product, " ", CouponModel.store, " ", CouponModel.comment),
-        )
-        search_query = func.plainto_tsquery("portuguese", q)
+        # Full-text search na coluna tsvector gerada (índice GIN)
+        search_vector = CouponModel.__table__.c.search_vector
+        search_query = func.plainto_tsquery(SEARCH_CONFIG, q)
 
-        query = query.filter(search_vector.op("@@")(search_query))
-
-    coupons = (
-        query.order_by(
+        query = query.where(search_vector.op("@@")(search_query)).order_by(
             # Ranking de relevância
-            func.ts_rank(search_vector, search_query).desc(),
-            CouponModel.created_at.desc(),
+            func.ts_rank(search_vector, search_query).desc()
         )
-        .offset(skip)
-        .limit(limit)
-        .all()
+
+    result = await db.execute(
+        query.order_by(CouponModel.created_at.desc()).offset(skip).limit(limit)
     )
-    return coupons
+    return result.all()
@@ -3,62 +3,90 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import invalidate
 from src.core.database import get_db
-from src.core.security import get_current_user
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
 from src.models.comment import Comment as CommentModel
-from src.models.user import User
+from src.routers.comment import (
+    comment_cache_tags,
+    delete_comment_tree,
+    get_comment_with_replies,
+    thread_user_ids,
+)
 from src.schemas.comment import Comment, CommentUpdate
+from src.schemas.moderation import BulkIds, BulkResult
+from src.services import moderation
+from src.services.comment_tree import load_comment_tree, load_comment_trees
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
-def require_moderator(current_user: User = Depends(get_current_user)):
+def require_moderator(current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ("ADMIN", "MODERATOR"):
         raise HTTPException(status_code=403, detail="Acesso negado")
     return current_user
 
 
 @router.get("/", response_model=List[Comment])
-def get_all_comments(
+async def get_all_comments(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    comments = db.query(CommentModel).offset(skip).limit(limit).all()
-    return comments
+    result = await db.execute(select(CommentModel).offset(skip).limit(limit))
+    return await load_comment_trees(db, result.scalars().all())
 
 
 @router.put("/{comment_id}", response_model=Comment)
-def update_comment(
+async def update_comment(
     comment_id: int,
     comment_in: CommentUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    comment = db.query(CommentModel).filter(CommentModel.id == comment_id).first()
+    comment = await db.get(CommentModel, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
 
     update_data = comment_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(comment, key, value)
-    db.commit()
-    db.refresh(comment)
-    return comment
+    await db.commit()
+    await invalidate(*await comment_cache_tags(db, comment))
+    return await load_comment_tree(db, comment)
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(
+async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    comment = db.query(CommentModel).filter(CommentModel.id == comment_id).first()
+    comment = await get_comment_with_replies(db, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
 
-    db.delete(comment)
-    db.commit()
+    tags = await comment_cache_tags(db, comment, thread_user_ids(comment))
+    await delete_comment_tree(db, comment)
+    await db.commit()
+    await invalidate(*tags)
     return None
+
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def bulk_delete_comments(
+    bulk_in: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Remove vários comentários, com as respostas, sem carregar as árvores no ORM.
+    """
+    results, tags = await moderation.bulk_delete_comments(db, moderation.unique_ids(bulk_in.ids))
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
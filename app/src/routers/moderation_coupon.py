@@ -1,52 +1,62 @@
 # src/routers/moderation_coupon.py
 
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import entity_tags, invalidate
+from src.core.config import settings
 from src.core.database import get_db
-from src.core.security import get_current_user
+from src.core.pagination import build_page, paginate
+from src.core.projection import select_schema
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
+from src.models.comment import Comment as CommentModel
 from src.models.coupon import Coupon as CouponModel
-from src.models.user import User
-from src.schemas.coupon import Coupon, CouponStatus, CouponUpdate
+from src.schemas.moderation import BulkIds, BulkResult, Claim
+from src.schemas.pagination import Page
+from src.schemas.coupon import Coupon, CouponBulkStatusUpdate, CouponStatus, CouponUpdate
+from src.services import moderation
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
-def require_moderator(current_user: User = Depends(get_current_user)):
+def require_moderator(current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ("ADMIN", "MODERATOR"):
         raise HTTPException(status_code=403, detail="Acesso negado")
     return current_user
 
 
-@router.get("/pending", response_model=List[Coupon])
-def get_pending_coupons(
-    skip: int = 0,
+@router.get("/pending", response_model=Page[Coupon])
+async def get_pending_coupons(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    coupons = (
-        db.query(CouponModel)
-        .filter(CouponModel.status == CouponStatus.PENDING)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = select_schema(CouponModel, Coupon).where(CouponModel.status == CouponStatus.PENDING)
+    # Fila de moderação: mais antigos primeiro
+    result = await db.execute(
+        paginate(query, CouponModel, cursor, limit, descending=False, skip=skip)
     )
-    return coupons
+    return build_page(result.all(), limit)
 
 
 @router.put("/{coupon_id}", response_model=Coupon)
-def update_coupon_status(
+async def update_coupon_status(
     coupon_id: int,
     coupon_in: CouponUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    coupon = db.query(CouponModel).filter(CouponModel.id == coupon_id).first()
+    result = await db.execute(select(CouponModel).where(CouponModel.id == coupon_id))
+    coupon = result.scalars().first()
     if not coupon:
         raise HTTPException(status_code=404, detail="Cupom não encontrado")
 
+    previous_tags = entity_tags("coupons", coupon)
     update_data = coupon_in.dict(exclude_unset=True)
     if "link" in update_data:
         update_data["link"] = str(update_data["link"])  # Converter o link para string
@@ -54,21 +64,113 @@ def update_coupon_status(
     for var, value in update_data.items():
         setattr(coupon, var, value)
 
-    db.commit()
-    db.refresh(coupon)
+    await db.commit()
+    await db.refresh(coupon)
+    # Aprovar/reprovar tira ou coloca o item nos feeds cacheados
+    await invalidate(*previous_tags, *entity_tags("coupons", coupon))
     return coupon
 
 
 @router.delete("/{coupon_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_coupon(
+async def delete_coupon(
     coupon_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    coupon = db.query(CouponModel).filter(CouponModel.id == coupon_id).first()
+    result = await db.execute(select(CouponModel).where(CouponModel.id == coupon_id))
+    coupon = result.scalars().first()
     if not coupon:
         raise HTTPException(status_code=404, detail="Cupom não encontrado")
 
-    db.delete(coupon)
-    db.commit()
+    # Os comentários saem em cascata: as páginas de comentários dos autores também mudam
+    comment_tags = await moderation.comment_authors(db, CommentModel.coupon_id == coupon.id)
+    await db.delete(coupon)
+    await db.commit()
+    await invalidate(*entity_tags("coupons", coupon), *comment_tags)
     return None
+
+
+@router.post("/bulk/status", response_model=BulkResult)
+async def bulk_update_coupon_status(
+    bulk_in: CouponBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Aprova/reprova vários cupons com um único UPDATE; o resultado informa cada ID.
+    """
+    results, tags = await moderation.bulk_update_status(
+        db, CouponModel, "coupons", moderation.unique_ids(bulk_in.ids), bulk_in.status.value
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def bulk_delete_coupons(
+    bulk_in: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Remove vários cupons (com reações e comentários) com um DELETE por tabela.
+    """
+    results, tags = await moderation.bulk_delete_items(
+        db, CouponModel, "coupons", "coupon_id", moderation.unique_ids(bulk_in.ids)
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/claim", response_model=Claim[Coupon])
+async def claim_coupons(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Reserva os próximos cupons pendentes para o moderador atual.
+
+    Moderadores diferentes nunca recebem os mesmos itens enquanto a reserva vale
+    (MODERATION_CLAIM_LEASE_SECONDS); conclua com /claim/complete ou devolva com
+    /claim/release.
+    """
+    items, claimed_until = await moderation.claim_items(
+        db, CouponModel, current_user.id, limit, settings.MODERATION_CLAIM_LEASE_SECONDS
+    )
+    await db.commit()
+    return {"items": items, "claimed_until": claimed_until if items else None}
+
+
+@router.post("/claim/complete", response_model=BulkResult)
+async def complete_claimed_coupons(
+    bulk_in: CouponBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    results, tags = await moderation.bulk_update_status(
+        db,
+        CouponModel,
+        "coupons",
+        moderation.unique_ids(bulk_in.ids),
+        bulk_in.status.value,
+        claimed_by=current_user.id,
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/claim/release", response_model=BulkResult)
+async def release_claimed_coupons(
+    bulk_in: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    results = await moderation.release_items(
+        db, CouponModel, current_user.id, moderation.unique_ids(bulk_in.ids)
+    )
+    await db.commit()
+    return {"results": results}
@@ -1,52 +1,69 @@
 # src/routers/moderation_promotion.py
 
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import entity_tags, invalidate
+from src.core.config import settings
 from src.core.database import get_db
-from src.core.security import get_current_user
+from src.core.pagination import build_page, paginate
+from src.core.projection import select_schema
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
+from src.models.comment import Comment as CommentModel
 from src.models.promotion import Promotion as PromotionModel
-from src.models.user import User
-from src.schemas.promotion import Promotion, PromotionStatus, PromotionUpdate
+from src.schemas.moderation import BulkIds, BulkResult, Claim
+from src.schemas.pagination import Page
+from src.schemas.promotion import (
+    Promotion,
+    PromotionBulkStatusUpdate,
+    PromotionStatus,
+    PromotionUpdate,
+)
+from src.services import moderation
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
 
 
-def require_moderator(current_user: User = Depends(get_current_user)):
+def require_moderator(current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ("ADMIN", "MODERATOR"):
         raise HTTPException(status_code=403, detail="Acesso negado")
     return current_user
 
 
-@router.get("/pending", response_model=List[Promotion])
-def get_pending_promotions(
-    skip: int = 0,
+@router.get("/pending", response_model=Page[Promotion])
+async def get_pending_promotions(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    promotions = (
-        db.query(PromotionModel)
-        .filter(PromotionModel.status == PromotionStatus.PENDING)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = select_schema(PromotionModel, Promotion).where(
+        PromotionModel.status == PromotionStatus.PENDING
     )
-    return promotions
+    # Fila de moderação: mais antigos primeiro
+    result = await db.execute(
+        paginate(query, PromotionModel, cursor, limit, descending=False, skip=skip)
+    )
+    return build_page(result.all(), limit)
 
 
 @router.put("/{promotion_id}", response_model=Promotion)
-def update_promotion_status(
+async def update_promotion_status(
     promotion_id: int,
     promotion_in: PromotionUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    promotion = db.query(PromotionModel).filter(PromotionModel.id == promotion_id).first()
+    result = await db.execute(select(PromotionModel).where(PromotionModel.id == promotion_id))
+    promotion = result.scalars().first()
     if not promotion:
         raise HTTPException(status_code=404, detail="Promoção não encontrada")
 
+    previous_tags = entity_tags("promotions", promotion)
     update_data = promotion_in.dict(exclude_unset=True)
     if "link" in update_data:
         update_data["link"] = str(update_data["link"])  # Converter o link para string
@@ -54,21 +71,113 @@ def update_promotion_status(
     for var, value in update_data.items():
         setattr(promotion, var, value)
     print(update_data)
-    db.commit()
-    db.refresh(promotion)
+    await db.commit()
+    await db.refresh(promotion)
+    # Aprovar/reprovar tira ou coloca o item nos feeds cacheados
+    await invalidate(*previous_tags, *entity_tags("promotions", promotion))
     return promotion
 
 
 @router.delete("/{promotion_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_promotion(
+async def delete_promotion(
     promotion_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_moderator),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
 ):
-    promotion = db.query(PromotionModel).filter(PromotionModel.id == promotion_id).first()
+    result = await db.execute(select(PromotionModel).where(PromotionModel.id == promotion_id))
+    promotion = result.scalars().first()
     if not promotion:
         raise HTTPException(status_code=404, detail="Promoção não encontrada")
 
-    db.delete(promotion)
-    db.commit()
+    # Os comentários saem em cascata: as páginas de comentários dos autores também mudam
+    comment_tags = await moderation.comment_authors(db, CommentModel.promotion_id == promotion.id)
+    await db.delete(promotion)
+    await db.commit()
+    await invalidate(*entity_tags("promotions", promotion), *comment_tags)
     return None
+
+
+@router.post("/bulk/status", response_model=BulkResult)
+async def bulk_update_promotion_status(
+    bulk_in: PromotionBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Aprova/reprova várias promoções com um único UPDATE; o resultado informa cada ID.
+    """
+    results, tags = await moderation.bulk_update_status(
+        db, PromotionModel, "promotions", moderation.unique_ids(bulk_in.ids), bulk_in.status.value
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def bulk_delete_promotions(
+    bulk_in: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Remove várias promoções (com reações e comentários) com um DELETE por tabela.
+    """
+    results, tags = await moderation.bulk_delete_items(
+        db, PromotionModel, "promotions", "promotion_id", moderation.unique_ids(bulk_in.ids)
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/claim", response_model=Claim[Promotion])
+async def claim_promotions(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    """
+    Reserva as próximas promoções pendentes para o moderador atual.
+
+    Moderadores diferentes nunca recebem os mesmos itens enquanto a reserva vale
+    (MODERATION_CLAIM_LEASE_SECONDS); conclua com /claim/complete ou devolva com
+    /claim/release.
+    """
+    items, claimed_until = await moderation.claim_items(
+        db, PromotionModel, current_user.id, limit, settings.MODERATION_CLAIM_LEASE_SECONDS
+    )
+    await db.commit()
+    return {"items": items, "claimed_until": claimed_until if items else None}
+
+
+@router.post("/claim/complete", response_model=BulkResult)
+async def complete_claimed_promotions(
+    bulk_in: PromotionBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    results, tags = await moderation.bulk_update_status(
+        db,
+        PromotionModel,
+        "promotions",
+        moderation.unique_ids(bulk_in.ids),
+        bulk_in.status.value,
+        claimed_by=current_user.id,
+    )
+    await db.commit()
+    await invalidate(*tags)
+    return {"results": results}
+
+
+@router.post("/claim/release", response_model=BulkResult)
+async def release_claimed_promotions(
+    bulk_in: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_moderator),
+):
+    results = await moderation.release_items(
+        db, PromotionModel, current_user.id, moderation.unique_ids(bulk_in.ids)
+    )
+    await db.commit()
+    return {"results": results}
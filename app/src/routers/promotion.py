@@ -1,106 +1,154 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi_cache.decorator import cache
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload, selectinload
-from src.core.database import get_db
-from src.core.security import get_current_user
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import entity_tags, invalidate, tagged_cache
+from src.core.config import settings
+from src.core.database import get_db, get_read_db
+from src.core.links import canonical_key
+from src.core.pagination import build_page, paginate
+from src.core.projection import select_schema
+from src.core.query_stats import query_budget
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
+from src.core.suggest import SuggestionCache, get_suggestions
+from src.models.base import SEARCH_CONFIG
+from src.models.comment import Comment as CommentModel
 from src.models.promotion import Promotion as PromotionModel
-from src.models.user import User
+from src.schemas.ingest import IngestReport
+from src.schemas.pagination import Page
 from src.schemas.promotion import (
     Promotion,
     PromotionCreate,
     PromotionStatus,
     PromotionUpdate,
 )
+from src.services.duplicates import mark_new_item
+from src.services.ingest import ingest_request
+from src.services.moderation import comment_authors
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
+
+# Cache local dos prefixos mais buscados no autocomplete de promoções
+suggestion_cache = SuggestionCache(settings.SUGGEST_CACHE_SIZE, settings.SUGGEST_CACHE_TTL_SECONDS)
 
 
 @router.post("/", response_model=Promotion)
-def create_promotion(
+async def create_promotion(
     promotion_in: PromotionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     promotion_data = promotion_in.dict()
     promotion_data["link"] = str(promotion_data["link"])  # Converter o link para string
+    # Repetida de uma oferta viva: criada mesmo assim, marcada para o moderador
+    await mark_new_item(db, PromotionModel, promotion_data)
     promotion = PromotionModel(**promotion_data, user_id=current_user.id)
     db.add(promotion)
-    db.commit()
-    db.refresh(promotion)
+    await db.commit()
+    await db.refresh(promotion)
+    await invalidate(*entity_tags("promotions", promotion))
     return promotion
 
 
-@router.get("/", response_model=List[Promotion])
-@cache(expire=60)
-def read_promotions(
-    skip: int = 0,
+# Um INSERT (e o SELECT das repetidas) por lote: o número de queries cresce com o arquivo
+@router.post("/bulk", response_model=IngestReport, dependencies=[Depends(query_budget())])
+async def ingest_promotions(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Ingestão em lote (NDJSON ou CSV, pelo Content-Type ou por `format`) para os robôs de
+    coleta. Registros inválidos são reportados por linha sem interromper o restante.
+    """
+    if current_user.role not in ("MODERATOR", "ADMIN"):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    report = await ingest_request(db, "promotions", request, current_user.id, format)
+    if report.inserted:
+        report.tags.update([f"promotions:user:{current_user.id}", "promotions:status:PENDING"])
+    await invalidate(*report.tags)
+    return report.as_dict()
+
+
+@router.get("/", response_model=Page[Promotion])
+@tagged_cache(settings.CACHE_EXPIRE_SECONDS, ["promotions", "promotions:status:APPROVED"])
+async def read_promotions(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    promotions = (
-        db.query(PromotionModel)
-        .options(
-            # Carregamento otimizado de relacionamentos
-            joinedload(PromotionModel.user),
-            selectinload(PromotionModel.comments),
-        )
-        .filter(PromotionModel.status == PromotionStatus.APPROVED)
-        .order_by(PromotionModel.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    # Só as colunas do schema: o feed não devolve o autor nem os comentários
+    query = select_schema(PromotionModel, Promotion).where(
+        PromotionModel.status == PromotionStatus.APPROVED
+    )
+    result = await db.execute(paginate(query, PromotionModel, cursor, limit, skip=skip))
+    return build_page(result.all(), limit)
+
+
+@router.get("/suggest", response_model=List[str])
+async def suggest_promotions(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Autocomplete de produtos e lojas (prefixo e similaridade via pg_trgm).
+    """
+    return await get_suggestions(
+        db, suggestion_cache, PromotionModel, PromotionStatus.APPROVED, q, limit
     )
-    return promotions
 
 
 @router.get("/{promotion_id}", response_model=Promotion)
-def read_promotion(
+async def read_promotion(
     promotion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    promotion = (
-        db.query(PromotionModel)
-        .filter(
+    result = await db.execute(
+        select(PromotionModel).where(
             PromotionModel.id == promotion_id,
             PromotionModel.status == PromotionStatus.APPROVED,
         )
-        .first()
     )
+    promotion = result.scalars().first()
     if not promotion:
         raise HTTPException(status_code=404, detail="Promoção não encontrada ou não aprovada")
     return promotion
 
 
-@router.get("/pending/", response_model=List[Promotion])
-def read_pending_promotions(
-    skip: int = 0,
+@router.get("/pending/", response_model=Page[Promotion])
+async def read_pending_promotions(
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ):
     if current_user.role not in ("MODERATOR", "ADMIN"):
         raise HTTPException(status_code=403, detail="Acesso negado")
-    promotions = (
-        db.query(PromotionModel)
-        .filter(PromotionModel.status == PromotionStatus.PENDING)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = select_schema(PromotionModel, Promotion).where(
+        PromotionModel.status == PromotionStatus.PENDING
+    )
+    # Fila de moderação: mais antigos primeiro
+    result = await db.execute(
+        paginate(query, PromotionModel, cursor, limit, descending=False, skip=skip)
     )
-    return promotions
+    return build_page(result.all(), limit)
 
 
 @router.put("/{promotion_id}", response_model=Promotion)
-def update_promotion(
+async def update_promotion(
     promotion_id: int,
     promotion_in: PromotionUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    promotion = db.query(PromotionModel).filter(PromotionModel.id == promotion_id).first()
+    result = await db.execute(select(PromotionModel).where(PromotionModel.id == promotion_id))
+    promotion = result.scalars().first()
     if not promotion:
         raise HTTPException(status_code=404, detail="Promoção não encontrada")
     if promotion.user_id != current_user.id and current_user.role not in (
@@ -109,27 +157,29 @@ def update_promotion(
     ):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
+    previous_tags = entity_tags("promotions", promotion)
     update_data = promotion_in.dict(exclude_unset=True)
     if "link" in update_data:
         update_data["link"] = str(update_data["link"])  # Converter o link para string
+        update_data["canonical_key"] = canonical_key(update_data["link"])
 
     for var, value in update_data.items():
         setattr(promotion, var, value)
 
-    db.commit()
-    db.refresh(promotion)
+    await db.commit()
+    await db.refresh(promotion)
+    await invalidate(*previous_tags, *entity_tags("promotions", promotion))
     return promotion
 
 
 @router.delete("/{promotion_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_promotion(
+async def delete_promotion(
     promotion_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    promotion = (
-        db.query(PromotionModel).filter(PromotionModel.id == promotion_id).first()
-    )  # noqa :E501
+    result = await db.execute(select(PromotionModel).where(PromotionModel.id == promotion_id))
+    promotion = result.scalars().first()
     if not promotion:
         raise HTTPException(status_code=404, detail="Promoção não encontrada")
     if promotion.user_id != current_user.id and current_user.role not in (
@@ -138,38 +188,37 @@ def delete_promotion(
     ):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
-    db.delete(promotion)
-    db.commit()
+    # Os comentários saem em cascata: as páginas de comentários dos autores também mudam
+    comment_tags = await comment_authors(db, CommentModel.promotion_id == promotion.id)
+    await db.delete(promotion)
+    await db.commit()
+    await invalidate(*entity_tags("promotions", promotion), *comment_tags)
     return None
 
 
-@router.get("/search/")
-@cache(expire=30)
+@router.get("/search/", response_model=List[Promotion])
+@tagged_cache(settings.SEARCH_CACHE_EXPIRE_SECONDS, ["promotions", "promotions:status:APPROVED"])
 async def search_promotions(
-    q: str = Query(None), skip: int = 0, limit: int = 10, db: Session = Depends(get_db)
+    q: str = Query(None),
+    skip: int = 0,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(PromotionModel).filter(PromotionModel.status == PromotionStatus.APPROVED)
+    query = select_schema(PromotionModel, Promotion).where(
+        PromotionModel.status == PromotionStatus.APPROVED
+    )
 
     if q:
-        # Usar full-text search
-        search_vector = func.to_tsvector(
-            "portuguese",
-            func.concat(
-                PromotionModel.product, " ", PromotionModel.store, " ", PromotionModel.comment
-            ),
-        )
-        search_query = func.plainto_tsquery("portuguese", q)
+        # Full-text search na coluna tsvector gerada (índice GIN)
+        search_vector = PromotionModel.__table__.c.search_vector
+        search_query = func.plainto_tsquery(SEARCH_CONFIG, q)
 
-        query = query.filter(search_vector.op("@@")(search_query))
-
-    promotions = (
-        query.order_by(
+        query = query.where(search_vector.op("@@")(search_query)).order_by(
             # Ranking de relevância
-            func.ts_rank(search_vector, search_query).desc(),
-            PromotionModel.created_at.desc(),
+            func.ts_rank(search_vector, search_query).desc()
         )
-        .offset(skip)
-        .limit(limit)
-        .all()
+
+    result = await db.execute(
+        query.order_by(PromotionModel.created_at.desc()).offset(skip).limit(limit)
     )
-    return promotions
+    return result.all()
@@ -1,25 +1,36 @@
 # src/routers/reaction.py
 
-from typing import Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from src.core.database import get_db
-from src.core.security import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+from src.core.database import get_db, get_read_db
+from src.core.security import Principal, get_current_principal
+from src.core.serialization import SerializedRoute
 from src.models.coupon import Coupon as CouponModel
 from src.models.promotion import Promotion as PromotionModel
 from src.models.reaction import Reaction as ReactionModel
-from src.models.user import User as UserModel
 from src.schemas.reaction import Reaction, ReactionCreate
+from src.services import write_behind
+from src.services.counters import increment_target
 
-router = APIRouter()
+router = APIRouter(route_class=SerializedRoute)
+
+
+def reaction_target(promotion_id: Optional[int], coupon_id: Optional[int]):
+    if promotion_id:
+        return "promotion", promotion_id
+    return "coupon", coupon_id
 
 
 @router.post("/", response_model=Reaction)
-def create_reaction(
+async def create_reaction(
     reaction_in: ReactionCreate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     # Verificar se um dos IDs foi fornecido
     if not reaction_in.promotion_id and not reaction_in.coupon_id:
@@ -35,52 +46,71 @@ def create_reaction(
         )
     # Verificar se a promoção existe
     if reaction_in.promotion_id:
-        promotion = (
-            db.query(PromotionModel).filter(PromotionModel.id == reaction_in.promotion_id).first()
+        result = await db.execute(
+            select(PromotionModel).where(PromotionModel.id == reaction_in.promotion_id)
         )
+        promotion = result.scalars().first()
         if not promotion:
             raise HTTPException(status_code=404, detail="Promoção não encontrada.")
         # Verificar se já existe uma reação do usuário nessa promoção
-        existing_reaction = (
-            db.query(ReactionModel)
-            .filter(
+        result = await db.execute(
+            select(ReactionModel).where(
                 ReactionModel.user_id == current_user.id,
                 ReactionModel.promotion_id == reaction_in.promotion_id,
             )
-            .first()
         )
-        if existing_reaction:
+        existing_reaction = result.scalars().first()
+        if await write_behind.effective_state(
+            "promotion", reaction_in.promotion_id, current_user.id, existing_reaction is not None
+        ):
             raise HTTPException(status_code=400, detail="Você já curtiu esta promoção.")
     # Verificar se o cupom existe
     if reaction_in.coupon_id:
-        coupon = db.query(CouponModel).filter(CouponModel.id == reaction_in.coupon_id).first()
+        result = await db.execute(
+            select(CouponModel).where(CouponModel.id == reaction_in.coupon_id)
+        )
+        coupon = result.scalars().first()
         if not coupon:
             raise HTTPException(status_code=404, detail="Cupom não encontrado.")
         # Verificar se já existe uma reação do usuário nesse cupom
-        existing_reaction = (
-            db.query(ReactionModel)
-            .filter(
+        result = await db.execute(
+            select(ReactionModel).where(
                 ReactionModel.user_id == current_user.id,
                 ReactionModel.coupon_id == reaction_in.coupon_id,
             )
-            .first()
         )
-        if existing_reaction:
+        existing_reaction = result.scalars().first()
+        if await write_behind.effective_state(
+            "coupon", reaction_in.coupon_id, current_user.id, existing_reaction is not None
+        ):
             raise HTTPException(status_code=400, detail="Você já curtiu este cupom.")
 
+    if write_behind.buffer:
+        # Gravação adiada: a intenção é aplicada em lote pelo flusher
+        target, target_id = reaction_target(reaction_in.promotion_id, reaction_in.coupon_id)
+        if not await write_behind.buffer.submit(
+            target, target_id, current_user.id, write_behind.ADD
+        ):
+            raise HTTPException(status_code=400, detail="Reação já registrada.")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={**reaction_in.model_dump(), "user_id": current_user.id, "pending": True},
+        )
+
     reaction = ReactionModel(**reaction_in.model_dump(), user_id=current_user.id)
     db.add(reaction)
-    db.commit()
-    db.refresh(reaction)
+    await increment_target(db, reaction, "reaction_count")
+    await db.commit()
+    await db.refresh(reaction)
     return reaction
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-def delete_reaction(
+async def delete_reaction(
     promotion_id: Optional[int] = None,
     coupon_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     # Verificar se um dos IDs foi fornecido
     if not promotion_id and not coupon_id:
@@ -95,37 +125,37 @@ def delete_reaction(
             detail="Não é possível especificar ambos 'promotion_id' e 'coupon_id'.",
         )
     # Buscar a reação
+    query = select(ReactionModel).where(ReactionModel.user_id == current_user.id)
     if promotion_id:
-        reaction = (
-            db.query(ReactionModel)
-            .filter(
-                ReactionModel.user_id == current_user.id,
-                ReactionModel.promotion_id == promotion_id,
-            )
-            .first()
-        )
+        query = query.where(ReactionModel.promotion_id == promotion_id)
     if coupon_id:
-        reaction = (
-            db.query(ReactionModel)
-            .filter(
-                ReactionModel.user_id == current_user.id,
-                ReactionModel.coupon_id == coupon_id,
-            )
-            .first()
-        )
-    if not reaction:
+        query = query.where(ReactionModel.coupon_id == coupon_id)
+    result = await db.execute(query)
+    reaction = result.scalars().first()
+    target, target_id = reaction_target(promotion_id, coupon_id)
+    if not await write_behind.effective_state(
+        target, target_id, current_user.id, reaction is not None
+    ):
         raise HTTPException(status_code=404, detail="Reação não encontrada.")
 
-    db.delete(reaction)
-    db.commit()
+    if write_behind.buffer:
+        if not await write_behind.buffer.submit(
+            target, target_id, current_user.id, write_behind.REMOVE
+        ):
+            raise HTTPException(status_code=404, detail="Reação não encontrada.")
+        return None
+
+    await db.delete(reaction)
+    await increment_target(db, reaction, "reaction_count", -1)
+    await db.commit()
     return None
 
 
 @router.get("/count", response_model=int)
-def get_reactions_count(
+async def get_reactions_count(
     promotion_id: Optional[int] = None,
     coupon_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     # Verificar se um dos IDs foi fornecido
     if not promotion_id and not coupon_id:
@@ -138,28 +168,84 @@ def get_reactions_count(
             status_code=400,
             detail="Não é possível especificar ambos 'promotion_id' e 'coupon_id'.",
         )
+    # Contador desnormalizado, mantido pelas rotas de criação/remoção de reações
     if promotion_id:
-        count = db.query(ReactionModel).filter(ReactionModel.promotion_id == promotion_id).count()
+        query = select(PromotionModel.reaction_count).where(PromotionModel.id == promotion_id)
     if coupon_id:
-        count = db.query(ReactionModel).filter(ReactionModel.coupon_id == coupon_id).count()
-    return count
+        query = select(CouponModel.reaction_count).where(CouponModel.id == coupon_id)
+    target, target_id = reaction_target(promotion_id, coupon_id)
+    counts = await write_behind.overlay_counts(target, {target_id: await db.scalar(query) or 0})
+    return counts[target_id]
 
 
 @router.get("/check", response_model=bool)
-def check_user_reaction(
+async def check_user_reaction(
     promotion_id: Optional[int] = None,
     coupon_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_principal),
 ):
     if (promotion_id is None) == (coupon_id is None):
         raise HTTPException(
             status_code=400,
             detail="Por favor, especifique 'promotion_id' ou 'coupon_id', mas não ambos.",
         )
-    query = db.query(ReactionModel).filter(ReactionModel.user_id == user.id)
+    query = select(ReactionModel.id).where(ReactionModel.user_id == user.id)
     if promotion_id:
-        query = query.filter(ReactionModel.promotion_id == promotion_id)
+        query = query.where(ReactionModel.promotion_id == promotion_id)
     if coupon_id:
-        query = query.filter(ReactionModel.coupon_id == coupon_id)
-    return query.first() is not None
+        query = query.where(ReactionModel.coupon_id == coupon_id)
+    result = await db.execute(query.limit(1))
+    target, target_id = reaction_target(promotion_id, coupon_id)
+    return await write_behind.effective_state(
+        target, target_id, user.id, result.first() is not None
+    )
+
+
+def get_batch_target(promotion_ids: Optional[List[int]], coupon_ids: Optional[List[int]]):
+    if bool(promotion_ids) == bool(coupon_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Por favor, especifique 'promotion_ids' ou 'coupon_ids', mas não ambos.",
+        )
+    ids = list(dict.fromkeys(promotion_ids or coupon_ids))
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"Máximo de {settings.BATCH_MAX_IDS} IDs por requisição."
+        )
+    if promotion_ids:
+        return "promotion", PromotionModel, ReactionModel.promotion_id, ids
+    return "coupon", CouponModel, ReactionModel.coupon_id, ids
+
+
+@router.get("/count/batch", response_model=Dict[int, int])
+async def get_reactions_count_batch(
+    promotion_ids: Optional[List[int]] = Query(None),
+    coupon_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Contagem de reações de vários itens em uma única consulta: {id: total}.
+    """
+    target, model, _, ids = get_batch_target(promotion_ids, coupon_ids)
+    result = await db.execute(select(model.id, model.reaction_count).where(model.id.in_(ids)))
+    counts = dict(result.all())
+    return await write_behind.overlay_counts(target, {id_: counts.get(id_, 0) for id_ in ids})
+
+
+@router.get("/check/batch", response_model=Dict[int, bool])
+async def check_user_reaction_batch(
+    promotion_ids: Optional[List[int]] = Query(None),
+    coupon_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+    user: Principal = Depends(get_current_principal),
+):
+    """
+    Indica, em uma única consulta, em quais itens o usuário já reagiu: {id: bool}.
+    """
+    target, _, column, ids = get_batch_target(promotion_ids, coupon_ids)
+    result = await db.execute(
+        select(column).where(ReactionModel.user_id == user.id, column.in_(ids))
+    )
+    reacted = set(result.scalars().all())
+    return await write_behind.overlay_states(target, user.id, {id_: id_ in reacted for id_ in ids})
@@ -1,13 +1,28 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_cache.decorator import cache
-from sqlalchemy.orm import Session, joinedload
-from src.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import invalidate, tagged_cache
+from src.core.config import settings
+from src.core.database import get_db, get_read_db
+from src.core.pagination import build_page, paginate
+from src.core.projection import select_schema
 from src.core.security import (
+    Principal,
+    get_current_active_principal,
     get_current_active_user,
     get_current_user,
-    get_password_hash,
+    hash_password,
+    invalidate_principal,
 )
+from src.core.serialization import SerializedRoute
+from src.models.comment import Comment
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion
 from src.models.user import User
+from src.schemas.coupon import Coupon as CouponSchema
+from src.schemas.promotion import Promotion as PromotionSchema
 from src.schemas.user import (
     UserCreate,
     UserResponse,
@@ -16,16 +31,62 @@ from src.schemas.user import (
     UserWithCoupons,
     UserWithPromotions,
 )
+from src.services.comment_tree import load_comment_trees
+from src.services.counters import counter_targets_for_user, reconcile_counters
+
+router = APIRouter(route_class=SerializedRoute)
+
+
+async def get_user_or_404(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return user
+
+
+async def delete_user_account(db: AsyncSession, user: User):
+    # Reações, comentários e curtidas do usuário saem em cascata; os contadores das
+    # promoções, cupons e comentários afetados são recalculados na mesma transação
+    targets = await counter_targets_for_user(db, user.id)
+    await db.delete(user)
+    await db.flush()
+    await reconcile_counters(db, **targets)
+
 
-router = APIRouter()
+def account_tags(user_id: int):
+    # Excluir a conta remove em cascata promoções e cupons, inclusive dos feeds aprovados
+    return [
+        f"users:{user_id}",
+        f"promotions:user:{user_id}",
+        f"coupons:user:{user_id}",
+        f"comments:user:{user_id}",
+        "promotions:status:APPROVED",
+        "coupons:status:APPROVED",
+    ]
+
+
+def user_page_tags(kind: str):
+    def tags(user_id: int, **_):
+        return [kind, f"{kind}:user:{user_id}", f"users:{user_id}"]
+
+    return tags
+
+
+def user_with_page(user: User, field: str, page: dict) -> dict:
+    data = UserResponse.model_validate(user).model_dump()
+    data[field] = page["items"]
+    data["next_cursor"] = page["next_cursor"]
+    return data
 
 
 @router.post("/users/", response_model=UserResponse)
-def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_in.email).first()
+async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == user_in.email))
+    user = result.scalars().first()
     if user:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password(user_in.password)
     user = User(
         email=user_in.email,
         username=user_in.username,
@@ -35,68 +96,71 @@ def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
         role=user_in.role,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.get("/users/me/", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    return user
+async def read_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await get_user_or_404(db, user_id)
 
 
 @router.get("/users/username/{username}", response_model=UserResponse)
-def read_user_by_username(
+async def read_user_by_username(
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return user
 
 
 @router.put("/users/me/", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     user_data = user_in.dict(exclude_unset=True)
     if "password" in user_data:
-        user_data["hashed_password"] = get_password_hash(user_data.pop("password"))
+        password = user_data.pop("password")
+        user_data["hashed_password"] = await hash_password(password)
     for key, value in user_data.items():
         setattr(current_user, key, value)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await invalidate(f"users:{current_user.id}")
+    await invalidate_principal(current_user.id)
     return current_user
 
 
 @router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_me(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)
+async def delete_user_me(
+    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)
 ):
     """
     Usuário atual exclui sua própria conta.
     """
-    db.delete(current_user)
-    db.commit()
+    await delete_user_account(db, current_user)
+    await db.commit()
+    await invalidate(*account_tags(current_user.id))
+    await invalidate_principal(current_user.id)
     return None
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Administrador ou moderador exclui a conta de um usuário.
@@ -104,45 +168,57 @@ def delete_user(
     if current_user.role not in ("ADMIN", "MODERATOR"):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-    db.delete(user)
-    db.commit()
+    await delete_user_account(db, user)
+    await db.commit()
+    await invalidate(*account_tags(user.id))
+    await invalidate_principal(user.id)
     return None
 
 
 @router.get("/users/{user_id}/promotions/", response_model=UserWithPromotions)
-@cache(expire=60)
-async def read_user_promotions(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).options(joinedload(User.promotions)).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    user.promotions = sorted(
-        user.promotions, key=lambda promotion: promotion.created_at, reverse=True
-    )
-    return user
+@tagged_cache(settings.CACHE_EXPIRE_SECONDS, user_page_tags("promotions"))
+async def read_user_promotions(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
+):
+    user = await get_user_or_404(db, user_id)
+    query = select_schema(Promotion, PromotionSchema).where(Promotion.user_id == user_id)
+    result = await db.execute(paginate(query, Promotion, cursor, limit))
+    return user_with_page(user, "promotions", build_page(result.all(), limit))
 
 
 @router.get("/users/{user_id}/coupons/", response_model=UserWithCoupons)
-@cache(expire=60)
-async def read_user_coupons(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).options(joinedload(User.coupons)).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    user.coupons = sorted(user.coupons, key=lambda coupon: coupon.created_at, reverse=True)
-    return user
+@tagged_cache(settings.CACHE_EXPIRE_SECONDS, user_page_tags("coupons"))
+async def read_user_coupons(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
+):
+    user = await get_user_or_404(db, user_id)
+    query = select_schema(Coupon, CouponSchema).where(Coupon.user_id == user_id)
+    result = await db.execute(paginate(query, Coupon, cursor, limit))
+    return user_with_page(user, "coupons", build_page(result.all(), limit))
 
 
 @router.get("/users/{user_id}/comments/", response_model=UserWithComments)
-@cache(expire=60)
-async def read_user_comments(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).options(joinedload(User.comments)).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    user.comments = sorted(user.comments, key=lambda comment: comment.created_at, reverse=True)
-    return user
+@tagged_cache(settings.CACHE_EXPIRE_SECONDS, user_page_tags("comments"))
+async def read_user_comments(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_read_db),
+):
+    user = await get_user_or_404(db, user_id)
+    query = select(Comment).where(Comment.user_id == user_id)
+    result = await db.execute(paginate(query, Comment, cursor, limit))
+    page = build_page(result.scalars().all(), limit)
+    page["items"] = await load_comment_trees(db, page["items"])
+    return user_with_page(user, "comments", page)
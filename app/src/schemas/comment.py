@@ -24,12 +24,15 @@ class CommentInDBBase(CommentBase):
     created_at: datetime
     promotion_id: Optional[int] = None
     coupon_id: Optional[int] = None
+    like_count: int = 0
 
     model_config = {"from_attributes": True}
 
 
 class Comment(CommentInDBBase):
     replies: List["Comment"] = []  # Lista de respostas
+    reply_count: int = 0  # Total de respostas diretas, inclusive as não carregadas
+    replies_cursor: Optional[str] = None  # Cursor para carregar as demais respostas
 
     model_config = {"from_attributes": True}
 
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Optional
 
 from pydantic import AnyUrl, BaseModel
+from src.schemas.moderation import BulkIds
 
 
 class CouponStatus(str, Enum):
@@ -32,6 +33,10 @@ class CouponUpdate(BaseModel):
     store: Optional[str] = None
 
 
+class CouponBulkStatusUpdate(BulkIds):
+    status: CouponStatus
+
+
 class CouponInDBBase(CouponBase):
     id: int
     status: CouponStatus
@@ -39,6 +44,9 @@ class CouponInDBBase(CouponBase):
     store: Optional[str] = ""
     image: Optional[str] = None
     created_at: datetime
+    reaction_count: int = 0
+    comment_count: int = 0
+    duplicate_of_id: Optional[int] = None  # Oferta viva com o mesmo link (e código)
 
     model_config = {"from_attributes": True}
 
@@ -0,0 +1,24 @@
+# src/schemas/ingest.py
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class IngestError(BaseModel):
+    line: int  # Linha do arquivo (no CSV, contando o cabeçalho)
+    error: str
+
+
+class IngestMerge(BaseModel):
+    line: int
+    id: int  # Oferta existente na qual a linha foi mesclada
+
+
+class IngestReport(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    merged: int
+    errors: List[IngestError]  # Até 100 erros; `failed` tem o total
+    merges: List[IngestMerge]  # Até 100; `merged` tem o total
@@ -0,0 +1,26 @@
+# src/schemas/moderation.py
+
+from datetime import datetime
+from typing import Generic, List, Literal, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class BulkIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    id: int
+    result: Literal["updated", "deleted", "released", "not_found"]
+
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+
+class Claim(BaseModel, Generic[T]):
+    items: List[T] = []
+    claimed_until: Optional[datetime] = None  # Fim da reserva; renovável com novo claim
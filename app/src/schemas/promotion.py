@@ -5,6 +5,7 @@ from enum import Enum
 from typing import Optional
 
 from pydantic import AnyUrl, BaseModel
+from src.schemas.moderation import BulkIds
 
 
 class PromotionStatus(str, Enum):
@@ -34,6 +35,10 @@ class PromotionUpdate(BaseModel):
     store: Optional[str] = None
 
 
+class PromotionBulkStatusUpdate(BulkIds):
+    status: PromotionStatus
+
+
 class PromotionInDBBase(PromotionBase):
     id: int
     status: PromotionStatus
@@ -41,6 +46,9 @@ class PromotionInDBBase(PromotionBase):
     store: Optional[str] = ""
     image: Optional[str] = None
     created_at: datetime
+    reaction_count: int = 0
+    comment_count: int = 0
+    duplicate_of_id: Optional[int] = None  # Oferta viva com o mesmo link (e código)
 
     model_config = {"from_attributes": True}
 
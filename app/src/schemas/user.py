@@ -47,17 +47,20 @@ class UserResponse(UserInDBBase):
 
 class UserWithPromotions(UserInDBBase):
     promotions: List[Promotion] = []
+    next_cursor: Optional[str] = None
 
     model_config = {"from_attributes": True}
 
 
 class UserWithCoupons(UserInDBBase):
     coupons: List[Coupon] = []
+    next_cursor: Optional[str] = None
 
     model_config = {"from_attributes": True}
 
 
 class UserWithComments(UserInDBBase):
     comments: List[Comment] = []
+    next_cursor: Optional[str] = None
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,120 @@
+# src/services/comment_tree.py
+
+"""
+Carregamento de threads de comentários com uma CTE recursiva.
+
+Em vez de carregar as respostas nível a nível (ou uma consulta por resposta), uma única
+consulta percorre as raízes até `depth` níveis e, dentro da própria recursão, só desce
+pelas primeiras `replies_limit` respostas de cada comentário; a árvore é montada em
+memória. O número de linhas lidas depende de `depth` e `replies_limit`, não do tamanho da
+thread. Cada comentário informa `reply_count` e, quando há mais respostas do que as
+carregadas, `replies_cursor` para continuar em GET /comments/?parent_id=<id>&cursor=<cursor>.
+"""
+
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import func, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from src.core.pagination import encode_cursor
+from src.models.comment import Comment
+from src.schemas.comment import Comment as CommentSchema
+from src.schemas.comment import CommentInDBBase
+
+DEFAULT_DEPTH = 3
+DEFAULT_REPLIES_LIMIT = 5
+
+
+def comment_tree_query(
+    root_ids: List[int], depth: int, replies_limit: int, dialect: str = "postgresql"
+):
+    tree = (select(Comment.id, literal(0).label("depth")).where(Comment.id.in_(root_ids))).cte(
+        "comment_tree", recursive=True
+    )
+    reply = aliased(Comment)
+    # Primeiras respostas de cada comentário da árvore, pelo índice (parent_id, created_at, id)
+    first_replies = (
+        select(reply.id)
+        .where(reply.parent_id == tree.c.id)
+        .order_by(reply.created_at, reply.id)
+        .limit(replies_limit)
+    )
+    if dialect == "postgresql":
+        replies = first_replies.lateral("first_replies")
+        step = select(replies.c.id, tree.c.depth + 1).select_from(tree).join(replies, true())
+    else:
+        # Sem LATERAL (SQLite): o IN correlacionado é resolvido pela chave primária
+        child = aliased(Comment)
+        step = select(child.id, tree.c.depth + 1).join(tree, child.id.in_(first_replies))
+    tree = tree.union_all(step.where(tree.c.depth < depth))
+
+    # Um comentário pode ser alcançado por mais de uma raiz (ex.: comentários do usuário);
+    # `depth` > 0 indica que ele foi carregado como resposta do pai
+    nodes = select(tree.c.id, func.max(tree.c.depth).label("depth")).group_by(tree.c.id).subquery()
+    counted = aliased(Comment)
+    reply_count = (
+        select(func.count())
+        .where(counted.parent_id == Comment.id)
+        .correlate(Comment)
+        .scalar_subquery()
+        .label("reply_count")
+    )
+    return (
+        select(Comment, nodes.c.depth, reply_count)
+        .join(nodes, Comment.id == nodes.c.id)
+        .order_by(Comment.created_at, Comment.id)
+    )
+
+
+def comment_subtree_ids(root_ids: List[int]):
+    """CTE com os IDs das raízes e de todas as respostas abaixo delas."""
+    tree = select(Comment.id).where(Comment.id.in_(root_ids)).cte("comment_subtree", recursive=True)
+    child = aliased(Comment)
+    return tree.union_all(select(child.id).join(tree, child.parent_id == tree.c.id))
+
+
+async def load_comment_trees(
+    db: AsyncSession,
+    roots: List[Comment],
+    depth: int = DEFAULT_DEPTH,
+    replies_limit: int = DEFAULT_REPLIES_LIMIT,
+) -> List[CommentSchema]:
+    """Monta as threads das raízes informadas com uma única consulta."""
+    if not roots:
+        return []
+    query = comment_tree_query(
+        [root.id for root in roots], depth, replies_limit, db.bind.dialect.name
+    )
+    result = await db.execute(query)
+
+    reply_counts = {}
+    children = defaultdict(list)
+    for comment, level, reply_count in result.all():
+        reply_counts[comment.id] = reply_count
+        if level > 0:
+            children[comment.parent_id].append(comment)
+
+    def build(comment: Comment, level: int) -> CommentSchema:
+        replies = children[comment.id] if level < depth else []
+        reply_count = reply_counts.get(comment.id, 0)
+        replies_cursor = None
+        if replies and reply_count > len(replies):
+            replies_cursor = encode_cursor(replies[-1].created_at, replies[-1].id)
+        return CommentSchema(
+            **CommentInDBBase.model_validate(comment).model_dump(),
+            replies=[build(reply, level + 1) for reply in replies],
+            reply_count=reply_count,
+            replies_cursor=replies_cursor,
+        )
+
+    return [build(root, 0) for root in roots]
+
+
+async def load_comment_tree(
+    db: AsyncSession,
+    root: Comment,
+    depth: int = DEFAULT_DEPTH,
+    replies_limit: int = DEFAULT_REPLIES_LIMIT,
+) -> CommentSchema:
+    return (await load_comment_trees(db, [root], depth, replies_limit))[0]
@@ -0,0 +1,137 @@
+# src/services/counters.py
+
+"""
+Contadores desnormalizados de reações, comentários e curtidas.
+
+Os routers ajustam os contadores na mesma transação da escrita (UPDATE atômico
+`coluna = coluna + n`); `reconcile_counters` recalcula a partir das tabelas de origem.
+
+Uso pela linha de comando (a partir do diretório app/):
+
+    python -m src.services.counters
+"""
+
+import asyncio
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, or_, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.database import AsyncSessionLocal, engine
+from src.models.comment import Comment
+from src.models.comment_like import CommentLike
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion
+from src.models.reaction import Reaction
+from src.models.refresh_token import RefreshToken  # noqa: F401 (mapeamentos do CLI)
+from src.models.user import User  # noqa: F401
+
+
+async def increment(db: AsyncSession, model, object_id: int, field: str, amount: int = 1):
+    column = getattr(model, field)
+    await db.execute(
+        update(model)
+        .where(model.id == object_id)
+        .values({field: column + amount})
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def increment_target(db: AsyncSession, item, field: str, amount: int = 1):
+    """Ajusta o contador da promoção ou do cupom ao qual a reação/comentário pertence."""
+    if item.promotion_id:
+        await increment(db, Promotion, item.promotion_id, field, amount)
+    elif item.coupon_id:
+        await increment(db, Coupon, item.coupon_id, field, amount)
+
+
+def comment_tree_size(comment: Comment) -> int:
+    # Exige as respostas já carregadas (ver replies_loader)
+    return 1 + sum(comment_tree_size(reply) for reply in comment.replies)
+
+
+def _count(column, parent_id):
+    return select(func.count()).where(column == parent_id).scalar_subquery()
+
+
+async def reconcile_counters(
+    db: AsyncSession,
+    promotion_ids: Optional[Iterable[int]] = None,
+    coupon_ids: Optional[Iterable[int]] = None,
+    comment_ids: Optional[Iterable[int]] = None,
+) -> Dict[str, int]:
+    """
+    Recalcula os contadores em lote e retorna quantas linhas de cada tabela foram corrigidas.
+
+    Sem ids, todas as linhas são verificadas; só as que divergem são atualizadas.
+    """
+    targets = (
+        (
+            Promotion,
+            {
+                "reaction_count": _count(Reaction.promotion_id, Promotion.id),
+                "comment_count": _count(Comment.promotion_id, Promotion.id),
+            },
+            promotion_ids,
+        ),
+        (
+            Coupon,
+            {
+                "reaction_count": _count(Reaction.coupon_id, Coupon.id),
+                "comment_count": _count(Comment.coupon_id, Coupon.id),
+            },
+            coupon_ids,
+        ),
+        (Comment, {"like_count": _count(CommentLike.comment_id, Comment.id)}, comment_ids),
+    )
+    fixed = {}
+    for model, values, ids in targets:
+        fixed[model.__tablename__] = 0
+        statement = update(model).values(values)
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                continue
+            statement = statement.where(model.id.in_(ids))
+        statement = statement.where(
+            or_(*(getattr(model, field) != expected for field, expected in values.items()))
+        )
+        result = await db.execute(statement.execution_options(synchronize_session=False))
+        fixed[model.__tablename__] = result.rowcount
+    return fixed
+
+
+async def counter_targets_for_user(db: AsyncSession, user_id: int) -> Dict[str, list]:
+    """Registros cujos contadores mudam quando as reações/comentários/curtidas do usuário somem."""
+    promotion_ids = await db.scalars(
+        union(
+            select(Reaction.promotion_id).where(Reaction.user_id == user_id),
+            select(Comment.promotion_id).where(Comment.user_id == user_id),
+        )
+    )
+    coupon_ids = await db.scalars(
+        union(
+            select(Reaction.coupon_id).where(Reaction.user_id == user_id),
+            select(Comment.coupon_id).where(Comment.user_id == user_id),
+        )
+    )
+    comment_ids = await db.scalars(
+        select(CommentLike.comment_id).where(CommentLike.user_id == user_id)
+    )
+    return {
+        "promotion_ids": [id_ for id_ in promotion_ids if id_ is not None],
+        "coupon_ids": [id_ for id_ in coupon_ids if id_ is not None],
+        "comment_ids": list(comment_ids),
+    }
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        fixed = await reconcile_counters(db)
+        await db.commit()
+    await engine.dispose()
+    for table, rows in fixed.items():
+        print(f"{table}: {rows} registro(s) corrigido(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+# src/services/duplicates.py
+
+"""
+Detecção de ofertas repetidas pelo link canônico (src/core/links.py).
+
+Uma oferta é repetida quando já existe outra PENDING ou APPROVED com a mesma
+`canonical_key` (e, nos cupons, o mesmo código: a mesma página pode ter vários cupons).
+A busca usa o índice da chave, então custa o mesmo independente do tamanho da tabela.
+
+- POST unitário: a oferta é criada com `duplicate_of_id` apontando para a existente, para
+  o moderador negar ou aprovar sabendo da repetição.
+- Ingestão em lote (src/services/ingest.py): a linha repetida não vira uma nova oferta; o
+  preço da promoção existente é atualizado quando muda.
+
+Preenchimento de `canonical_key` nas linhas antigas (a partir do diretório app/):
+
+    python -m src.services.duplicates
+"""
+
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from src.core.database import AsyncSessionLocal, engine
+from src.core.links import canonical_key
+from src.models.comment import Comment  # noqa: F401 (mapeamentos do CLI)
+from src.models.comment_like import CommentLike  # noqa: F401
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion
+from src.models.reaction import Reaction  # noqa: F401
+from src.models.refresh_token import RefreshToken  # noqa: F401
+from src.models.user import User  # noqa: F401
+
+LIVE_STATUSES = ("PENDING", "APPROVED")
+
+# Colunas que identificam a mesma oferta em cada tabela
+MATCH_COLUMNS = {
+    Promotion: ("canonical_key",),
+    Coupon: ("canonical_key", "code"),
+}
+
+
+def match_key(model, data: dict) -> Tuple:
+    return tuple(data[column] for column in MATCH_COLUMNS[model])
+
+
+async def find_live_duplicates(
+    db: AsyncSession, model, items: Iterable[dict]
+) -> Dict[Tuple, object]:
+    """
+    Ofertas vivas com a mesma chave de cada item (a mais antiga, se houver várias).
+
+    Uma consulta para o lote inteiro; retorna {match_key: linha com id, user_id, status,
+    price/code}.
+    """
+    keys = {item["canonical_key"] for item in items}
+    if not keys:
+        return {}
+    columns = [model.id, model.user_id, model.status]
+    columns += [getattr(model, column) for column in MATCH_COLUMNS[model]]
+    if model is Promotion:
+        columns.append(Promotion.price)
+    rows = await db.execute(
+        select(*columns)
+        .where(model.canonical_key.in_(keys), model.status.in_(LIVE_STATUSES))
+        .order_by(model.id)
+    )
+    found = {}
+    for row in rows:
+        found.setdefault(match_key(model, row._mapping), row)
+    return found
+
+
+async def find_live_duplicate(db: AsyncSession, model, data: dict) -> Optional[int]:
+    """ID da oferta viva da qual `data` (já com `canonical_key`) seria repetida."""
+    row = (await find_live_duplicates(db, model, [data])).get(match_key(model, data))
+    return row.id if row else None
+
+
+async def mark_new_item(db: AsyncSession, model, data: dict) -> dict:
+    """Completa os dados de uma oferta nova com `canonical_key` e `duplicate_of_id`."""
+    data["canonical_key"] = canonical_key(data["link"])
+    data["duplicate_of_id"] = await find_live_duplicate(db, model, data)
+    return data
+
+
+async def backfill_canonical_keys(db: AsyncSession, model, batch_size: int = 1000) -> int:
+    """Preenche `canonical_key` das linhas antigas em lotes (com commit a cada lote)."""
+    filled = 0
+    last_id = 0
+    while True:
+        rows = (
+            await db.execute(
+                select(model.id, model.link)
+                .where(model.id > last_id, model.canonical_key.is_(None))
+                .order_by(model.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not rows:
+            return filled
+        await db.execute(
+            update(model),
+            [{"id": row.id, "canonical_key": canonical_key(row.link)} for row in rows],
+        )
+        await db.commit()
+        filled += len(rows)
+        last_id = rows[-1].id
+
+
+async def flag_pending_duplicates(db: AsyncSession, model) -> int:
+    """Marca `duplicate_of_id` nas ofertas pendentes repetidas de uma oferta viva mais antiga."""
+    original = aliased(model)
+    conditions = [original.id < model.id, original.status.in_(LIVE_STATUSES)]
+    conditions += [
+        getattr(original, column) == getattr(model, column) for column in MATCH_COLUMNS[model]
+    ]
+    first = select(original.id).where(*conditions).order_by(original.id).limit(1)
+    result = await db.execute(
+        update(model)
+        .where(
+            model.status == "PENDING",
+            model.duplicate_of_id.is_(None),
+            model.canonical_key.is_not(None),
+            first.exists(),
+        )
+        .values(duplicate_of_id=first.scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        for model in (Promotion, Coupon):
+            filled = await backfill_canonical_keys(db, model)
+            flagged = await flag_pending_duplicates(db, model)
+            print(f"{model.__tablename__}: {filled} chave(s) preenchida(s), {flagged} repetida(s)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
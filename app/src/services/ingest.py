@@ -0,0 +1,288 @@
+# src/services/ingest.py
+
+"""
+Ingestão em lote de promoções e cupons a partir de NDJSON ou CSV.
+
+O arquivo é lido linha a linha e processado em lotes de `chunk_size` registros: cada
+lote é validado com os schemas de criação (PromotionCreate/CouponCreate) e gravado com um
+INSERT de várias linhas e um commit, então a memória usada não depende do tamanho do
+arquivo. Registros inválidos entram no relatório com o número da linha e não interrompem
+o lote; se o banco recusar um lote, as linhas dele são regravadas uma a uma (em
+savepoints) para isolar as que falharam. Os itens entram como PENDING, como no POST
+unitário.
+
+Linhas repetidas de uma oferta viva (mesmo link canônico, ver src/services/duplicates.py)
+ou de outra linha do mesmo lote não viram ofertas novas: entram em `merges` com o ID da
+oferta existente, e o preço da promoção existente é atualizado quando muda.
+
+Uso pela linha de comando (a partir do diretório app/):
+
+    python -m src.services.ingest promotions feed.ndjson --user-id 1
+    python -m src.services.ingest coupons cupons.csv --user-id 1 --format csv
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+from src.core.cache import entity_tags
+from src.core.database import AsyncSessionLocal, engine
+from src.core.links import canonical_key
+from src.models.comment import Comment  # noqa: F401 (mapeamentos do CLI)
+from src.models.comment_like import CommentLike  # noqa: F401
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion
+from src.models.reaction import Reaction  # noqa: F401
+from src.models.refresh_token import RefreshToken  # noqa: F401
+from src.models.user import User  # noqa: F401
+from src.schemas.coupon import CouponCreate
+from src.schemas.promotion import PromotionCreate
+from src.services.duplicates import find_live_duplicates, match_key
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+# tipo -> (modelo, schema de criação)
+KINDS = {
+    "promotions": (Promotion, PromotionCreate),
+    "coupons": (Coupon, CouponCreate),
+}
+
+# Erros e mesclagens detalhados no relatório; os demais só entram na contagem
+MAX_REPORTED_ERRORS = 100
+# Corpo da requisição guardado em memória até esse tamanho; acima disso vai para disco
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+class IngestReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.merged = 0
+        self.errors: List[dict] = []
+        self.merges: List[dict] = []
+        # Tags do cache das ofertas existentes alteradas pelas mesclagens
+        self.tags: Set[str] = set()
+
+    def add_error(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def add_merge(self, line: int, item_id: int):
+        self.merged += 1
+        if len(self.merges) < MAX_REPORTED_ERRORS:
+            self.merges.append({"line": line, "id": item_id})
+
+    def as_dict(self):
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "merged": self.merged,
+            "errors": self.errors,
+            "merges": self.merges,
+        }
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """(número da linha, dict) de cada registro; JSON inválido vira (linha, ValueError)."""
+    if fmt == CSV:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Células vazias contam como campo ausente (ex.: comment opcional)
+            yield reader.line_num, {key: value for key, value in row.items() if value != ""}
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            yield line_number, error
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'registro'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def chunked(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(schema, chunk: list, user_id: int, report: IngestReport) -> List[tuple]:
+    rows = []
+    for line_number, record in chunk:
+        report.received += 1
+        if isinstance(record, Exception):
+            report.add_error(line_number, f"JSON inválido: {record}")
+            continue
+        try:
+            item: BaseModel = schema.model_validate(record)
+        except ValidationError as error:
+            report.add_error(line_number, format_validation_error(error))
+            continue
+        data = item.model_dump()
+        data["link"] = str(data["link"])  # Converter o link para string
+        data["canonical_key"] = canonical_key(data["link"])
+        rows.append((line_number, {**data, "user_id": user_id}))
+    return rows
+
+
+async def merge_duplicates(
+    db: AsyncSession, model, kind: str, rows: List[tuple], report: IngestReport
+) -> Tuple[List[tuple], List[tuple], dict]:
+    """
+    Separa as linhas repetidas de ofertas vivas e mescla-as nas existentes.
+
+    Retorna (linhas novas, linhas repetidas de outra linha do mesmo lote, preços novos
+    das promoções existentes por ID).
+    """
+    existing = await find_live_duplicates(db, model, [data for _, data in rows])
+    new_rows, repeated, seen, prices = [], [], set(), {}
+    for line_number, data in rows:
+        key = match_key(model, data)
+        item = existing.get(key)
+        if item is not None:
+            report.add_merge(line_number, item.id)
+            if model is Promotion and data["price"] != item.price:
+                prices[item.id] = data["price"]  # Vale o preço da última linha
+                report.tags.update(entity_tags(kind, item))
+        elif key in seen:
+            repeated.append((line_number, key))
+        else:
+            seen.add(key)
+            new_rows.append((line_number, data))
+    return new_rows, repeated, prices
+
+
+async def write_chunk(db: AsyncSession, model, kind: str, rows: List[tuple], report: IngestReport):
+    if not rows:
+        return
+    rows, repeated, prices = await merge_duplicates(db, model, kind, rows, report)
+    await insert_rows(db, model, rows, report)
+    if prices:
+        # Depois do INSERT, para um rollback do lote não desfazer a atualização
+        await db.execute(update(model), [{"id": id_, "price": p} for id_, p in prices.items()])
+        await db.commit()
+    if repeated:
+        # A oferta nova do lote (se a linha dela foi gravada) absorve as repetidas
+        inserted = await find_live_duplicates(
+            db, model, [{"canonical_key": key[0]} for _, key in repeated]
+        )
+        for line_number, key in repeated:
+            if key in inserted:
+                report.add_merge(line_number, inserted[key].id)
+            else:
+                report.add_error(line_number, "Repetida de uma linha que não foi gravada.")
+
+
+async def insert_rows(db: AsyncSession, model, rows: List[tuple], report: IngestReport):
+    try:
+        if rows:
+            await db.execute(insert(model), [data for _, data in rows])
+        await db.commit()
+        report.inserted += len(rows)
+        return
+    except DBAPIError:
+        await db.rollback()
+    # O lote falhou no banco: gravar linha a linha para reportar só as problemáticas
+    for line_number, data in rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(model), [data])
+            report.inserted += 1
+        except DBAPIError as error:
+            # Mensagem do driver, sem o nome da classe que o SQLAlchemy acrescenta
+            report.add_error(line_number, str(error.orig.__cause__ or error.orig))
+    await db.commit()
+
+
+async def ingest(
+    db: AsyncSession,
+    kind: str,
+    stream: IO[str],
+    user_id: int,
+    fmt: str = NDJSON,
+    chunk_size: int = 1000,
+) -> IngestReport:
+    model, schema = KINDS[kind]
+    report = IngestReport()
+    for chunk in chunked(iter_records(stream, fmt), chunk_size):
+        rows = validate_chunk(schema, chunk, user_id, report)
+        await write_chunk(db, model, kind, rows, report)
+        await asyncio.sleep(0)  # Não monopolizar o event loop entre os lotes
+    return report
+
+
+def detect_format(content_type: Optional[str], filename: str = "") -> str:
+    if (content_type and "csv" in content_type) or filename.endswith(".csv"):
+        return CSV
+    return NDJSON
+
+
+async def ingest_request(
+    db: AsyncSession, kind: str, request: Request, user_id: int, fmt: Optional[str] = None
+) -> IngestReport:
+    """
+    Ingestão do corpo da requisição (NDJSON ou CSV).
+
+    O corpo é copiado em blocos para um arquivo temporário e lido linha a linha, sem
+    montar o arquivo inteiro em memória.
+    """
+    fmt = fmt or detect_format(request.headers.get("content-type"))
+    if fmt not in (NDJSON, CSV):
+        raise HTTPException(status_code=400, detail="Formato deve ser ndjson ou csv.")
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        async for block in request.stream():
+            spool.write(block)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            return await ingest(db, kind, stream, user_id, fmt, settings.INGEST_CHUNK_SIZE)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="O arquivo deve estar em UTF-8.")
+        finally:
+            stream.detach()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ingestão em lote de promoções e cupons")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--format", choices=[NDJSON, CSV])
+    parser.add_argument("--chunk-size", type=int, default=settings.INGEST_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(None, args.path)
+    with io.open(args.path, encoding="utf-8", newline="") as stream:
+        async with AsyncSessionLocal() as db:
+            report = await ingest(db, args.kind, stream, args.user_id, fmt, args.chunk_size)
+    await engine.dispose()
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+# src/services/moderation.py
+
+"""
+Moderação em lote de promoções, cupons e comentários.
+
+Cada operação faz um SELECT dos itens encontrados (para o resultado por ID e as tags do
+cache) e um UPDATE/DELETE por tabela com `id IN (...)`, independente do número de IDs.
+Os routers fazem o commit e chamam `invalidate` uma única vez com as tags retornadas.
+
+Fila de moderação: `claim_items` reserva os próximos itens pendentes (mais antigos
+primeiro) para um moderador por `lease_seconds`. O SELECT usa FOR UPDATE SKIP LOCKED, então
+moderadores pedindo itens ao mesmo tempo recebem lotes diferentes sem esperar uns pelos
+outros; uma reserva vencida volta para a fila. O moderador conclui os itens com
+`bulk_update_status(..., claimed_by=<id>)` ou os devolve com `release_items`.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import entity_tags
+from src.core.config import settings
+from src.models.comment import Comment
+from src.models.comment_like import CommentLike
+from src.models.reaction import Reaction
+from src.services.comment_tree import comment_subtree_ids
+from src.services.counters import reconcile_counters
+
+UPDATED = "updated"
+DELETED = "deleted"
+RELEASED = "released"
+NOT_FOUND = "not_found"
+
+
+def unique_ids(ids: List[int]) -> List[int]:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.MODERATION_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {settings.MODERATION_BULK_MAX_IDS} IDs por requisição.",
+        )
+    return ids
+
+
+def outcomes(ids: List[int], found, outcome: str) -> List[dict]:
+    return [{"id": id_, "result": outcome if id_ in found else NOT_FOUND} for id_ in ids]
+
+
+async def comment_authors(db: AsyncSession, *conditions) -> List[str]:
+    """Tags das páginas de comentários dos autores dos comentários que casam com `conditions`."""
+    user_ids = await db.scalars(select(Comment.user_id).where(*conditions).distinct())
+    return [f"comments:user:{user_id}" for user_id in user_ids]
+
+
+async def bulk_update_status(
+    db: AsyncSession, model, kind: str, ids: List[int], status, claimed_by: Optional[int] = None
+) -> Tuple[List[dict], List[str]]:
+    """
+    Muda o status dos itens e encerra as reservas deles.
+
+    Com `claimed_by`, só os itens reservados por esse moderador são alterados. Retorna
+    (resultado por ID, tags a invalidar).
+    """
+    query = select(model.id, model.user_id, model.status).where(model.id.in_(ids))
+    if claimed_by is not None:
+        query = query.where(model.claimed_by == claimed_by)
+    rows = (await db.execute(query)).all()
+    found = {row.id for row in rows}
+    tags = []
+    for row in rows:
+        tags += entity_tags(kind, row)
+    if found:
+        await db.execute(
+            update(model)
+            .where(model.id.in_(found))
+            .values(status=status, claimed_by=None, claimed_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        tags.append(f"{kind}:status:{getattr(status, 'value', status)}")
+    return outcomes(ids, found, UPDATED), tags
+
+
+async def bulk_delete_items(
+    db: AsyncSession, model, kind: str, foreign_key: str, ids: List[int]
+) -> Tuple[List[dict], List[str]]:
+    """
+    Remove promoções ou cupons com as reações e os comentários (e curtidas) deles.
+
+    `foreign_key` é a coluna que aponta para o item em reactions/comments.
+    """
+    rows = (
+        await db.execute(select(model.id, model.user_id, model.status).where(model.id.in_(ids)))
+    ).all()
+    found = {row.id for row in rows}
+    if not found:
+        return outcomes(ids, found, DELETED), []
+    tags = []
+    for row in rows:
+        tags += entity_tags(kind, row)
+
+    comment_fk = getattr(Comment, foreign_key)
+    tags += await comment_authors(db, comment_fk.in_(found))
+    comment_ids = select(Comment.id).where(comment_fk.in_(found))
+    for statement in (
+        delete(CommentLike).where(CommentLike.comment_id.in_(comment_ids)),
+        delete(Comment).where(comment_fk.in_(found)),
+        delete(Reaction).where(getattr(Reaction, foreign_key).in_(found)),
+        delete(model).where(model.id.in_(found)),
+    ):
+        await db.execute(statement.execution_options(synchronize_session=False))
+    return outcomes(ids, found, DELETED), tags
+
+
+async def bulk_delete_comments(db: AsyncSession, ids: List[int]) -> Tuple[List[dict], List[str]]:
+    """Remove os comentários com todas as respostas e ajusta os contadores dos alvos."""
+    subtree = comment_subtree_ids(ids)
+    in_subtree = Comment.id.in_(select(subtree.c.id))
+    rows = (
+        await db.execute(
+            select(
+                Comment.id,
+                Comment.user_id,
+                Comment.parent_id,
+                Comment.promotion_id,
+                Comment.coupon_id,
+            ).where(in_subtree)
+        )
+    ).all()
+    if not rows:
+        return outcomes(ids, set(), DELETED), []
+    deleted = {row.id for row in rows}
+    user_ids = {row.user_id for row in rows}
+    # A página de comentários do autor do comentário pai mostra as respostas
+    parent_ids = {row.parent_id for row in rows if row.parent_id and row.parent_id not in deleted}
+    if parent_ids:
+        user_ids.update(await db.scalars(select(Comment.user_id).where(Comment.id.in_(parent_ids))))
+
+    for statement in (
+        delete(CommentLike).where(CommentLike.comment_id.in_(select(subtree.c.id))),
+        delete(Comment).where(in_subtree),
+    ):
+        await db.execute(statement.execution_options(synchronize_session=False))
+    await reconcile_counters(
+        db,
+        promotion_ids={row.promotion_id for row in rows if row.promotion_id},
+        coupon_ids={row.coupon_id for row in rows if row.coupon_id},
+        comment_ids=[],
+    )
+    return outcomes(ids, deleted, DELETED), [f"comments:user:{user_id}" for user_id in user_ids]
+
+
+async def claim_items(
+    db: AsyncSession, model, user_id: int, limit: int, lease_seconds: int
+) -> Tuple[list, datetime]:
+    """Reserva até `limit` itens pendentes para o moderador; retorna (itens, fim da reserva)."""
+    now = datetime.utcnow()
+    claimed_until = now + timedelta(seconds=lease_seconds)
+    # Percorre o índice (status, created_at, id); itens já reservados pelo próprio
+    # moderador entram de novo (e têm a reserva renovada) para o pedido ser idempotente
+    ids = list(
+        await db.scalars(
+            select(model.id)
+            .where(
+                model.status == "PENDING",
+                or_(
+                    model.claimed_until.is_(None),
+                    model.claimed_until < now,
+                    model.claimed_by == user_id,
+                ),
+            )
+            .order_by(model.created_at, model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    )
+    if not ids:
+        return [], claimed_until
+    items = await db.scalars(
+        update(model)
+        .where(model.id.in_(ids))
+        .values(claimed_by=user_id, claimed_until=claimed_until)
+        .returning(model),
+        execution_options={"synchronize_session": False},
+    )
+    return sorted(items, key=lambda item: (item.created_at, item.id)), claimed_until
+
+
+async def release_items(db: AsyncSession, model, user_id: int, ids: List[int]) -> List[dict]:
+    """Devolve à fila os itens reservados pelo moderador."""
+    released = await db.scalars(
+        update(model)
+        .where(model.id.in_(ids), model.claimed_by == user_id)
+        .values(claimed_by=None, claimed_until=None)
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    )
+    return outcomes(ids, set(released), RELEASED)
@@ -0,0 +1,101 @@
+# src/services/token_sweeper.py
+
+"""
+Remoção periódica dos refresh tokens expirados.
+
+Cada varredura apaga em lotes de `batch_size` linhas (uma transação curta por lote, usando
+o índice de `expires_at`) até não sobrar token expirado. Rodar em vários workers é seguro:
+os DELETEs são idempotentes.
+
+Uso pela linha de comando (a partir do diretório app/):
+
+    python -m src.services.token_sweeper
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal, engine
+from src.models.comment import Comment  # noqa: F401 (mapeamentos do CLI)
+from src.models.comment_like import CommentLike  # noqa: F401
+from src.models.coupon import Coupon  # noqa: F401
+from src.models.promotion import Promotion  # noqa: F401
+from src.models.reaction import Reaction  # noqa: F401
+from src.models.refresh_token import RefreshToken
+from src.models.user import User  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenSweeper:
+    def __init__(
+        self, session_factory=AsyncSessionLocal, interval: float = 3600, batch_size: int = 1000
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep_batch(self) -> int:
+        expired = (
+            select(RefreshToken.id)
+            .where(RefreshToken.expires_at <= datetime.utcnow())
+            .limit(self.batch_size)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(expired.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def sweep(self) -> int:
+        """Apaga todos os tokens expirados; retorna quantos foram removidos."""
+        total = 0
+        while True:
+            removed = await self.sweep_batch()
+            total += removed
+            if removed < self.batch_size:
+                return total
+            await asyncio.sleep(0)  # Não monopolizar o event loop entre os lotes
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info("%s refresh tokens expirados removidos", removed)
+            except Exception:
+                logger.exception("Falha ao remover refresh tokens expirados")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+sweeper: Optional[RefreshTokenSweeper] = None
+
+
+async def main():
+    removed = await RefreshTokenSweeper(batch_size=settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE).sweep()
+    await engine.dispose()
+    print(f"{removed} refresh token(s) expirado(s) removido(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,355 @@
+# src/services/write_behind.py
+
+"""
+Write-behind opcional para reações e curtidas de comentários (WRITE_BEHIND_MODE).
+
+Em picos de acesso, os routers não gravam no banco: registram a intenção (curtir ou
+descurtir) em um buffer e respondem na hora. Um flusher em segundo plano aplica as
+intenções em lote a cada WRITE_BEHIND_FLUSH_INTERVAL_MS, com INSERT ... ON CONFLICT DO
+NOTHING / DELETE em massa e os contadores ajustados na mesma transação.
+
+- As intenções são indexadas por (alvo, id do alvo, usuário), que funciona como chave de
+  idempotência: cliques repetidos não geram nada novo e curtir + descurtir se anulam.
+- As leituras (check/count) consultam o buffer antes do banco, para que o botão de curtir
+  reflita as intenções ainda não gravadas.
+- "memory" mantém o buffer no processo (um worker); "redis" compartilha o buffer entre
+  workers usando o mesmo Redis do cache.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.core.database import AsyncSessionLocal
+from src.models.comment import Comment
+from src.models.comment_like import CommentLike
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion
+from src.models.reaction import Reaction
+from src.models.user import User
+from src.services.counters import increment
+
+logger = logging.getLogger(__name__)
+
+ADD = "add"
+REMOVE = "remove"
+
+# alvo -> (tabela de intenções, coluna do alvo, modelo do alvo, contador)
+TARGETS = {
+    "promotion": (Reaction, "promotion_id", Promotion, "reaction_count"),
+    "coupon": (Reaction, "coupon_id", Coupon, "reaction_count"),
+    "comment": (CommentLike, "comment_id", Comment, "like_count"),
+}
+
+# Linhas por INSERT/DELETE (mantém o número de parâmetros abaixo do limite do asyncpg)
+CHUNK_SIZE = 1000
+
+
+def intent_key(target: str, target_id: int, user_id: int) -> str:
+    return f"{target}:{target_id}:{user_id}"
+
+
+def parse_intent_key(key: str):
+    target, target_id, user_id = key.split(":")
+    return target, int(target_id), int(user_id)
+
+
+def _delta(action: str) -> int:
+    return 1 if action == ADD else -1
+
+
+class MemoryIntentStore:
+    """Buffer no próprio processo; as operações não têm await, logo são atômicas no loop."""
+
+    def __init__(self):
+        self.pending: Dict[str, str] = {}
+        self.pending_deltas: Counter = Counter()
+        self.flushing: Dict[str, str] = {}
+        self.flushing_deltas: Counter = Counter()
+
+    async def push(self, key: str, action: str, counter_key: str) -> bool:
+        current = self.pending.get(key)
+        if current == action:
+            return False
+        if current is None:
+            self.pending[key] = action
+        else:
+            # Intenção oposta ainda não gravada: as duas se anulam
+            del self.pending[key]
+        self.pending_deltas[counter_key] += _delta(action)
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.pending.get(key) or self.flushing.get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {key: await self.get(key) for key in keys}
+
+    async def deltas(self, counter_keys: Iterable[str]) -> Dict[str, int]:
+        return {key: self.pending_deltas[key] + self.flushing_deltas[key] for key in counter_keys}
+
+    async def take_batch(self) -> Dict[str, str]:
+        # Um lote que falhou continua em "flushing" e é reaplicado antes do próximo
+        if not self.flushing:
+            self.flushing, self.pending = self.pending, {}
+            self.flushing_deltas, self.pending_deltas = self.pending_deltas, Counter()
+        return dict(self.flushing)
+
+    async def complete_batch(self):
+        self.flushing = {}
+        self.flushing_deltas = Counter()
+
+    async def acquire(self) -> bool:
+        return True
+
+    async def release(self):
+        pass
+
+
+class RedisIntentStore:
+    """Buffer compartilhado entre workers; cada operação composta é um script Lua."""
+
+    PUSH = """
+    local current = redis.call('HGET', KEYS[1], ARGV[1])
+    if current == ARGV[2] then return 0 end
+    if current then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    else
+        redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    end
+    redis.call('HINCRBY', KEYS[2], ARGV[3], ARGV[4])
+    return 1
+    """
+
+    TAKE = """
+    if redis.call('EXISTS', KEYS[3]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+        redis.call('RENAME', KEYS[1], KEYS[3])
+        if redis.call('EXISTS', KEYS[2]) == 1 then
+            redis.call('RENAME', KEYS[2], KEYS[4])
+        end
+    end
+    return redis.call('HGETALL', KEYS[3])
+    """
+
+    RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+    return 0
+    """
+
+    def __init__(self, redis_client, prefix: str = "write-behind:", lock_ttl_ms: int = 30000):
+        self.redis = redis_client
+        self.pending = f"{prefix}pending"
+        self.pending_deltas = f"{prefix}pending-deltas"
+        self.flushing = f"{prefix}flushing"
+        self.flushing_deltas = f"{prefix}flushing-deltas"
+        self.lock = f"{prefix}lock"
+        self.lock_ttl_ms = lock_ttl_ms
+        self.token = uuid.uuid4().hex
+        self._push = redis_client.register_script(self.PUSH)
+        self._take = redis_client.register_script(self.TAKE)
+        self._release = redis_client.register_script(self.RELEASE)
+
+    async def push(self, key: str, action: str, counter_key: str) -> bool:
+        keys = [self.pending, self.pending_deltas]
+        return bool(await self._push(keys=keys, args=[key, action, counter_key, _delta(action)]))
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_many([key]))[key]
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        pending = await self.redis.hmget(self.pending, keys)
+        flushing = await self.redis.hmget(self.flushing, keys)
+        return {key: p or f for key, p, f in zip(keys, pending, flushing)}
+
+    async def deltas(self, counter_keys: Iterable[str]) -> Dict[str, int]:
+        counter_keys = list(counter_keys)
+        if not counter_keys:
+            return {}
+        pending = await self.redis.hmget(self.pending_deltas, counter_keys)
+        flushing = await self.redis.hmget(self.flushing_deltas, counter_keys)
+        return {
+            key: int(p or 0) + int(f or 0) for key, p, f in zip(counter_keys, pending, flushing)
+        }
+
+    async def take_batch(self) -> Dict[str, str]:
+        keys = [self.pending, self.pending_deltas, self.flushing, self.flushing_deltas]
+        values = await self._take(keys=keys)
+        if isinstance(values, dict):
+            return values
+        return dict(zip(values[::2], values[1::2]))
+
+    async def complete_batch(self):
+        await self.redis.delete(self.flushing, self.flushing_deltas)
+
+    async def acquire(self) -> bool:
+        # Só um worker aplica lotes por vez
+        return bool(await self.redis.set(self.lock, self.token, nx=True, px=self.lock_ttl_ms))
+
+    async def release(self):
+        await self._release(keys=[self.lock], args=[self.token])
+
+
+class WriteBehindBuffer:
+    def __init__(self, store, session_factory=AsyncSessionLocal, interval: float = 0.25):
+        self.store = store
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, target: str, target_id: int, user_id: int, action: str) -> bool:
+        """Registra a intenção; retorna False se ela repete uma intenção já pendente."""
+        return await self.store.push(
+            intent_key(target, target_id, user_id), action, f"{target}:{target_id}"
+        )
+
+    async def pending_state(self, target: str, target_id: int, user_id: int) -> Optional[bool]:
+        """True/False se há intenção pendente (curtir/descurtir); None se o banco decide."""
+        action = await self.store.get(intent_key(target, target_id, user_id))
+        return None if action is None else action == ADD
+
+    async def pending_states(self, target: str, target_ids: Iterable[int], user_id: int):
+        target_ids = list(target_ids)
+        actions = await self.store.get_many(
+            intent_key(target, target_id, user_id) for target_id in target_ids
+        )
+        states = {}
+        for target_id in target_ids:
+            action = actions[intent_key(target, target_id, user_id)]
+            if action is not None:
+                states[target_id] = action == ADD
+        return states
+
+    async def count_deltas(self, target: str, target_ids: Iterable[int]) -> Dict[int, int]:
+        target_ids = list(target_ids)
+        deltas = await self.store.deltas(f"{target}:{target_id}" for target_id in target_ids)
+        return {target_id: deltas[f"{target}:{target_id}"] for target_id in target_ids}
+
+    async def flush(self) -> int:
+        """Aplica um lote de intenções; retorna quantas intenções foram processadas."""
+        if not await self.store.acquire():
+            return 0
+        try:
+            batch = await self.store.take_batch()
+            if batch:
+                async with self.session_factory() as db:
+                    await apply_intents(db, batch)
+                    await db.commit()
+                await self.store.complete_batch()
+            return len(batch)
+        finally:
+            await self.store.release()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Falha ao gravar o lote do write-behind; nova tentativa em breve")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Gravar o que ficou pendente antes de encerrar
+        await self.flush()
+
+
+def _insert(db, model):
+    if db.bind.dialect.name == "postgresql":
+        return postgresql_insert(model)
+    return sqlite_insert(model)
+
+
+def _chunks(items: list):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start : start + CHUNK_SIZE]
+
+
+async def apply_intents(db, batch: Dict[str, str]):
+    grouped = {}
+    for key, action in batch.items():
+        target, target_id, user_id = parse_intent_key(key)
+        grouped.setdefault((target, action), []).append((user_id, target_id))
+
+    for (target, action), pairs in sorted(grouped.items()):
+        model, column_name, target_model, counter = TARGETS[target]
+        column = getattr(model, column_name)
+        changed = Counter()
+        if action == ADD:
+            # Ignorar intenções cujo alvo ou usuário foi removido antes da gravação
+            target_ids = {target_id for _, target_id in pairs}
+            user_ids = {user_id for user_id, _ in pairs}
+            existing_targets = set(
+                await db.scalars(select(target_model.id).where(target_model.id.in_(target_ids)))
+            )
+            existing_users = set(await db.scalars(select(User.id).where(User.id.in_(user_ids))))
+            rows = [
+                {"user_id": user_id, column_name: target_id}
+                for user_id, target_id in pairs
+                if target_id in existing_targets and user_id in existing_users
+            ]
+            if model is Reaction:
+                now = datetime.utcnow()
+                for row in rows:
+                    row["created_at"] = now
+            for chunk in _chunks(rows):
+                result = await db.execute(
+                    _insert(db, model).values(chunk).on_conflict_do_nothing().returning(column)
+                )
+                changed.update(result.scalars().all())
+        else:
+            for chunk in _chunks(pairs):
+                result = await db.execute(
+                    delete(model)
+                    .where(tuple_(model.user_id, column).in_(chunk))
+                    .returning(column)
+                    .execution_options(synchronize_session=False)
+                )
+                changed.update(result.scalars().all())
+
+        # Contadores a partir das linhas realmente inseridas/removidas (RETURNING)
+        sign = _delta(action)
+        for target_id in sorted(changed):
+            await increment(db, target_model, target_id, counter, sign * changed[target_id])
+
+
+# Instância ativa (configurada na inicialização da aplicação quando WRITE_BEHIND_MODE != "off")
+buffer: Optional[WriteBehindBuffer] = None
+
+
+async def effective_state(target: str, target_id: int, user_id: int, stored: bool) -> bool:
+    """Estado visto pelo usuário: a intenção pendente, se houver, senão o que está no banco."""
+    if buffer is None:
+        return stored
+    pending = await buffer.pending_state(target, target_id, user_id)
+    return stored if pending is None else pending
+
+
+async def overlay_states(target: str, user_id: int, states: Dict[int, bool]) -> Dict[int, bool]:
+    if buffer is None:
+        return states
+    return {**states, **await buffer.pending_states(target, states.keys(), user_id)}
+
+
+async def overlay_counts(target: str, counts: Dict[int, int]) -> Dict[int, int]:
+    if buffer is None:
+        return counts
+    deltas = await buffer.count_deltas(target, counts.keys())
+    return {target_id: max(count + deltas[target_id], 0) for target_id, count in counts.items()}
@@ -1,21 +1,41 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from src.core.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from src.core.config import settings
+from src.core.database import Base, get_async_database_url, get_db, get_read_db
+from src.core.security import get_password_hash
 from src.main import app
+from src.models.user import User
+
+# Rota que passar do orçamento de queries (N+1) falha o teste (ver src/core/query_stats.py)
+settings.QUERY_BUDGET_STRICT = True
 
-# Configuração do banco de dados de teste em memória
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Configuração do banco de dados de teste em arquivo temporário, compartilhado entre a
+# sessão síncrona dos fixtures e a sessão assíncrona (aiosqlite) usada pela aplicação
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{_db_path}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 # Fixture para criar o banco de dados de teste
 @pytest.fixture(scope="function")
@@ -35,14 +55,33 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     # Sobrescrever a dependência get_db para usar a sessão de teste
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
     # Limpar a sobrescrita após os testes
     app.dependency_overrides.clear()
+
+
+# Helpers compartilhados pelos testes: usuário com a senha "password" e headers de login
+def create_user(db_session, username: str, role: str = "USER", hashed_password: str = None):
+    user = User(
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password=hashed_password or get_password_hash("password"),
+        is_active=True,
+        role=role,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def auth_headers(client: TestClient, user: User):
+    response = client.post("/token", data={"username": user.email, "password": "password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
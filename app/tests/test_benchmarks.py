@@ -0,0 +1,66 @@
+# tests/test_benchmarks.py
+
+import asyncio
+import os
+import tempfile
+
+from benchmarks.compare import compare
+from benchmarks.run import run
+from benchmarks.seed import SCALES, bench_engine, build_dataset, seed
+from src.models.comment import Comment
+from src.models.promotion import Promotion
+
+
+def test_dataset_is_deterministic_and_consistent():
+    first = build_dataset(SCALES["tiny"], seed=7)
+    assert build_dataset(SCALES["tiny"], seed=7)[Comment] == first[Comment]
+
+    promotions = first[Promotion]
+    assert sum(p["comment_count"] for p in promotions) == sum(
+        1 for c in first[Comment] if c["promotion_id"]
+    )
+    # Atividade concentrada: a promoção mais comentada tem bem mais que a média
+    counts = sorted((p["comment_count"] for p in promotions), reverse=True)
+    assert counts[0] > 5 * sum(counts) / len(counts)
+
+
+def test_run_reports_latency_and_queries():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    async def scenario():
+        engine = bench_engine(f"sqlite:///{path}")
+        try:
+            await seed(engine, SCALES["tiny"])
+            return await run(
+                engine,
+                ["read_comments", "moderation_bulk_status"],
+                requests=10,
+                concurrency=2,
+                warmup=1,
+            )
+        finally:
+            await engine.dispose()
+
+    try:
+        report = asyncio.run(scenario())
+    finally:
+        os.unlink(path)
+
+    assert set(report["scenarios"]) == {"read_comments", "moderation_bulk_status"}
+    for result in report["scenarios"].values():
+        assert (result["requests"], result["errors"]) == (10, 0)
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["queries_per_request"] >= 1
+
+    _, regressions = compare(report, report)
+    assert regressions == []
+    worse = {
+        "meta": report["meta"],
+        "scenarios": {
+            name: {**result, "queries_per_request": result["queries_per_request"] + 1}
+            for name, result in report["scenarios"].items()
+        },
+    }
+    _, regressions = compare(report, worse)
+    assert len(regressions) == 2
@@ -0,0 +1,120 @@
+# tests/test_bulk_moderation.py
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.comment import Comment
+from src.models.comment_like import CommentLike
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.reaction import Reaction
+from src.models.user import User
+from tests.conftest import async_engine, auth_headers, create_user
+
+
+def create_promotions(db_session: Session, user: User, count: int):
+    promotions = [
+        Promotion(product=f"Produto {i}", link="http://example.com", price=10.0, user_id=user.id)
+        for i in range(count)
+    ]
+    db_session.add_all(promotions)
+    db_session.commit()
+    return [promotion.id for promotion in promotions]
+
+
+def count_statements(client: TestClient, *args, **kwargs):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.post(*args, **kwargs)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return response, statements
+
+
+def test_bulk_approve_reports_each_id(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    moderator = auth_headers(client, create_user(db_session, "mod", role="MODERATOR"))
+    ids = create_promotions(db_session, owner, 30)
+
+    response, statements = count_statements(
+        client,
+        "/moderation/promotions/bulk/status",
+        json={"ids": ids + [999], "status": "APPROVED"},
+        headers=moderator,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[-1] == {"id": 999, "result": "not_found"}
+    assert {result["result"] for result in results[:-1]} == {"updated"}
+    # Um UPDATE para o lote inteiro, não um por item
+    assert sum(statement.startswith("UPDATE promotions") for statement in statements) == 1
+
+    db_session.expire_all()
+    statuses = {p.status for p in db_session.query(Promotion).filter(Promotion.id.in_(ids))}
+    assert statuses == {PromotionStatus.APPROVED}
+    assert len(client.get("/promotions/", params={"limit": 50}).json()["items"]) == 30
+
+
+def test_bulk_delete_removes_dependents(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    moderator = auth_headers(client, create_user(db_session, "mod", role="MODERATOR"))
+    doomed, kept = create_promotions(db_session, owner, 2)
+    comment = Comment(content="Oi", promotion_id=doomed, user_id=owner.id)
+    db_session.add_all([comment, Reaction(promotion_id=doomed, user_id=owner.id)])
+    db_session.commit()
+    db_session.add_all(
+        [
+            Comment(content="Olá", promotion_id=doomed, parent_id=comment.id, user_id=owner.id),
+            CommentLike(comment_id=comment.id, user_id=owner.id),
+        ]
+    )
+    db_session.commit()
+
+    response = client.post(
+        "/moderation/promotions/bulk/delete", json={"ids": [doomed]}, headers=moderator
+    )
+    assert response.json()["results"] == [{"id": doomed, "result": "deleted"}]
+    assert [p.id for p in db_session.query(Promotion)] == [kept]
+    assert db_session.query(Comment).count() == 0
+    assert db_session.query(Reaction).count() == 0
+    assert db_session.query(CommentLike).count() == 0
+
+
+def test_bulk_delete_comments_updates_counters(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    owner_headers = auth_headers(client, owner)
+    moderator = auth_headers(client, create_user(db_session, "mod", role="MODERATOR"))
+    (promotion_id,) = create_promotions(db_session, owner, 1)
+
+    def comment(**data):
+        data.setdefault("content", "Oi")
+        return client.post("/comments/", json=data, headers=owner_headers).json()["id"]
+
+    first = comment(promotion_id=promotion_id)
+    reply = comment(parent_id=first)
+    comment(parent_id=reply)
+    second = comment(promotion_id=promotion_id)
+
+    response = client.post(
+        "/moderation/comments/bulk/delete", json={"ids": [first, 404]}, headers=moderator
+    )
+    assert response.json()["results"] == [
+        {"id": first, "result": "deleted"},
+        {"id": 404, "result": "not_found"},
+    ]
+    assert [c.id for c in db_session.query(Comment)] == [second]
+    assert db_session.get(Promotion, promotion_id).comment_count == 1
+
+
+def test_bulk_requires_moderator_and_limits_ids(client: TestClient, db_session: Session):
+    user = auth_headers(client, create_user(db_session, "fan"))
+    moderator = auth_headers(client, create_user(db_session, "mod", role="MODERATOR"))
+
+    url = "/moderation/coupons/bulk/delete"
+    assert client.post(url, json={"ids": [1]}, headers=user).status_code == 403
+    assert client.post(url, json={"ids": list(range(501))}, headers=moderator).status_code == 400
+    assert client.post(url, json={"ids": []}, headers=moderator).status_code == 422
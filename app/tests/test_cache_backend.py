@@ -0,0 +1,247 @@
+# tests/test_cache_backend.py
+
+import asyncio
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from src.core import cache
+from src.core.cache_backend import (
+    CircuitBreaker,
+    CircuitBreakerBackend,
+    CircuitOpenError,
+    TwoTierBackend,
+)
+
+
+class CountingBackend(InMemoryBackend):
+    def __init__(self):
+        self.reads = 0
+
+    async def get_with_ttl(self, key):
+        self.reads += 1
+        return await super().get_with_ttl(key)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def remote():
+    yield CountingBackend()
+    InMemoryBackend._store.clear()
+
+
+def test_l1_hits_skip_remote(remote):
+    backend = TwoTierBackend(remote, maxsize=2, ttl=30, refresh_ahead=0)
+
+    async def scenario():
+        await backend.set("a", b"1", 60)
+        hits = [await backend.get("a") for _ in range(3)]
+        await backend.set("b", b"2", 60)
+        await backend.set("c", b"3", 60)
+        # "a" foi o menos usado e saiu do L1, mas continua no remoto
+        return hits, await backend.get("a")
+
+    hits, evicted = asyncio.run(scenario())
+    assert hits == [b"1", b"1", b"1"]
+    assert evicted == b"1"
+    assert remote.reads == 1
+
+
+def test_single_flight_on_miss(remote):
+    backend = TwoTierBackend(remote, refresh_ahead=0)
+    computed = []
+
+    async def request():
+        _, value = await backend.get_with_ttl("feed")
+        if value is None:
+            computed.append(1)
+            await asyncio.sleep(0.01)
+            value = b"fresh"
+            await backend.set("feed", value, 60)
+        return value
+
+    async def scenario():
+        return await asyncio.gather(*(request() for _ in range(20)))
+
+    assert asyncio.run(scenario()) == [b"fresh"] * 20
+    assert len(computed) == 1
+
+
+def test_refresh_ahead_hands_out_a_single_miss(remote):
+    backend = TwoTierBackend(remote, refresh_ahead=30)
+
+    async def scenario():
+        await backend.set("feed", b"old", 10)
+        first = await backend.get_with_ttl("feed")
+        second = await backend.get_with_ttl("feed")
+        await backend.set("feed", b"new", 600)
+        third = await backend.get_with_ttl("feed")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    # Só a primeira requisição renova; as demais continuam recebendo o valor atual
+    assert first == (0, None)
+    assert second[1] == b"old"
+    assert third[1] == b"new"
+
+
+def test_evict_publishes_to_other_workers(remote):
+    redis = FakeRedis()
+    backend = TwoTierBackend(remote, redis_client=redis, refresh_ahead=0)
+
+    async def scenario():
+        await backend.set("a", b"1", 60)
+        await backend.evict(["a"])
+        InMemoryBackend._store.clear()
+        return await backend.get("a")
+
+    assert asyncio.run(scenario()) is None
+    assert redis.published == [("cache-invalidation", '["a"]')]
+
+
+class FlakyBackend(InMemoryBackend):
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+
+    async def get_with_ttl(self, key):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("Redis fora do ar")
+        return await super().get_with_ttl(key)
+
+
+def test_breaker_short_circuits_and_recovers(remote):
+    flaky = FlakyBackend()
+
+    async def probe():
+        if flaky.down:
+            raise ConnectionError("Redis fora do ar")
+
+    breaker = CircuitBreaker(probe, failure_threshold=2, reset_timeout=0.01)
+    backend = CircuitBreakerBackend(flaky, breaker)
+
+    async def scenario():
+        await flaky.set("k", b"1", 60)
+        flaky.down = True
+        misses = [await backend.get_with_ttl("k") for _ in range(5)]
+        calls_while_down, state_while_down = flaky.calls, breaker.state
+        flaky.down = False
+        await asyncio.sleep(0.05)
+        return misses, calls_while_down, state_while_down, await backend.get("k")
+
+    misses, calls, state, value = asyncio.run(scenario())
+    assert misses == [(0, None)] * 5
+    # Depois de abrir, o circuito não tenta mais o Redis
+    assert calls == 2
+    assert state == CircuitBreaker.OPEN
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert value == b"1"
+    assert backend.as_dict()["errors"] == 2
+    assert backend.as_dict()["short_circuits"] == 3
+
+
+class UnavailableTagIndex:
+    def __init__(self):
+        self.down = True
+        self.purged = []
+
+    async def purge(self, tags):
+        if self.down:
+            raise CircuitOpenError()
+        self.purged.append(tags)
+        return []
+
+
+@pytest.fixture
+def layered_cache(remote):
+    l1 = TwoTierBackend(remote, refresh_ahead=0)
+    FastAPICache.reset()
+    FastAPICache.init(l1, prefix="test-cache")
+    index = UnavailableTagIndex()
+    cache.tag_index = index
+    # Testes anteriores, com o Redis fora, podem ter deixado invalidações pendentes
+    cache.missed_tags.clear()
+    yield l1, index
+    FastAPICache.reset()
+    cache.tag_index = cache.MemoryTagIndex()
+    cache.missed_tags.clear()
+
+
+def test_invalidations_missed_while_open_are_replayed(layered_cache):
+    l1, index = layered_cache
+
+    async def scenario():
+        await l1.set("feed", b"1", 60)
+        purged = await cache.invalidate("promotions:status:APPROVED")
+        # Sem saber as chaves da tag, o L1 local é descartado por inteiro
+        local_after_outage = l1._local_get("feed")
+        index.down = False
+        await cache.replay_missed_invalidations()
+        return purged, local_after_outage
+
+    purged, local = asyncio.run(scenario())
+    assert purged == 0
+    assert local is None
+    assert index.purged == [["promotions:status:APPROVED"]]
+    assert cache.missed_tags == set()
+
+
+def test_failed_recompute_wakes_waiters(remote):
+    backend = TwoTierBackend(remote, refresh_ahead=0, lock_timeout=5)
+
+    async def scenario():
+        assert await backend.get_with_ttl("user") == (0, None)
+        waiter = asyncio.create_task(backend.get_with_ttl("user"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        # Quem recalculava falhou (ex.: 404) e nunca vai chamar set
+        backend.abandon("user")
+        start = asyncio.get_running_loop().time()
+        result = await waiter
+        return result, asyncio.get_running_loop().time() - start
+
+    result, waited = asyncio.run(scenario())
+    assert result == (0, None)
+    assert waited < 0.5
+    assert backend._inflight == {}
+
+
+def test_tagged_cache_releases_claim_when_endpoint_raises(remote):
+    l1 = TwoTierBackend(remote, refresh_ahead=0, lock_timeout=5)
+    FastAPICache.reset()
+    FastAPICache.init(l1, prefix="test-cache")
+    calls = []
+
+    @cache.tagged_cache(60, ["users:1"])
+    async def missing_user():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise LookupError("Usuário não encontrado")
+
+    async def request():
+        try:
+            await missing_user()
+        except LookupError:
+            return "404"
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(request() for _ in range(3)))
+        return results, asyncio.get_running_loop().time() - start
+
+    try:
+        results, elapsed = asyncio.run(scenario())
+    finally:
+        FastAPICache.reset()
+        cache.tag_index = cache.MemoryTagIndex()
+    assert results == ["404"] * 3
+    assert len(calls) == 3
+    assert elapsed < 1
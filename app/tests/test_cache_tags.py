@@ -0,0 +1,172 @@
+# tests/test_cache_tags.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from sqlalchemy.orm import Session
+from src.core import cache
+from tests.conftest import auth_headers, create_user
+
+STATUS_HEADER = "X-FastAPI-Cache"
+
+
+@pytest.fixture
+def memory_cache():
+    # Inicializado antes do cliente: o FastAPICache.init do startup vira no-op
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+    yield
+    InMemoryBackend._store.clear()
+    FastAPICache.reset()
+    cache.tag_index = cache.MemoryTagIndex()
+
+
+def create_promotion(client: TestClient, headers: dict, product: str = "Produto"):
+    data = {"product": product, "link": "http://example.com", "price": 10.0}
+    return client.post("/promotions/", json=data, headers=headers).json()
+
+
+def test_approval_invalidates_feed(memory_cache, client: TestClient, db_session: Session):
+    owner = auth_headers(client, create_user(db_session, "owner"))
+    moderator = auth_headers(client, create_user(db_session, "moderator", role="MODERATOR"))
+    promotion = create_promotion(client, owner)
+
+    assert client.get("/promotions/").headers[STATUS_HEADER] == "MISS"
+    response = client.get("/promotions/")
+    assert response.headers[STATUS_HEADER] == "HIT"
+    assert response.json()["items"] == []
+
+    client.put(
+        f"/moderation/promotions/{promotion['id']}", json={"status": "APPROVED"}, headers=moderator
+    )
+    response = client.get("/promotions/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert [item["id"] for item in response.json()["items"]] == [promotion["id"]]
+
+    client.delete(f"/promotions/{promotion['id']}", headers=owner)
+    assert client.get("/promotions/").json()["items"] == []
+
+
+def test_only_affected_user_pages_are_purged(memory_cache, client: TestClient, db_session: Session):
+    alice = create_user(db_session, "alice")
+    bob = create_user(db_session, "bob")
+    alice_headers = auth_headers(client, alice)
+
+    for user in (alice, bob):
+        client.get(f"/users/{user.id}/promotions/")
+        assert client.get(f"/users/{user.id}/promotions/").headers[STATUS_HEADER] == "HIT"
+
+    create_promotion(client, alice_headers)
+    response = client.get(f"/users/{alice.id}/promotions/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert len(response.json()["promotions"]) == 1
+    assert client.get(f"/users/{bob.id}/promotions/").headers[STATUS_HEADER] == "HIT"
+
+    # O perfil embutido na página também é invalidado
+    client.put("/users/me/", json={"full_name": "Alice"}, headers=alice_headers)
+    response = client.get(f"/users/{alice.id}/promotions/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert response.json()["full_name"] == "Alice"
+
+    # A mesma invalidação vale para o PUT /me do router de autenticação
+    client.put("/me", json={"full_name": "Alice Souza"}, headers=alice_headers)
+    response = client.get(f"/users/{alice.id}/promotions/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert response.json()["full_name"] == "Alice Souza"
+
+
+def test_reply_invalidates_parent_author_comments(
+    memory_cache, client: TestClient, db_session: Session
+):
+    alice = create_user(db_session, "alice")
+    alice_headers = auth_headers(client, alice)
+    bob_headers = auth_headers(client, create_user(db_session, "bob"))
+    promotion = create_promotion(client, alice_headers)
+    comment = client.post(
+        "/comments/", json={"content": "Oi", "promotion_id": promotion["id"]}, headers=alice_headers
+    ).json()
+
+    client.get(f"/users/{alice.id}/comments/")
+    assert client.get(f"/users/{alice.id}/comments/").headers[STATUS_HEADER] == "HIT"
+
+    client.post(
+        "/comments/", json={"content": "Olá", "parent_id": comment["id"]}, headers=bob_headers
+    )
+    response = client.get(f"/users/{alice.id}/comments/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert response.json()["comments"][0]["reply_count"] == 1
+
+
+def test_entry_computed_during_invalidation_is_discarded(memory_cache):
+    computing = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    @cache.tagged_cache(60, ["promotions", "promotions:status:APPROVED"])
+    async def feed():
+        calls.append(1)
+        computing.set()
+        await release.wait()
+        return {"items": len(calls)}
+
+    async def scenario():
+        # A leitura (réplica atrasada) começa antes da escrita invalidar o feed
+        stale = asyncio.create_task(feed())
+        await computing.wait()
+        await cache.invalidate("promotions:status:APPROVED")
+        release.set()
+        first = await stale
+        return first, await feed(), await feed()
+
+    first, second, third = asyncio.run(scenario())
+    assert first == {"items": 1}
+    # A resposta calculada antes da invalidação não ficou no cache
+    assert second == {"items": 2}
+    assert third == {"items": 2}
+    assert len(calls) == 2
+
+
+def test_cache_status_requires_moderator(memory_cache, client: TestClient, db_session: Session):
+    assert client.get("/api/v1/cache").status_code == 401
+    fan = auth_headers(client, create_user(db_session, "fan"))
+    assert client.get("/api/v1/cache", headers=fan).status_code == 403
+
+    moderator = auth_headers(client, create_user(db_session, "moderator", role="MODERATOR"))
+    response = client.get("/api/v1/cache", headers=moderator)
+    assert response.json()["backend"] == "InMemoryBackend"
+
+
+def test_deleting_offer_invalidates_commenters_pages(
+    memory_cache, client: TestClient, db_session: Session
+):
+    alice_headers = auth_headers(client, create_user(db_session, "alice"))
+    bob = create_user(db_session, "bob")
+    bob_headers = auth_headers(client, bob)
+    moderator = auth_headers(client, create_user(db_session, "moderator", role="MODERATOR"))
+    promotion = create_promotion(client, alice_headers)
+    coupon = client.post(
+        "/coupons/",
+        json={"product": "Loja", "link": "http://example.com/loja", "code": "DEZ"},
+        headers=alice_headers,
+    ).json()
+    for target in ({"promotion_id": promotion["id"]}, {"coupon_id": coupon["id"]}):
+        client.post("/comments/", json={"content": "Bom", **target}, headers=bob_headers)
+
+    client.get(f"/users/{bob.id}/comments/")
+    assert client.get(f"/users/{bob.id}/comments/").headers[STATUS_HEADER] == "HIT"
+
+    # Os comentários somem em cascata com a promoção (rota do dono)
+    assert client.delete(f"/promotions/{promotion['id']}", headers=alice_headers).status_code == 204
+    response = client.get(f"/users/{bob.id}/comments/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert [item["coupon_id"] for item in response.json()["comments"]] == [coupon["id"]]
+
+    # E com o cupom (rota de moderação)
+    response = client.delete(f"/moderation/coupons/{coupon['id']}", headers=moderator)
+    assert response.status_code == 204
+    response = client.get(f"/users/{bob.id}/comments/")
+    assert response.headers[STATUS_HEADER] == "MISS"
+    assert response.json()["comments"] == []
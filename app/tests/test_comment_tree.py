@@ -0,0 +1,168 @@
+# tests/test_comment_tree.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.comment import Comment
+from src.models.promotion import Promotion, PromotionStatus
+from src.services.comment_tree import comment_tree_query
+from tests.conftest import async_engine, create_user
+
+
+@pytest.fixture
+def thread(db_session: Session):
+    """Raiz com 8 respostas; a primeira resposta tem uma cadeia de 5 níveis abaixo dela."""
+    user = create_user(db_session, "commenter")
+    promotion = Promotion(
+        product="Produto",
+        link="http://example.com",
+        price=10.0,
+        status=PromotionStatus.APPROVED,
+        user_id=user.id,
+    )
+    db_session.add(promotion)
+    db_session.commit()
+
+    start = datetime(2024, 1, 1)
+    root = Comment(content="Raiz", user_id=user.id, promotion_id=promotion.id, created_at=start)
+    db_session.add(root)
+    db_session.flush()
+    replies = []
+    for i in range(8):
+        reply = Comment(
+            content=f"Resposta {i}",
+            user_id=user.id,
+            promotion_id=promotion.id,
+            parent_id=root.id,
+            created_at=start + timedelta(minutes=i + 1),
+        )
+        db_session.add(reply)
+        replies.append(reply)
+    db_session.flush()
+    parent = replies[0]
+    for level in range(5):
+        nested = Comment(
+            content=f"Nível {level + 2}",
+            user_id=user.id,
+            promotion_id=promotion.id,
+            parent_id=parent.id,
+            created_at=start + timedelta(hours=level + 1),
+        )
+        db_session.add(nested)
+        db_session.flush()
+        parent = nested
+    db_session.commit()
+    return root
+
+
+def chain_depth(comment: dict) -> int:
+    return 1 + max((chain_depth(reply) for reply in comment["replies"]), default=-1)
+
+
+def test_per_level_limit_and_load_more_cursor(client: TestClient, thread):
+    response = client.get(f"/comments/{thread.id}", params={"replies_limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reply_count"] == 8
+    assert [reply["content"] for reply in data["replies"]] == [
+        "Resposta 0",
+        "Resposta 1",
+        "Resposta 2",
+    ]
+
+    # O cursor continua a partir da última resposta carregada
+    response = client.get(
+        "/comments/",
+        params={"parent_id": thread.id, "cursor": data["replies_cursor"], "limit": 10},
+    )
+    contents = [reply["content"] for reply in response.json()["items"]]
+    assert contents == [f"Resposta {i}" for i in range(3, 8)]
+
+
+def test_depth_limit(client: TestClient, thread):
+    data = client.get(f"/comments/{thread.id}", params={"depth": 2}).json()
+    assert chain_depth(data) == 2
+    deepest = data["replies"][0]["replies"][0]
+    assert deepest["replies"] == []
+    # Respostas além do limite de profundidade ainda aparecem na contagem
+    assert deepest["reply_count"] == 1
+    assert deepest["replies_cursor"] is None
+
+    data = client.get(f"/comments/{thread.id}", params={"depth": 10}).json()
+    assert chain_depth(data) == 6
+    assert data["replies_cursor"] is not None
+
+
+def test_thread_listing_uses_bounded_queries(client: TestClient, thread):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        response = client.get(
+            "/comments/", params={"promotion_id": thread.promotion_id, "depth": 10}
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    assert chain_depth(response.json()["items"][0]) == 6
+    # Uma consulta para a página de raízes e uma para as árvores, independente da profundidade
+    assert len(statements) == 2
+
+
+def test_large_thread_fetches_only_rendered_rows(client: TestClient, db_session: Session):
+    user = create_user(db_session, "popular")
+    promotion = Promotion(
+        product="Produto",
+        link="http://example.com",
+        price=10.0,
+        status=PromotionStatus.APPROVED,
+        user_id=user.id,
+    )
+    db_session.add(promotion)
+    db_session.flush()
+    start = datetime(2024, 1, 1)
+    root = Comment(content="Raiz", user_id=user.id, promotion_id=promotion.id, created_at=start)
+    db_session.add(root)
+    db_session.flush()
+    # 60 respostas com 20 respostas cada: 1.261 comentários na thread
+    minute = 0
+    for i in range(60):
+        minute += 1
+        reply = Comment(
+            content=f"Resposta {i}",
+            user_id=user.id,
+            promotion_id=promotion.id,
+            parent_id=root.id,
+            created_at=start + timedelta(minutes=minute),
+        )
+        db_session.add(reply)
+        db_session.flush()
+        for j in range(20):
+            minute += 1
+            db_session.add(
+                Comment(
+                    content=f"Resposta {i}.{j}",
+                    user_id=user.id,
+                    promotion_id=promotion.id,
+                    parent_id=reply.id,
+                    created_at=start + timedelta(minutes=minute),
+                )
+            )
+    db_session.commit()
+
+    rows = db_session.execute(comment_tree_query([root.id], 3, 5, "sqlite")).all()
+    # Raiz, 5 respostas e 5 respostas de cada uma: nada além do que é renderizado
+    assert len(rows) == 31
+
+    data = client.get(f"/comments/{root.id}", params={"depth": 3, "replies_limit": 5}).json()
+    assert data["reply_count"] == 60
+    assert [reply["reply_count"] for reply in data["replies"]] == [20] * 5
+    assert data["replies"][0]["replies"][-1]["content"] == "Resposta 0.4"
+    assert data["replies"][0]["replies_cursor"] is not None
@@ -0,0 +1,142 @@
+# tests/test_counters.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models.comment import Comment
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.reaction import Reaction
+from src.services.counters import reconcile_counters
+from tests.conftest import TestingAsyncSessionLocal, auth_headers, create_user
+
+
+@pytest.fixture
+def promotion(db_session: Session):
+    owner = create_user(db_session, "owner")
+    promotion = Promotion(
+        product="Produto",
+        link="http://example.com",
+        price=10.0,
+        status=PromotionStatus.APPROVED,
+        user_id=owner.id,
+    )
+    db_session.add(promotion)
+    db_session.commit()
+    db_session.refresh(promotion)
+    return promotion
+
+
+def promotion_counts(client: TestClient, promotion_id: int):
+    data = client.get(f"/promotions/{promotion_id}").json()
+    return data["reaction_count"], data["comment_count"]
+
+
+def test_reaction_count_follows_create_and_delete(
+    client: TestClient, db_session: Session, promotion
+):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+
+    client.post("/reactions/", json={"promotion_id": promotion.id}, headers=headers)
+    assert promotion_counts(client, promotion.id) == (1, 0)
+    response = client.get("/reactions/count", params={"promotion_id": promotion.id})
+    assert response.json() == 1
+
+    client.delete("/reactions/", params={"promotion_id": promotion.id}, headers=headers)
+    assert promotion_counts(client, promotion.id) == (0, 0)
+
+
+def test_comment_and_like_counts(client: TestClient, db_session: Session, promotion):
+    headers = auth_headers(client, create_user(db_session, "commenter"))
+
+    parent = client.post(
+        "/comments/", json={"content": "Pai", "promotion_id": promotion.id}, headers=headers
+    ).json()
+    client.post(
+        "/comments/", json={"content": "Resposta", "parent_id": parent["id"]}, headers=headers
+    )
+    assert promotion_counts(client, promotion.id) == (0, 2)
+
+    client.post("/comment-likes/", json={"comment_id": parent["id"]}, headers=headers)
+    assert client.get(f"/comments/{parent['id']}").json()["like_count"] == 1
+    response = client.get("/comment-likes/count", params={"comment_id": parent["id"]})
+    assert response.json() == 1
+
+    client.delete(f"/comment-likes/{parent['id']}", headers=headers)
+    assert client.get(f"/comments/{parent['id']}").json()["like_count"] == 0
+
+    # Remover o comentário pai também remove a resposta do contador
+    client.delete(f"/comments/{parent['id']}", headers=headers)
+    assert promotion_counts(client, promotion.id) == (0, 0)
+
+
+def test_delete_user_recomputes_counters(client: TestClient, db_session: Session, promotion):
+    fan = create_user(db_session, "fan")
+    headers = auth_headers(client, fan)
+    client.post("/reactions/", json={"promotion_id": promotion.id}, headers=headers)
+    client.post("/comments/", json={"content": "Oi", "promotion_id": promotion.id}, headers=headers)
+    assert promotion_counts(client, promotion.id) == (1, 1)
+
+    client.delete("/users/me", headers=headers)
+    assert promotion_counts(client, promotion.id) == (0, 0)
+
+
+def test_reconcile_counters_fixes_drift(client: TestClient, db_session: Session, promotion):
+    fan = create_user(db_session, "fan")
+    # Inserções diretas no banco não passam pelos routers e deixam os contadores defasados
+    db_session.add(Reaction(user_id=fan.id, promotion_id=promotion.id))
+    db_session.add(Comment(content="Oi", user_id=fan.id, promotion_id=promotion.id))
+    db_session.commit()
+    assert promotion_counts(client, promotion.id) == (0, 0)
+
+    async def reconcile():
+        async with TestingAsyncSessionLocal() as db:
+            fixed = await reconcile_counters(db)
+            await db.commit()
+        return fixed
+
+    assert asyncio.run(reconcile()) == {"promotions": 1, "coupons": 0, "comments": 0}
+    assert promotion_counts(client, promotion.id) == (1, 1)
+    # Uma segunda execução não encontra divergências
+    assert asyncio.run(reconcile()) == {"promotions": 0, "coupons": 0, "comments": 0}
+
+
+def test_batch_count_and_check(client: TestClient, db_session: Session, promotion):
+    fan = create_user(db_session, "fan")
+    other = Promotion(
+        product="Outro",
+        link="http://example.com",
+        price=5.0,
+        status=PromotionStatus.APPROVED,
+        user_id=fan.id,
+    )
+    db_session.add(other)
+    db_session.commit()
+    headers = auth_headers(client, fan)
+    client.post("/reactions/", json={"promotion_id": promotion.id}, headers=headers)
+    comment = client.post(
+        "/comments/", json={"content": "Oi", "promotion_id": other.id}, headers=headers
+    ).json()
+    client.post("/comment-likes/", json={"comment_id": comment["id"]}, headers=headers)
+
+    params = {"promotion_ids": [promotion.id, other.id, 999]}
+    response = client.get("/reactions/count/batch", params=params)
+    assert response.json() == {str(promotion.id): 1, str(other.id): 0, "999": 0}
+    response = client.get("/reactions/check/batch", params=params, headers=headers)
+    assert response.json() == {str(promotion.id): True, str(other.id): False, "999": False}
+
+    params = {"comment_ids": [comment["id"], 999]}
+    response = client.get("/comment-likes/count/batch", params=params)
+    assert response.json() == {str(comment["id"]): 1, "999": 0}
+    response = client.get("/comment-likes/check/batch", params=params, headers=headers)
+    assert response.json() == {str(comment["id"]): True, "999": False}
+
+
+def test_batch_requires_a_single_target(client: TestClient, db_session: Session):
+    response = client.get(
+        "/reactions/count/batch", params={"promotion_ids": [1], "coupon_ids": [1]}
+    )
+    assert response.status_code == 400
+    response = client.get("/reactions/count/batch", params={"promotion_ids": list(range(101))})
+    assert response.status_code == 400
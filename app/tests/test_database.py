@@ -0,0 +1,97 @@
+# tests/test_database.py
+
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from src.core import database
+from src.core.database import READ_YOUR_WRITES_COOKIE, get_async_database_url, prefers_primary
+from src.core.middleware import ReadYourWritesMiddleware
+from src.core.pool_metrics import MonitoredAsyncQueuePool, get_pool_status
+
+from .conftest import SQLALCHEMY_DATABASE_URL, auth_headers, create_user
+
+
+def test_monitored_pool_records_checkout_and_checkin():
+    engine = create_async_engine(
+        get_async_database_url(SQLALCHEMY_DATABASE_URL),
+        poolclass=MonitoredAsyncQueuePool,
+        pool_size=2,
+        max_overflow=1,
+    )
+
+    async def run_queries():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            during = get_pool_status(engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        after = get_pool_status(engine)
+        await engine.dispose()
+        return during, after
+
+    during, stats = asyncio.run(run_queries())
+    assert during["checked_out"] == 1
+    assert during["saturation"] == round(1 / 3, 3)
+
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 0
+    assert stats["connection_hold_ms"]["max"] >= stats["connection_hold_ms"]["avg"] > 0
+
+
+def test_db_pool_endpoint(client: TestClient, db_session: Session):
+    assert client.get("/api/v1/db-pool").status_code == 401
+    fan = auth_headers(client, create_user(db_session, "fan"))
+    assert client.get("/api/v1/db-pool", headers=fan).status_code == 403
+
+    admin = auth_headers(client, create_user(db_session, "admin", role="ADMIN"))
+    response = client.get("/api/v1/db-pool", headers=admin)
+    assert response.status_code == 200
+    data = response.json()
+    assert "pool" in data["primary"]
+    assert data["replica"] is None
+
+
+def test_reads_stick_to_primary_after_own_write():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/items")
+    async def create_item():
+        return {"ok": True}
+
+    @app.post("/fail")
+    async def fail():
+        return JSONResponse({"ok": False}, status_code=400)
+
+    @app.get("/items")
+    async def read_items(request: Request):
+        return {"primary": prefers_primary(request)}
+
+    client = TestClient(app)
+    assert client.get("/items").json() == {"primary": False}
+    assert READ_YOUR_WRITES_COOKIE not in client.post("/fail").cookies
+    assert READ_YOUR_WRITES_COOKIE in client.post("/items").cookies
+    assert client.get("/items").json() == {"primary": True}
+
+
+def test_read_session_falls_back_to_primary_when_replica_is_down(monkeypatch):
+    broken_replica = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db")
+    monkeypatch.setattr(
+        database, "ReadSessionLocal", async_sessionmaker(bind=broken_replica)
+    )
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    request = Request({"type": "http", "headers": []})
+
+    async def open_session():
+        db = await database._open_read_session(request)
+        await db.close()
+        return db
+
+    db = asyncio.run(open_session())
+    assert db.bind is database.engine
+    assert database._replica_down_until > 0
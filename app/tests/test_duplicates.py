@@ -0,0 +1,123 @@
+# tests/test_duplicates.py
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.core.links import canonical_key
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion, PromotionStatus
+from src.services.duplicates import backfill_canonical_keys, flag_pending_duplicates
+from tests.conftest import TestingAsyncSessionLocal, auth_headers, create_user
+
+ASIN_KEY = "amazon.com.br/dp/B09B8VGCR8"
+
+
+@pytest.mark.parametrize(
+    "link, key",
+    [
+        ("https://www.amazon.com.br/Echo-Dot/dp/B09B8VGCR8/ref=sr_1_1?tag=abc-20", ASIN_KEY),
+        ("http://amazon.com.br/gp/product/b09b8vgcr8?psc=1&th=1", ASIN_KEY),
+        (
+            "https://produto.mercadolivre.com.br/MLB-1234567890-fone-_JM?matt_tool=1#position=2",
+            "mercadolivre/MLB1234567890",
+        ),
+        (
+            "https://WWW.Loja.com:443//ofertas/tv/?utm_source=x&b=2&a=1&fbclid=y#topo",
+            "loja.com/ofertas/tv?a=1&b=2",
+        ),
+    ],
+)
+def test_canonical_key(link: str, key: str):
+    assert canonical_key(link) == key
+
+
+def test_create_flags_duplicate_of_live_deal(client: TestClient, db_session: Session):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+    link = "https://www.amazon.com.br/dp/B09B8VGCR8?tag=um-20"
+
+    def post(link: str):
+        data = {"product": "Echo Dot", "link": link, "price": 299.0}
+        return client.post("/promotions/", json=data, headers=headers).json()
+
+    first = post(link)
+    second = post("https://amazon.com.br/gp/product/B09B8VGCR8?tag=outro-20")
+    assert first["duplicate_of_id"] is None
+    assert second["duplicate_of_id"] == first["id"]
+
+    # Ofertas negadas não contam
+    db_session.query(Promotion).update({"status": PromotionStatus.DENIED})
+    db_session.commit()
+    assert post(link)["duplicate_of_id"] is None
+
+
+def test_bulk_ingest_merges_into_existing_deal(client: TestClient, db_session: Session):
+    scraper = create_user(db_session, "scraper", role="ADMIN")
+    existing = Promotion(
+        product="Echo Dot",
+        link="https://www.amazon.com.br/dp/B09B8VGCR8",
+        canonical_key=ASIN_KEY,
+        price=299.0,
+        status=PromotionStatus.APPROVED,
+        user_id=scraper.id,
+    )
+    db_session.add(existing)
+    db_session.commit()
+
+    lines = [
+        {"product": "Echo", "link": "https://amazon.com.br/dp/B09B8VGCR8?tag=a-20", "price": 249},
+        {"product": "Fone", "link": "https://loja.com/fone?utm_source=feed", "price": 50},
+        {"product": "Fone", "link": "https://loja.com/fone?utm_source=outro", "price": 50},
+    ]
+    response = client.post(
+        "/promotions/bulk",
+        content="\n".join(json.dumps(line) for line in lines),
+        headers=auth_headers(client, scraper),
+    )
+    report = response.json()
+    assert (report["inserted"], report["merged"], report["failed"]) == (1, 2, 0)
+
+    db_session.expire_all()
+    assert db_session.get(Promotion, existing.id).price == 249.0
+    fone = db_session.query(Promotion).filter(Promotion.canonical_key == "loja.com/fone").one()
+    assert report["merges"] == [{"line": 1, "id": existing.id}, {"line": 3, "id": fone.id}]
+
+
+def test_backfill_fills_keys_and_flags_pending(db_session: Session):
+    user = create_user(db_session, "fan")
+    link = "https://www.amazon.com.br/dp/B09B8VGCR8?tag=x-20"
+    coupons = [
+        Coupon(product="Loja", link="https://loja.com/?ref=a", code=code, user_id=user.id)
+        for code in ("DEZ", "DEZ", "VINTE")
+    ]
+    promotions = [
+        Promotion(product="Echo", link=url, price=1.0, user_id=user.id)
+        for url in (link, link + "&th=1")
+    ]
+    db_session.add_all(coupons + promotions)
+    db_session.commit()
+
+    async def scenario():
+        async with TestingAsyncSessionLocal() as db:
+            return [
+                (
+                    await backfill_canonical_keys(db, model, batch_size=1),
+                    await flag_pending_duplicates(db, model),
+                )
+                for model in (Promotion, Coupon)
+            ]
+
+    assert asyncio.run(scenario()) == [(2, 1), (3, 1)]
+    db_session.expire_all()
+    assert {p.canonical_key for p in db_session.query(Promotion)} == {ASIN_KEY}
+    assert [p.duplicate_of_id for p in db_session.query(Promotion).order_by(Promotion.id)] == [
+        None,
+        promotions[0].id,
+    ]
+    assert [c.duplicate_of_id for c in db_session.query(Coupon).order_by(Coupon.id)] == [
+        None,
+        coupons[0].id,
+        None,
+    ]
@@ -0,0 +1,63 @@
+# tests/test_ingest.py
+
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models.coupon import Coupon
+from src.models.promotion import Promotion, PromotionStatus
+from src.services.ingest import CSV, ingest
+from tests.conftest import TestingAsyncSessionLocal, auth_headers, create_user
+
+
+def test_ndjson_reports_bad_rows_and_keeps_the_rest(client: TestClient, db_session: Session):
+    scraper = create_user(db_session, "scraper", role="ADMIN")
+    lines = [
+        json.dumps({"product": f"Produto {i}", "link": f"http://example.com/{i}", "price": i})
+        for i in range(5)
+    ]
+    lines.insert(2, json.dumps({"product": "Sem link", "price": 1}))
+    lines.insert(4, "{quebrado")
+    body = "\n".join(lines) + "\n\n"
+
+    response = client.post(
+        "/promotions/bulk",
+        content=body,
+        headers={**auth_headers(client, scraper), "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["inserted"], report["failed"]) == (7, 5, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 5]
+    assert report["errors"][0]["error"].startswith("link:")
+
+    promotions = db_session.query(Promotion).order_by(Promotion.id).all()
+    assert [p.product for p in promotions] == [f"Produto {i}" for i in range(5)]
+    assert {(p.status, p.user_id) for p in promotions} == {(PromotionStatus.PENDING, scraper.id)}
+
+
+def test_csv_is_written_in_chunks(client: TestClient, db_session: Session):
+    scraper = create_user(db_session, "scraper", role="MODERATOR")
+    rows = "\n".join(f"Cupom {i},http://example.com,CODE{i}," for i in range(7))
+    stream = io.StringIO(f"product,link,code,comment\n{rows}\n,http://example.com,X,\n")
+
+    async def scenario():
+        async with TestingAsyncSessionLocal() as db:
+            return await ingest(db, "coupons", stream, scraper.id, CSV, chunk_size=3)
+
+    report = asyncio.run(scenario())
+    assert (report.received, report.inserted, report.failed) == (8, 7, 1)
+    assert report.errors == [{"line": 9, "error": "product: Field required"}]
+    coupons = db_session.query(Coupon).order_by(Coupon.id).all()
+    assert [c.code for c in coupons] == [f"CODE{i}" for i in range(7)]
+    assert {c.comment for c in coupons} == {None}
+
+
+@pytest.mark.parametrize("url", ["/promotions/bulk", "/coupons/bulk"])
+def test_bulk_ingest_requires_moderator(client: TestClient, db_session: Session, url: str):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+    response = client.post(url, content="{}\n", headers=headers)
+    assert response.status_code == 403
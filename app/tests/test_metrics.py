@@ -0,0 +1,82 @@
+# tests/test_metrics.py
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from src.core import metrics
+from src.core.metrics import Histogram
+from tests.conftest import create_user
+
+
+def scrape(client: TestClient) -> dict:
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_exposition():
+    histogram = Histogram("latency_seconds", "Latência.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, '/a"b')
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latência.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a\\"b"} 3.65',
+        'latency_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_metrics_cover_routes_db_cache_and_passwords(client: TestClient, db_session: Session):
+    user = create_user(db_session, "fan")
+    route_404 = (
+        "http_request_duration_seconds_count"
+        '{method="GET",route="/promotions/{promotion_id}",status="404"}'
+    )
+    cache_miss = 'cache_requests_total{namespace="read_promotions",result="miss"}'
+    queries = 'db_query_duration_seconds_count{database="primary"}'
+    verify = 'password_hash_duration_seconds_count{operation="verify"}'
+    before = scrape(client)
+
+    assert client.get("/promotions/12345").status_code == 404
+    assert client.get("/promotions/9999").status_code == 404
+    client.get("/promotions/", params={"limit": 3})
+    client.post("/token", data={"username": user.email, "password": "password"})
+    after = scrape(client)
+
+    assert after[route_404] - before.get(route_404, 0) == 2
+    assert after[cache_miss] - before.get(cache_miss, 0) == 1
+    assert after[queries] > before.get(queries, 0)
+    assert after[verify] - before.get(verify, 0) == 1
+    # A própria coleta está em andamento
+    assert after["http_requests_in_flight"] == 1
+    assert not any(re.search(r'route="/promotions/\d+"', name) for name in after)
+
+
+def test_failed_query_does_not_skew_durations(monkeypatch):
+    observed = []
+    monkeypatch.setattr(
+        metrics.query_duration, "observe", lambda value, *labels: observed.append(value)
+    )
+    metrics.install()
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM tabela_inexistente")
+        conn.exec_driver_sql("SELECT 1")
+        # Nada da query que falhou fica pendurado na conexão (que voltaria ao pool)
+        assert not any(key.startswith("metrics") for key in conn.info)
+    engine.dispose()
+    assert len(observed) == 1
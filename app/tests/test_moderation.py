@@ -206,6 +206,6 @@ def test_users_see_only_approved_promotions(
     # Obter lista de promoções
     response = client.get("/promotions/", headers=headers)
     assert response.status_code == 200
-    promotions = response.json()
+    promotions = response.json()["items"]
     assert len(promotions) == 1
     assert promotions[0]["product"] == "Promoção Aprovada"
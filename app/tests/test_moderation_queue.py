@@ -0,0 +1,92 @@
+# tests/test_moderation_queue.py
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.user import User
+from tests.conftest import auth_headers, create_user
+
+
+def create_pending(db_session: Session, user: User, count: int):
+    start = datetime.utcnow() - timedelta(hours=1)
+    promotions = [
+        Promotion(
+            product=f"Produto {i}",
+            link="http://example.com",
+            price=10.0,
+            user_id=user.id,
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(promotions)
+    db_session.commit()
+    return [promotion.id for promotion in promotions]
+
+
+def claim(client: TestClient, headers: dict, limit: int):
+    response = client.post("/moderation/promotions/claim", params={"limit": limit}, headers=headers)
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_moderators_claim_disjoint_batches(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    alice = auth_headers(client, create_user(db_session, "alice", role="MODERATOR"))
+    bob = auth_headers(client, create_user(db_session, "bob", role="MODERATOR"))
+    ids = create_pending(db_session, owner, 5)
+
+    assert claim(client, alice, 2) == ids[:2]
+    assert claim(client, bob, 2) == ids[2:4]
+    # Pedir de novo devolve (e renova) o que o moderador já tem
+    assert claim(client, alice, 2) == ids[:2]
+
+    released = client.post(
+        "/moderation/promotions/claim/release", json={"ids": [ids[0], ids[2]]}, headers=alice
+    ).json()["results"]
+    assert released == [
+        {"id": ids[0], "result": "released"},
+        {"id": ids[2], "result": "not_found"},
+    ]
+    assert claim(client, bob, 3) == [ids[0], ids[2], ids[3]]
+
+
+def test_complete_only_own_claims(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    alice = auth_headers(client, create_user(db_session, "alice", role="MODERATOR"))
+    bob = auth_headers(client, create_user(db_session, "bob", role="MODERATOR"))
+    first, second = create_pending(db_session, owner, 2)
+    claim(client, alice, 1)
+    claim(client, bob, 1)
+
+    response = client.post(
+        "/moderation/promotions/claim/complete",
+        json={"ids": [first, second], "status": "APPROVED"},
+        headers=alice,
+    )
+    assert response.json()["results"] == [
+        {"id": first, "result": "updated"},
+        {"id": second, "result": "not_found"},
+    ]
+    db_session.expire_all()
+    completed = db_session.get(Promotion, first)
+    assert completed.status == PromotionStatus.APPROVED
+    assert completed.claimed_by is None
+    assert db_session.get(Promotion, second).status == PromotionStatus.PENDING
+
+
+def test_expired_lease_returns_to_queue(client: TestClient, db_session: Session):
+    owner = create_user(db_session, "owner")
+    alice_user = create_user(db_session, "alice", role="MODERATOR")
+    alice = auth_headers(client, alice_user)
+    bob = auth_headers(client, create_user(db_session, "bob", role="MODERATOR"))
+    (promotion_id,) = create_pending(db_session, owner, 1)
+    promotion = db_session.get(Promotion, promotion_id)
+    promotion.claimed_by = alice_user.id
+    promotion.claimed_until = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+    assert claim(client, bob, 5) == [promotion_id]
+    response = client.post("/moderation/promotions/claim", headers=alice)
+    assert response.json() == {"items": [], "claimed_until": None}
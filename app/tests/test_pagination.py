@@ -0,0 +1,114 @@
+# tests/test_pagination.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.core.security import get_password_hash
+from src.models.comment import Comment
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.user import User
+
+
+@pytest.fixture
+def regular_user(db_session: Session):
+    user = User(
+        email="user@example.com",
+        username="user",
+        hashed_password=get_password_hash("password"),
+        is_active=True,
+        role="USER",
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def create_promotions(db_session: Session, user: User, total: int):
+    base = datetime(2024, 12, 1, 12, 0, 0)
+    promotions = []
+    for i in range(total):
+        promotion = Promotion(
+            product=f"Produto {i}",
+            link="http://example.com",
+            price=10.0 + i,
+            status=PromotionStatus.APPROVED,
+            user_id=user.id,
+            # Pares de promoções com o mesmo created_at para testar o desempate por id
+            created_at=base + timedelta(minutes=i // 2),
+        )
+        db_session.add(promotion)
+        promotions.append(promotion)
+    db_session.commit()
+    return promotions
+
+
+def walk_pages(client: TestClient, url: str, limit: int):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        data = response.json()
+        items = data["items"] if "items" in data else data["promotions"]
+        ids.extend(item["id"] for item in items)
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_promotion_feed_cursor_walks_every_item_once(
+    client: TestClient, db_session: Session, regular_user
+):
+    promotions = create_promotions(db_session, regular_user, 25)
+    expected = [
+        p.id for p in sorted(promotions, key=lambda p: (p.created_at, p.id), reverse=True)
+    ]
+
+    assert walk_pages(client, "/promotions/", limit=4) == expected
+    assert walk_pages(client, f"/users/{regular_user.id}/promotions/", limit=7) == expected
+
+
+def test_last_page_has_no_next_cursor(client: TestClient, db_session: Session, regular_user):
+    create_promotions(db_session, regular_user, 3)
+
+    response = client.get("/promotions/", params={"limit": 3})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
+    assert response.json()["next_cursor"] is None
+
+
+def test_comments_are_paginated_oldest_first(
+    client: TestClient, db_session: Session, regular_user
+):
+    promotion = create_promotions(db_session, regular_user, 1)[0]
+    base = datetime(2024, 12, 2, 8, 0, 0)
+    for i in range(5):
+        db_session.add(
+            Comment(
+                content=f"Comentário {i}",
+                user_id=regular_user.id,
+                promotion_id=promotion.id,
+                created_at=base + timedelta(minutes=i),
+            )
+        )
+    db_session.commit()
+
+    first = client.get("/comments/", params={"promotion_id": promotion.id, "limit": 3}).json()
+    second = client.get(
+        "/comments/",
+        params={"promotion_id": promotion.id, "limit": 3, "cursor": first["next_cursor"]},
+    ).json()
+    contents = [c["content"] for c in first["items"] + second["items"]]
+    assert contents == [f"Comentário {i}" for i in range(5)]
+    assert second["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(client: TestClient):
+    response = client.get("/promotions/", params={"cursor": "não-é-um-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido"
@@ -0,0 +1,99 @@
+# tests/test_password_pool.py
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.core import password_pool
+from src.core.password_pool import PasswordHasher, PasswordPoolOverloaded
+from src.core.security import password_hasher
+from tests.conftest import auth_headers, create_user
+
+
+def test_process_pool_hashes_and_verifies():
+    hasher = PasswordHasher(workers=1, rounds=4)
+
+    async def scenario():
+        hashed = await hasher.hash("segredo")
+        return hashed, await hasher.verify_and_update("segredo", hashed)
+
+    try:
+        hashed, (valid, new_hash) = asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert valid and new_hash is None
+
+
+def test_overloaded_pool_rejects_fast(monkeypatch):
+    hasher = PasswordHasher(workers=0, max_pending=1, rounds=4)
+    release = threading.Event()
+
+    def slow_hash(password, rounds):
+        release.wait(5)
+        return "hash"
+
+    monkeypatch.setattr(password_pool, "hash_password", slow_hash)
+
+    async def scenario():
+        first = asyncio.ensure_future(hasher.hash("a"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordPoolOverloaded):
+            await hasher.hash("b")
+        release.set()
+        return await first
+
+    assert asyncio.run(scenario()) == "hash"
+    assert hasher.rejected == 1
+    assert hasher.pending == 0
+
+
+def test_failures_are_not_counted_as_completed(monkeypatch):
+    hasher = PasswordHasher(workers=0, rounds=4)
+
+    def broken_hash(password, rounds):
+        raise ValueError("bcrypt falhou")
+
+    async def scenario():
+        await hasher.hash("a")
+        monkeypatch.setattr(password_pool, "hash_password", broken_hash)
+        with pytest.raises(ValueError):
+            await hasher.hash("b")
+
+    asyncio.run(scenario())
+    assert (hasher.completed, hasher.failed, hasher.pending) == (1, 1, 0)
+
+
+def test_login_returns_503_when_overloaded(client: TestClient, db_session: Session, monkeypatch):
+    create_user(db_session, "fan", hashed_password=password_pool.hash_password("password", 4))
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post("/token", data={"username": "fan@example.com", "password": "password"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_upgrades_weak_hash(client: TestClient, db_session: Session, monkeypatch):
+    user = create_user(
+        db_session, "fan", hashed_password=password_pool.hash_password("password", 4)
+    )
+    monkeypatch.setattr(password_hasher, "workers", 0)
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+
+    data = {"username": "fan@example.com", "password": "password"}
+    assert client.post("/token", data=data).status_code == 200
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert password_pool.verify_and_update("password", user.hashed_password, 5) == (True, None)
+
+
+def test_pool_status_requires_moderator(client: TestClient, db_session: Session, monkeypatch):
+    monkeypatch.setattr(password_hasher, "workers", 0)
+    assert client.get("/api/v1/password-pool").status_code == 401
+    fan = auth_headers(client, create_user(db_session, "fan"))
+    assert client.get("/api/v1/password-pool", headers=fan).status_code == 403
+
+    admin = auth_headers(client, create_user(db_session, "admin", role="ADMIN"))
+    response = client.get("/api/v1/password-pool", headers=admin)
+    assert response.json()["max_pending"] == password_hasher.max_pending
@@ -0,0 +1,94 @@
+# tests/test_principal_cache.py
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.core.security import Principal, PrincipalCache, principal_cache
+from src.models.promotion import Promotion, PromotionStatus
+from tests.conftest import async_engine, auth_headers, create_user
+
+
+@pytest.fixture(autouse=True)
+def clear_principals():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+def test_cached_principal_skips_user_lookup(client: TestClient, db_session: Session):
+    fan = create_user(db_session, "fan")
+    promotion = Promotion(
+        product="Produto",
+        link="http://example.com",
+        price=10.0,
+        status=PromotionStatus.APPROVED,
+        user_id=fan.id,
+    )
+    db_session.add(promotion)
+    db_session.commit()
+    headers = auth_headers(client, fan)
+    params = {"promotion_id": promotion.id}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        client.get("/reactions/check", params=params, headers=headers)
+        first = len(statements)
+        client.get("/reactions/check", params=params, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert any("FROM users" in statement for statement in statements[:first])
+    assert not any("FROM users" in statement for statement in statements[first:])
+
+
+def test_profile_change_invalidates_principal(client: TestClient, db_session: Session):
+    fan = create_user(db_session, "fan")
+    headers = auth_headers(client, fan)
+    assert client.get("/me", headers=headers).status_code == 200
+
+    response = client.put("/users/me/", json={"email": "new@example.com"}, headers=headers)
+    assert response.status_code == 200
+    # O token antigo aponta para o e-mail anterior e deixa de autenticar na hora
+    assert client.get("/reactions/check/batch", headers=headers).status_code == 401
+
+
+def test_deleted_user_is_rejected(client: TestClient, db_session: Session):
+    fan = create_user(db_session, "fan")
+    admin = create_user(db_session, "admin", role="ADMIN")
+    fan_headers = auth_headers(client, fan)
+    admin_headers = auth_headers(client, admin)
+    params = {"promotion_ids": [1]}
+    assert (
+        client.get("/reactions/check/batch", params=params, headers=fan_headers).status_code == 200
+    )
+
+    assert client.delete(f"/users/{fan.id}", headers=admin_headers).status_code == 204
+    response = client.get("/reactions/check/batch", params=params, headers=fan_headers)
+    assert response.status_code == 401
+
+
+def test_principal_cache_bounds():
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    alice = Principal(id=1, email="a@example.com", role="USER", is_active=True)
+    bob = Principal(id=2, email="b@example.com", role="USER", is_active=True)
+
+    # Nunca além do exp do token
+    cache.set("expired", alice, time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.set("a1", alice, time.time() + 600)
+    cache.set("a2", alice, time.time() + 600)
+    cache.set("b1", bob, time.time() + 600)
+    assert cache.get("a1") is None  # LRU
+    assert cache.get("a2") == alice
+
+    cache.evict_keys(["principal:1", "outra-chave"])
+    assert cache.get("a2") is None
+    assert cache.get("b1") == bob
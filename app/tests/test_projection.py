@@ -0,0 +1,63 @@
+# tests/test_projection.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.core.projection import schema_columns
+from src.models.comment import Comment
+from src.models.coupon import Coupon, CouponStatus
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.user import User
+from src.schemas.promotion import Promotion as PromotionSchema
+from src.schemas.user import UserWithPromotions
+from tests.conftest import create_user
+
+
+def test_schema_columns():
+    columns = schema_columns(Promotion, PromotionSchema)
+    assert [column.key for column in columns] == list(PromotionSchema.model_fields)
+    # Relacionamentos não viram colunas: essas respostas continuam carregando entidades
+    with pytest.raises(ValueError, match="promotions"):
+        schema_columns(User, UserWithPromotions)
+
+
+def test_feeds_select_only_schema_columns(client: TestClient, db_session: Session):
+    author = create_user(db_session, "author")
+    for index in range(3):
+        promotion = Promotion(
+            product=f"Fone {index}",
+            link=f"https://loja.com/fone-{index}",
+            price=10.0 + index,
+            store="Loja",
+            status=PromotionStatus.APPROVED,
+            user_id=author.id,
+        )
+        db_session.add(promotion)
+        db_session.flush()
+        db_session.add(Comment(content="Bom preço", user_id=author.id, promotion_id=promotion.id))
+    db_session.add(
+        Coupon(
+            product="Loja",
+            link="https://loja.com",
+            code="DEZ",
+            status=CouponStatus.APPROVED,
+            user_id=author.id,
+        )
+    )
+    db_session.commit()
+
+    response = client.get("/promotions/", params={"limit": 2})
+    page = response.json()
+    assert [item["product"] for item in page["items"]] == ["Fone 2", "Fone 1"]
+    assert set(page["items"][0]) == set(PromotionSchema.model_fields)
+    # Uma única query: sem joinedload do autor nem selectinload dos comentários
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+    following = client.get("/promotions/", params={"cursor": page["next_cursor"]}).json()
+    assert [item["product"] for item in following["items"]] == ["Fone 0"]
+
+    coupons = client.get("/coupons/").json()["items"]
+    assert [(item["code"], item["status"]) for item in coupons] == [("DEZ", "APPROVED")]
+
+    user_page = client.get(f"/users/{author.id}/promotions/").json()
+    assert [item["price"] for item in user_page["promotions"]] == [12.0, 11.0, 10.0]
@@ -0,0 +1,91 @@
+# tests/test_query_stats.py
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from src.core import query_stats
+from src.core.config import settings
+from src.core.query_stats import QueryBudgetExceeded, QueryStats, statement_shape
+from src.models.promotion import Promotion, PromotionStatus
+from tests.conftest import auth_headers, create_user
+
+
+def test_repeated_shapes_ignore_parameters():
+    stats = QueryStats(max_queries=3, max_repeats=2)
+    for statement in (
+        "SELECT * FROM comments WHERE comments.parent_id = ?",
+        "SELECT * FROM comments\n WHERE comments.parent_id = $1",
+        "SELECT * FROM comments WHERE comments.parent_id = %(parent_id_1)s",
+        "SELECT * FROM users WHERE users.id IN (?, ?, ?) LIMIT 10",
+    ):
+        stats.record(statement, 0.001)
+
+    assert statement_shape("SELECT 1 FROM t WHERE id IN ($1, $2)") == (
+        "SELECT ? FROM t WHERE id IN (?)"
+    )
+    assert stats.as_dict() == {"queries": 4, "db_ms": 4.0, "max_repeats": 3}
+    assert stats.problems() == [
+        "4 queries (limite 3)",
+        "3x (limite 2): SELECT * FROM comments WHERE comments.parent_id = ?",
+    ]
+    assert stats.server_timing() == 'db;dur=4.0;desc="4 queries"'
+
+
+def test_failed_query_is_not_recorded():
+    query_stats.install()
+    engine = create_engine("sqlite://")
+    stats = QueryStats()
+    token = query_stats.current_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM tabela_inexistente")
+            conn.exec_driver_sql("SELECT 1")
+            assert "query_start" not in conn.info
+    finally:
+        query_stats.current_stats.reset(token)
+        engine.dispose()
+    assert stats.as_dict()["queries"] == 1
+
+
+def test_server_timing_and_log_line(client: TestClient, db_session: Session, caplog):
+    user = create_user(db_session, "fan")
+    db_session.add_all(
+        Promotion(
+            product=f"Produto {i}",
+            link="http://example.com",
+            price=10.0,
+            status=PromotionStatus.APPROVED,
+            user_id=user.id,
+        )
+        for i in range(3)
+    )
+    db_session.commit()
+
+    with caplog.at_level("INFO", logger="src.core.query_stats"):
+        response = client.get("/promotions/", params={"limit": 5})
+    assert response.headers["server-timing"].startswith("db;dur=")
+    line = json.loads(
+        next(r.message for r in caplog.records if r.message.startswith('{"method": "GET"'))
+    )
+    assert line["path"] == "/promotions/"
+    assert line["status"] == 200
+    assert f'desc="{line["queries"]} queries"' in response.headers["server-timing"]
+    assert line["max_repeats"] == 1
+
+
+def test_budget_fails_in_strict_mode(
+    client: TestClient, db_session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    headers = auth_headers(client, create_user(db_session, "scraper", role="ADMIN"))
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MAX_QUERIES", 0)
+
+    with pytest.raises(QueryBudgetExceeded, match="GET /promotions/"):
+        client.get("/promotions/")
+    # A ingestão em lote desativa o limite com query_budget()
+    body = json.dumps({"product": "Echo", "link": "http://example.com", "price": 1.0})
+    assert client.post("/promotions/bulk", content=body, headers=headers).status_code == 200
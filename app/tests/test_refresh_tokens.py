@@ -0,0 +1,79 @@
+# tests/test_refresh_tokens.py
+
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.core.security import hash_token
+from src.models.refresh_token import RefreshToken
+from src.models.user import User
+from src.services.token_sweeper import RefreshTokenSweeper
+from tests.conftest import TestingAsyncSessionLocal, create_user
+
+
+def login(client: TestClient, user: User) -> str:
+    response = client.post("/token", data={"username": user.email, "password": "password"})
+    return response.cookies["refresh_token"]
+
+
+def refresh(client: TestClient, refresh_token: str):
+    # O cookie é "secure" e o TestClient fala http: enviado manualmente
+    client.cookies.set("refresh_token", refresh_token)
+    try:
+        return client.post("/refresh-token")
+    finally:
+        client.cookies.clear()
+
+
+def test_tokens_are_stored_hashed(client: TestClient, db_session: Session):
+    user = create_user(db_session, "fan")
+    refresh_token = login(client, user)
+
+    stored = db_session.query(RefreshToken).one()
+    assert stored.token_hash == hash_token(refresh_token)
+    assert refresh_token not in {stored.token_hash, stored.family_id}
+
+
+def test_refresh_rotates_and_reuse_revokes_session(client: TestClient, db_session: Session):
+    user = create_user(db_session, "fan")
+    first = login(client, user)
+
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.cookies["refresh_token"]
+    assert second != first
+    assert refresh(client, second).status_code == 200
+
+    # Reapresentar um token já trocado derruba a sessão inteira
+    assert refresh(client, first).status_code == 401
+    assert db_session.query(RefreshToken).count() == 0
+
+
+def test_session_limit_drops_oldest_logins(client: TestClient, db_session: Session, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_MAX_SESSIONS", 2)
+    user = create_user(db_session, "fan")
+    tokens = [login(client, user) for _ in range(3)]
+
+    assert refresh(client, tokens[0]).status_code == 401
+    assert refresh(client, tokens[2]).status_code == 200
+
+
+def test_sweeper_deletes_expired_in_batches(db_session: Session):
+    user = create_user(db_session, "fan")
+    now = datetime.utcnow()
+    db_session.add_all(
+        RefreshToken(
+            token_hash=f"{i:064d}",
+            family_id=f"{i:032d}",
+            user_id=user.id,
+            expires_at=now + timedelta(days=1 if i < 2 else -1),
+        )
+        for i in range(7)
+    )
+    db_session.commit()
+
+    removed = asyncio.run(RefreshTokenSweeper(TestingAsyncSessionLocal, batch_size=2).sweep())
+    assert removed == 5
+    assert db_session.query(RefreshToken).count() == 2
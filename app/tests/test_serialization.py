@@ -0,0 +1,83 @@
+# tests/test_serialization.py
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+from benchmarks.serialization import fastapi_renderer, sample_promotions, serialized_renderer
+from fastapi.exceptions import ResponseValidationError
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from sqlalchemy.orm import Session
+from src.core import cache
+from src.core.serialization import render, type_adapter
+from src.models.promotion import Promotion, PromotionStatus
+from src.schemas.pagination import Page
+from src.schemas.promotion import Promotion as PromotionSchema
+from tests.conftest import create_user
+
+
+@pytest.fixture
+def memory_cache():
+    # Inicializado antes do cliente: o FastAPICache.init do startup vira no-op
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+    yield
+    InMemoryBackend._store.clear()
+    FastAPICache.reset()
+    cache.tag_index = cache.MemoryTagIndex()
+
+
+@pytest.mark.parametrize("paged", [False, True])
+def test_same_json_as_fastapi(paged: bool):
+    items = sample_promotions(5)
+    annotation = Page[PromotionSchema] if paged else List[PromotionSchema]
+    content = {"items": items} if paged else items
+
+    async def both():
+        return [
+            await renderer(annotation)(content)
+            for renderer in (fastapi_renderer, serialized_renderer)
+        ]
+
+    default, serialized = asyncio.run(both())
+    assert json.loads(serialized) == json.loads(default)
+    first = json.loads(serialized)["items"][0] if paged else json.loads(serialized)[0]
+    assert (first["status"], first["created_at"]) == ("APPROVED", "2024-01-01T00:01:00")
+
+
+def test_invalid_response_is_rejected():
+    promotion = sample_promotions(1)[0]
+    promotion.link = "sem-esquema"
+    with pytest.raises(ResponseValidationError):
+        render(type_adapter(PromotionSchema), promotion)
+
+
+def test_cache_stores_rendered_response(memory_cache, client: TestClient, db_session: Session):
+    author = create_user(db_session, "author")
+    db_session.add(
+        Promotion(
+            product="Fone",
+            link="https://loja.com/fone",
+            price=99.9,
+            status=PromotionStatus.APPROVED,
+            user_id=author.id,
+        )
+    )
+    db_session.commit()
+
+    first = client.get("/promotions/")
+    second = client.get("/promotions/")
+    assert [first.headers["X-FastAPI-Cache"], second.headers["X-FastAPI-Cache"]] == [
+        "MISS",
+        "HIT",
+    ]
+    assert first.json() == second.json()
+    assert first.headers["content-type"] == "application/json"
+
+    # O cache guarda o JSON da resposta, não o dump dos objetos ORM (com o autor)
+    [stored] = [value.data for value in InMemoryBackend._store.values()]
+    assert json.loads(stored) == first.json()
+    assert b"hashed_password" not in stored
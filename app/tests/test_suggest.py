@@ -0,0 +1,51 @@
+# tests/test_suggest.py
+
+from fastapi.testclient import TestClient
+from src.core.suggest import SuggestionCache, normalize_term
+from src.routers import coupon, promotion
+
+
+def test_suggestion_cache_evicts_least_recently_used():
+    cache = SuggestionCache(maxsize=2, ttl=60)
+    cache.set("a", ["A"])
+    cache.set("b", ["B"])
+    assert cache.get("a") == ["A"]  # "a" passa a ser o mais recente
+    cache.set("c", ["C"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ["A"]
+    assert cache.get("c") == ["C"]
+
+
+def test_suggestion_cache_expires_entries():
+    cache = SuggestionCache(maxsize=10, ttl=-1)
+    cache.set("a", ["A"])
+    assert cache.get("a") is None
+
+
+def test_normalize_term():
+    assert normalize_term("  Air   FRY ") == "air fry"
+
+
+def test_suggest_served_from_cache(client: TestClient):
+    # Prefixos quentes não chegam ao banco (o SQLite dos testes não tem pg_trgm)
+    promotion.suggestion_cache.clear()
+    coupon.suggestion_cache.clear()
+    promotion.suggestion_cache.set(("iphon", 8), ["iPhone 15", "iPhone 15 Pro"])
+    coupon.suggestion_cache.set(("air fry", 5), ["Air Fryer Mondial"])
+
+    response = client.get("/promotions/suggest", params={"q": "IPhon"})
+    assert response.status_code == 200
+    assert response.json() == ["iPhone 15", "iPhone 15 Pro"]
+
+    response = client.get("/coupons/suggest", params={"q": "air  fry", "limit": 5})
+    assert response.status_code == 200
+    assert response.json() == ["Air Fryer Mondial"]
+
+    promotion.suggestion_cache.clear()
+    coupon.suggestion_cache.clear()
+
+
+def test_suggest_requires_min_length(client: TestClient):
+    response = client.get("/promotions/suggest", params={"q": "i"})
+    assert response.status_code == 422
@@ -0,0 +1,138 @@
+# tests/test_write_behind.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.models.comment import Comment
+from src.models.comment_like import CommentLike
+from src.models.promotion import Promotion, PromotionStatus
+from src.models.reaction import Reaction
+from src.services import write_behind
+from tests.conftest import TestingAsyncSessionLocal, auth_headers, create_user
+
+
+@pytest.fixture
+def promotion(db_session: Session):
+    owner = create_user(db_session, "owner")
+    promotion = Promotion(
+        product="Produto",
+        link="http://example.com",
+        price=10.0,
+        status=PromotionStatus.APPROVED,
+        user_id=owner.id,
+    )
+    db_session.add(promotion)
+    db_session.commit()
+    db_session.refresh(promotion)
+    return promotion
+
+
+@pytest.fixture
+def buffer(client: TestClient):
+    write_behind.buffer = write_behind.WriteBehindBuffer(
+        write_behind.MemoryIntentStore(), session_factory=TestingAsyncSessionLocal
+    )
+    yield write_behind.buffer
+    write_behind.buffer = None
+
+
+def flush(buffer):
+    return asyncio.run(buffer.flush())
+
+
+def test_reaction_is_buffered_and_flushed(
+    client: TestClient, db_session: Session, promotion, buffer
+):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+    params = {"promotion_id": promotion.id}
+
+    response = client.post("/reactions/", json=params, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["pending"] is True
+    # Cliques repetidos não geram uma segunda intenção
+    response = client.post("/reactions/", json=params, headers=headers)
+    assert response.status_code == 400
+
+    # Nada gravado ainda, mas as leituras enxergam a intenção pendente
+    assert db_session.query(Reaction).count() == 0
+    assert client.get("/reactions/check", params=params, headers=headers).json() is True
+    assert client.get("/reactions/count", params=params).json() == 1
+
+    assert flush(buffer) == 1
+    db_session.expire_all()
+    assert db_session.query(Reaction).count() == 1
+    assert db_session.get(Promotion, promotion.id).reaction_count == 1
+    assert client.get("/reactions/count", params=params).json() == 1
+    assert client.get("/reactions/check", params=params, headers=headers).json() is True
+
+
+def test_like_then_unlike_cancel_out(client: TestClient, db_session: Session, promotion, buffer):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+    params = {"promotion_ids": [promotion.id]}
+
+    client.post("/reactions/", json={"promotion_id": promotion.id}, headers=headers)
+    response = client.delete("/reactions/", params={"promotion_id": promotion.id}, headers=headers)
+    assert response.status_code == 204
+    assert client.get("/reactions/count/batch", params=params).json() == {str(promotion.id): 0}
+    response = client.get("/reactions/check/batch", params=params, headers=headers)
+    assert response.json() == {str(promotion.id): False}
+
+    assert flush(buffer) == 0
+    db_session.expire_all()
+    assert db_session.get(Promotion, promotion.id).reaction_count == 0
+
+
+def test_comment_unlike_is_buffered(client: TestClient, db_session: Session, promotion, buffer):
+    fan = create_user(db_session, "fan")
+    comment = Comment(content="Oi", user_id=fan.id, promotion_id=promotion.id, like_count=1)
+    db_session.add(comment)
+    db_session.flush()
+    db_session.add(CommentLike(user_id=fan.id, comment_id=comment.id))
+    db_session.commit()
+    headers = auth_headers(client, fan)
+    params = {"comment_id": comment.id}
+
+    response = client.delete(f"/comment-likes/{comment.id}", headers=headers)
+    assert response.status_code == 200
+    assert client.get("/comment-likes/check", params=params, headers=headers).json() is False
+    assert client.get("/comment-likes/count", params=params).json() == 0
+    response = client.delete(f"/comment-likes/{comment.id}", headers=headers)
+    assert response.status_code == 404
+
+    assert flush(buffer) == 1
+    db_session.expire_all()
+    assert db_session.query(CommentLike).count() == 0
+    assert db_session.get(Comment, comment.id).like_count == 0
+
+
+def test_flush_skips_deleted_targets(client: TestClient, db_session: Session, promotion, buffer):
+    headers = auth_headers(client, create_user(db_session, "fan"))
+    client.post("/reactions/", json={"promotion_id": promotion.id}, headers=headers)
+
+    db_session.delete(db_session.get(Promotion, promotion.id))
+    db_session.commit()
+
+    assert flush(buffer) == 1
+    assert db_session.query(Reaction).count() == 0
+    # O lote foi concluído e não fica sendo reaplicado
+    assert flush(buffer) == 0
+
+
+def test_memory_store_retries_failed_batch():
+    store = write_behind.MemoryIntentStore()
+
+    async def scenario():
+        await store.push("promotion:1:1", write_behind.ADD, "promotion:1")
+        first = await store.take_batch()
+        await store.push("promotion:2:1", write_behind.ADD, "promotion:2")
+        # Sem complete_batch, o mesmo lote volta na próxima tentativa
+        retry = await store.take_batch()
+        await store.complete_batch()
+        following = await store.take_batch()
+        return first, retry, following
+
+    first, retry, following = asyncio.run(scenario())
+    assert first == retry == {"promotion:1:1": write_behind.ADD}
+    assert following == {"promotion:2:1": write_behind.ADD}